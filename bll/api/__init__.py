@@ -3,7 +3,10 @@
 
 ACTION = 'action'
 AUTH_TOKEN = 'auth_token'
+BACKEND_TIMING = 'backend_timing'
+BATCH = 'batch'
 COMPLETE = 'complete'
+CONCURRENCY = 'concurrency'
 DATA = 'data'
 DURATION = 'duration'
 ENDTIME = 'endtime'
@@ -26,6 +29,7 @@ STATUS_NOT_FOUND = 'not_found'
 STATUS_WARNING = 'warning'
 TARGET = 'target'
 TENANT_ID = 'tenant_id'
+TRACE = 'trace'
 TXN_ID = 'txn_id'
 VERSION = 'api_version'
 USER_AGENT = "Operations Console"
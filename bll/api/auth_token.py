@@ -13,6 +13,7 @@ from keystoneclient.v3 import client as ksclient3
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 
 from bll.api import USER_AGENT
+from bll.common import backend
 from bll.common.exception import BllAuthenticationFailedException
 from bll.common.util import get_conf, start_cache_cleaner
 
@@ -45,6 +46,41 @@ session_cache = make_region().configure(
 
 start_cache_cleaner(cache, cache_expiration, "SessionCacheCleaner")
 
+# Names of the services, by service type, under which calls made through
+# sessions are recorded
+DEPENDENCIES = {
+    'baremetal': 'ironic',
+    'block-storage': 'cinder',
+    'compute': 'nova',
+    'identity': 'keystone',
+    'image': 'glance',
+    'monitoring': 'monasca',
+    'network': 'neutron',
+    'volume': 'cinder',
+    'volumev2': 'cinder',
+    'volumev3': 'cinder',
+}
+
+
+class InstrumentedSession(session.Session):
+    """
+    Keystone session that records each of its requests with
+    :mod:`bll.common.backend`.  Requests that are not made to a service in
+    the catalog are those of the auth plugin to keystone itself.
+    """
+    def request(self, url, method, **kwargs):
+        endpoint_filter = kwargs.get('endpoint_filter') or {}
+        service_type = endpoint_filter.get('service_type', 'identity')
+
+        with backend.Call(DEPENDENCIES.get(service_type, service_type),
+                          '%s %s' % (method, backend.resource(url))) as call:
+            resp = super(InstrumentedSession, self).request(url, method,
+                                                            **kwargs)
+            call.failed = resp.status_code >= 400
+            if not kwargs.get('stream'):
+                call.size = len(resp.content)
+            return resp
+
 
 def login(username, password, domain='Default'):
     """
@@ -69,8 +105,8 @@ def login(username, password, domain='Default'):
                        password=password,
                        user_domain_name=domain,
                        unscoped=True)
-    unscoped_session = session.Session(auth=auth, user_agent=USER_AGENT,
-                                       verify=verify())
+    unscoped_session = InstrumentedSession(auth=auth, user_agent=USER_AGENT,
+                                           verify=verify())
     try:
         unscoped_token = unscoped_session.get_token()
     except Exception as e:
@@ -94,8 +130,8 @@ def get_appropriate_auth_ref(token):
     """
     LOG.debug("Obtaining unscoped keystone client with token")
     auth = v3.Token(auth_url=get_auth_url(), token=token, unscoped=True)
-    sess = session.Session(auth=auth, user_agent=USER_AGENT,
-                           verify=verify())
+    sess = InstrumentedSession(auth=auth, user_agent=USER_AGENT,
+                               verify=verify())
     ks = ksclient3.Client(session=sess, user_agent=USER_AGENT)
 
     project_list = [t.name for t in ks.projects.list(user=sess.get_user_id())]
@@ -107,10 +143,12 @@ def get_appropriate_auth_ref(token):
     role_names = []
 
     try:
-        ks = ksclient3.Client(token=token,
-                              auth_url=get_auth_url(),
-                              domain_name='default',
-                              verify=verify())
+        # This client authenticates with a session of its own
+        with backend.Call('keystone', 'POST auth/tokens'):
+            ks = ksclient3.Client(token=token,
+                                  auth_url=get_auth_url(),
+                                  domain_name='default',
+                                  verify=verify())
         role_names = ks.auth_ref.role_names
 
     except Exception:
@@ -172,9 +210,9 @@ def _get_auth_ref(token, project_name, domain_name='Default'):
                     project_name=project_name,
                     project_domain_name=domain_name,
                     token=token)
-    project_session = session.Session(auth=auth,
-                                      verify=verify(),
-                                      user_agent=USER_AGENT)
+    project_session = InstrumentedSession(auth=auth,
+                                          verify=verify(),
+                                          user_agent=USER_AGENT)
 
     # Trigger the generation of the new token
     project_session.get_auth_headers()
@@ -207,8 +245,8 @@ def _get_session(token):
     auth = v3.Token(auth_url=get_auth_url(),
                     project_id=auth_ref.project_id,
                     token=token)
-    return session.Session(auth=auth, user_agent=USER_AGENT,
-                           verify=verify())
+    return InstrumentedSession(auth=auth, user_agent=USER_AGENT,
+                               verify=verify())
 
 
 def _get_domain_session(token, domain_name=None):
@@ -219,8 +257,8 @@ def _get_domain_session(token, domain_name=None):
     auth = v3.Token(auth_url=get_auth_url(),
                     domain_id=domain_name,
                     token=token)
-    return session.Session(auth=auth, user_agent=USER_AGENT,
-                           verify=verify())
+    return InstrumentedSession(auth=auth, user_agent=USER_AGENT,
+                               verify=verify())
 
 
 warnings_filtered = False
@@ -3,18 +3,42 @@
 # (c) Copyright 2017 SUSE LLC
 #
 import logging
-import json
+import time
+from functools import partial
 
 from pecan import response, request, expose
 from pecan.rest import RestController
-from bll.api.request import BllRequest
+from bll.api.request import BllRequest, parse_body
+from bll.api.stream import is_stream, json_chunks
 from bll import api
-from bll.common.util import context, scrub_passwords, response_to_string
+from bll.common import backend, metrics, trace
+from bll.common.exception import InvalidBllRequestException
 from bll.common.job_status import get_job_status
+from bll.common.util import context, get_conf, response_to_string, \
+    Deferred, Scrubbed
+from bll.common.worker_pool import get_pool, run_concurrently
 from bll.plugins.service import SvcBase
 
 LOG = logging.getLogger(__name__)
 
+HTTP_REQUESTS = metrics.Counter(
+    'bll_http_requests_total', 'Requests to the REST API, by http status',
+    ('code',))
+HTTP_SECONDS = metrics.Histogram(
+    'bll_http_request_duration_seconds',
+    'Time taken to reply to requests to the REST API, by http status',
+    ('code',))
+HTTP_IN_FLIGHT = metrics.Gauge(
+    'bll_http_requests_in_flight',
+    'Requests to the REST API being processed')
+
+# Header requesting a breakdown of the time spent in backend services
+DEBUG_TIMING_HEADER = 'X-BLL-Debug-Timing'
+
+# Header requesting a trace of the request, or of the job whose status is
+# requested
+TRACE_HEADER = 'X-BLL-Trace'
+
 region = None
 
 
@@ -22,40 +46,76 @@ class AppController(RestController):
 
     @expose('json')
     def post(self, **kwargs):
+        HTTP_IN_FLIGHT.inc()
+        done = partial(self._record, time.time())
+        ret = None
+        try:
+            ret = self._post(done)
+            return ret
+        finally:
+            # Streamed responses are recorded once they have been written
+            if ret is not response:
+                done(response.status_int)
 
-        # generate a uniq id solely for the purpose of more
-        # easily matching up request/responses in the log
+    @staticmethod
+    def _record(start, code):
+        HTTP_IN_FLIGHT.dec()
+        code = str(code)
+        HTTP_REQUESTS.inc((code,))
+        HTTP_SECONDS.observe(time.time() - start, (code,))
 
+    @staticmethod
+    def _finish_stream(finish, done, envelope):
         try:
-            bll_request = BllRequest(json.loads(request.body))
+            return finish(envelope)
+        finally:
+            done()
 
-            # Add to thread local storage for logging
-            context.txn_id = bll_request.txn_id
+    def _post(self, done):
+        try:
+            # Parsed once per request, normally by V1.check_permissions
+            body = parse_body(request)
 
+            # The pecan request is only available on this thread, so the
+            # headers are extracted here before any work is handed off
+            auth_token = None
             if 'X-Auth-Token' in request.headers:
-                bll_request[api.AUTH_TOKEN] = request.headers['X-Auth-Token']
+                auth_token = request.headers['X-Auth-Token']
 
-            bll_request[api.LANGUAGE] = self.get_language(
+            language = self.get_language(
                 request.headers.get('Accept-Language'))
 
-            LOG.info("Received %s", bll_request)
-
-            # initial service request?
-            if bll_request.is_service_request():
-                ret = SvcBase.spawn_service(bll_request)
+            debug_timing = DEBUG_TIMING_HEADER in request.headers or \
+                get_conf('backend.debug_timing', False)
+            tracing = TRACE_HEADER in request.headers
 
+            if isinstance(body, dict) and api.BATCH in body:
+                ret = self.process_batch(body, auth_token, language,
+                                         debug_timing, tracing)
             else:
-                # Poll to retrieve async response
-                ret = get_job_status(bll_request.txn_id)
+                ret, finish = self._process(body, auth_token, language,
+                                            True, debug_timing, tracing)
+                if isinstance(ret, dict) and is_stream(ret.get(api.DATA)):
+                    # Write out data that is still being generated as it
+                    # arrives, rather than building the whole response in
+                    # memory, and only then finish the reply
+                    LOG.info("Response %s (streamed)",
+                             Deferred(response_to_string, ret))
+                    response.content_type = 'application/json'
+                    response.app_iter = json_chunks(
+                        ret, finish=partial(self._finish_stream, finish,
+                                            partial(done, 201)))
+                    ret = response
+                else:
+                    ret = finish(ret)
 
             response.status = 201
 
             if isinstance(ret, dict):
-                logstr = response_to_string(ret)
-                LOG.info("Response %s", logstr)
+                LOG.info("Response %s", Deferred(response_to_string, ret))
 
         except ValueError as info:
-            # json.loads was unable to convert the request to json
+            # parse_body was unable to convert the request to json
             LOG.error("Error converting request body to json: %s. "
                       "Request body: %s",
                       info, request.body)
@@ -64,20 +124,158 @@ class AppController(RestController):
                 api.STATUS: api.STATUS_ERROR,
                 api.DATA: [{api.DATA: str(info)}]
             }
-            LOG.info("Response ValueError: %s", scrub_passwords(ret))
+            LOG.info("Response ValueError: %s", Scrubbed(ret))
 
         except Exception as info:
-            response.status = 400
+            # Exceptions such as ServiceUnavailableException carry their own
+            # http status
+            response.status = getattr(info, 'status_code', 400)
             ret = {
                 api.STATUS: api.STATUS_ERROR,
                 api.DATA: [{api.DATA: str(info)}]
                 }
-            LOG.info("Response Exception: %s", scrub_passwords(ret))
+            LOG.info("Response Exception: %s", Scrubbed(ret))
 
         # Clear out txn_id as it leaves the system
         context.txn_id = ''
         return ret
 
+    @staticmethod
+    def process(body, auth_token, language, stream=False,
+                debug_timing=False, tracing=False):
+        """
+        Process a single request body, either by dispatching it to its
+        plugin or by returning the status of the job that it refers to.  If
+        ``stream`` is True, the data in the reply may be an iterator that
+        has yet to be consumed; see :mod:`bll.api.stream`.  If
+        ``debug_timing`` is True, the backend calls made while processing
+        the request are listed in the ``backend_timing`` field of the reply.
+        If ``tracing`` is True, the request is traced (see
+        :mod:`bll.common.trace`) and the tree of its spans, or those so far
+        of the job whose status is requested, is returned in the ``trace``
+        field of the reply.
+        """
+        ret, finish = AppController._process(body, auth_token, language,
+                                             stream, debug_timing, tracing)
+        return finish(ret)
+
+    @staticmethod
+    def _process(body, auth_token, language, stream, debug_timing, tracing):
+        # Returns the reply and a function that adds the backend timing and
+        # trace to it, which for a streamed reply is called once its data has
+        # been generated (see json_chunks)
+        bll_request = BllRequest(body)
+        bll_request.stream = stream
+
+        # Add to thread local storage for logging
+        context.txn_id = bll_request.txn_id
+
+        if auth_token is not None:
+            bll_request[api.AUTH_TOKEN] = auth_token
+
+        bll_request[api.LANGUAGE] = language
+
+        LOG.info("Received %s", bll_request)
+
+        if not debug_timing and not tracing:
+            return AppController._dispatch(bll_request), lambda ret: ret
+
+        if tracing and get_conf('trace.enabled', True) and \
+                bll_request.is_service_request():
+            trace.start(bll_request.txn_id)
+
+        if debug_timing:
+            backend.start_breakdown(bll_request.txn_id)
+
+        def finish(ret):
+            if debug_timing:
+                timing = backend.end_breakdown(bll_request.txn_id)
+
+            if isinstance(ret, dict):
+                ret = dict(ret)
+                if debug_timing:
+                    ret[api.BACKEND_TIMING] = timing
+                if tracing:
+                    ret[api.TRACE] = trace.tree(bll_request.txn_id)
+            return ret
+
+        try:
+            return AppController._dispatch(bll_request), finish
+        except Exception:
+            finish(None)
+            raise
+
+    @staticmethod
+    def _dispatch(bll_request):
+        # initial service request?
+        if bll_request.is_service_request():
+            return SvcBase.spawn_service(bll_request)
+
+        # Poll to retrieve async response
+        return get_job_status(bll_request.txn_id)
+
+    def process_batch(self, body, auth_token, language, debug_timing=False,
+                      tracing=False):
+        """
+        Process a batch of requests, which is a body of the form::
+
+            {"batch": [ request, request, ...], "concurrency": 4}
+
+        The requests are run on the worker pool with no more than
+        ``concurrency`` of them (capped by the ``batch.max_concurrency``
+        config setting) in progress at once.  The reply contains the
+        response to each request, in the same order as the requests.  A
+        failure of one request is reported in its own response, and does
+        not affect the others.
+        """
+        items = body[api.BATCH]
+        if not isinstance(items, list):
+            raise InvalidBllRequestException(
+                "The batch must be a list of requests")
+
+        max_size = get_conf('batch.max_size', 50)
+        if len(items) > max_size:
+            raise InvalidBllRequestException(
+                "A batch may contain at most %d requests" % max_size)
+
+        max_concurrency = get_conf('batch.max_concurrency', 8)
+        concurrency = body.get(api.CONCURRENCY) or max_concurrency
+        try:
+            concurrency = max(1, min(int(concurrency), max_concurrency))
+        except (TypeError, ValueError):
+            raise InvalidBllRequestException(
+                "The concurrency of a batch must be a number, not %r" %
+                (concurrency,))
+
+        LOG.info("Received batch of %d requests", len(items))
+
+        calls = [partial(self._process_item, item, auth_token, language,
+                         debug_timing, tracing)
+                 for item in items]
+        results = run_concurrently(get_pool('handle'), calls, concurrency)
+
+        replies = []
+        for result in results:
+            if isinstance(result, Exception):
+                result = {
+                    api.STATUS: api.STATUS_ERROR,
+                    api.DATA: [{api.DATA: str(result)}]
+                }
+            replies.append(result)
+
+        return {
+            api.STATUS: api.COMPLETE,
+            api.DATA: replies
+        }
+
+    def _process_item(self, body, auth_token, language, debug_timing,
+                      tracing):
+        try:
+            return self.process(body, auth_token, language,
+                                debug_timing=debug_timing, tracing=tracing)
+        finally:
+            context.txn_id = ''
+
     def get_language(self, accept_language):
 
         # Obtains the set of languages from the parameter (Accept-Language
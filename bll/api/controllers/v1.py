@@ -1,15 +1,18 @@
 # (c) Copyright 2015-2016 Hewlett Packard Enterprise Development LP
 # (c) Copyright 2017 SUSE LLC
 
-import json
 import logging
 
-from pecan import expose, request
+from pecan import expose, request, response
 from pecan.core import Response
-from pecan.secure import unlocked, SecureController
+from pecan.secure import secure, unlocked, SecureController
 
+from bll import api
 from bll.api.auth_token import login, validate
 from bll.api.controllers.app_controller import AppController
+from bll.api.request import parse_body
+from bll.common import codec, metrics
+from bll.common.util import get_conf
 
 LOG = logging.getLogger(__name__)
 
@@ -32,9 +35,10 @@ class V1(SecureController):
         """
         req_body = None
         try:
-            req_body = json.loads(request.body)
-            # Bypass deploy permission checks
-            if req_body['target'] == 'eula':
+            req_body = parse_body(request)
+            # Bypass deploy permission checks, but not for a batch, whose
+            # requests may be for any target
+            if req_body['target'] == 'eula' and api.BATCH not in req_body:
                 LOG.debug("v1 bypass check_permissions for %s",
                           req_body['target'])
                 return True
@@ -51,7 +55,7 @@ class V1(SecureController):
         if isinstance(req_body, dict) and req_body.get('target') == 'plugins'\
                 and "management_appliance" in token:
             try:
-                blob = json.loads(token)
+                blob = codec.loads(token)
                 ma_tokens = blob['management_appliance']['tokens']
                 token = ma_tokens[0]['auth_token']
                 request.headers['X-Auth-Token'] = token
@@ -68,7 +72,7 @@ class V1(SecureController):
         POST /auth_token
         BODY {"username": username, "password": password}
         """
-        body = json.loads(request.body)
+        body = codec.loads(request.body)
         username = body['username']
         password = body['password']
 
@@ -78,7 +82,7 @@ class V1(SecureController):
         try:
             auth_ref = login(username, password)
 
-            return json.dumps({
+            return codec.dumps({
                 'token': auth_ref.auth_token,
                 'expires': auth_ref.expires.isoformat()
             })
@@ -87,6 +91,28 @@ class V1(SecureController):
             LOG.info("User login as %s failed: %s" % (username, str(e)))
             return Response(str(e), 401)
 
+    @classmethod
+    def check_metrics_permissions(cls):
+        """
+        Metrics require a valid token, like other calls, unless the
+        ``metrics.allow_unauthenticated`` config setting is true (so that a
+        monitoring system can collect them without one)
+        """
+        if get_conf('metrics.allow_unauthenticated', False):
+            return True
+        return cls.check_permissions()
+
+    @secure('check_metrics_permissions')
+    @expose(content_type='text/plain')
+    def metrics(self):
+        """
+        GET /metrics
+        Returns the metrics of this BLL process in the Prometheus text format
+        """
+        response.content_type = None
+        response.headers['Content-Type'] = metrics.CONTENT_TYPE
+        return metrics.render()
+
     @unlocked
     # Return a result when querying the root document.
     @expose(generic=True, template=None, content_type='text/html')
@@ -0,0 +1,31 @@
+# (c) Copyright 2018 SUSE LLC
+"""
+Rendering of responses as JSON using the BLL's JSON codec
+(:mod:`bll.common.codec`) in place of pecan's built-in JSON renderer.
+"""
+from pecan.jsonify import GenericJSON
+
+from bll.common import codec
+
+# Supplies pecan's conversions of values that are not natively supported by
+# JSON, such as datetimes and objects with a __json__ method
+_generic = GenericJSON()
+
+
+def encode(obj):
+    """
+    Returns the JSON text of obj, converting values in the same way as the
+    pecan ``json`` renderer
+    """
+    return codec.dumps(obj, default=_generic.default)
+
+
+class JsonRenderer(object):
+    """
+    Replacement for pecan's built-in ``json`` renderer
+    """
+    def __init__(self, path, extra_vars):
+        pass
+
+    def render(self, template_path, namespace):
+        return encode(namespace)
@@ -1,17 +1,119 @@
 # (c) Copyright 2015-2016 Hewlett Packard Enterprise Development LP
 # (c) Copyright 2017 SUSE LLC
-import operator
+import collections
+from bll.common import codec
 from bll.common.util import scrub_passwords, new_txn_id
 
 from bll.common.exception import InvalidBllRequestException
 from bll import api
 
+# Key under which the parsed body is kept in the context of an http request
+BODY_CONTEXT_KEY = 'bll.body'
+
+
+def parse_body(http_request):
+    """
+    Returns the JSON body of the given http (pecan) request, parsing it only
+    on the first call for the request.  The parsed body is kept in the
+    request's context, so that the permission check and the controller that
+    both need it do not parse it separately.  A ValueError is raised if the
+    body is not valid JSON.
+    """
+    context = getattr(http_request, 'context', None)
+    if not isinstance(context, dict):
+        return codec.loads(http_request.body)
+
+    if BODY_CONTEXT_KEY not in context:
+        context[BODY_CONTEXT_KEY] = codec.loads(http_request.body)
+    return context[BODY_CONTEXT_KEY]
+
+
+class RequestData(collections.MutableMapping):
+    """
+    The legacy ``data`` dictionary of a :class:`BllRequest`.
+
+    Rather than being a copy, it is a view of the request itself: its items
+    are the non-RESERVED fields of the request, plus any fields whose names
+    are RESERVED (such as a doubly nested ``data`` dictionary), which can
+    only live here and are kept in a small dictionary of their own.  Changes
+    made through the view are therefore visible at the top level of the
+    request, and vice versa.
+    """
+    __slots__ = ('_request', '_nested')
+
+    def __init__(self, request, nested):
+        self._request = request
+        self._nested = nested
+
+    def __getitem__(self, key):
+        if key in _RESERVED:
+            return self._nested[key]
+        return dict.__getitem__(self._request, key)
+
+    def __setitem__(self, key, value):
+        if key in _RESERVED:
+            self._nested[key] = value
+        else:
+            dict.__setitem__(self._request, key, value)
+
+    def __delitem__(self, key):
+        if key in _RESERVED:
+            del self._nested[key]
+        else:
+            dict.__delitem__(self._request, key)
+
+    def __contains__(self, key):
+        if key in _RESERVED:
+            return key in self._nested
+        return dict.__contains__(self._request, key)
+
+    def __iter__(self):
+        for key in dict.__iter__(self._request):
+            if key not in _RESERVED:
+                yield key
+        for key in self._nested:
+            yield key
+
+    def __len__(self):
+        return len(self._nested) + sum(
+            1 for key in dict.__iter__(self._request)
+            if key not in _RESERVED)
+
+    def update(self, other=(), **kwargs):
+        # Copy plain dictionaries straight into the request when none of
+        # their keys are RESERVED, which is almost always the case
+        if isinstance(other, RequestData):
+            other = other.copy()
+        if type(other) is dict and _RESERVED.isdisjoint(other):
+            dict.update(self._request, other)
+            other = ()
+        super(RequestData, self).update(other, **kwargs)
+
+    def copy(self):
+        fields = dict(self._request)
+        for key in _RESERVED:
+            fields.pop(key, None)
+        fields.update(self._nested)
+        return fields
+
+    def __json__(self):
+        return self.copy()
+
+    def __repr__(self):
+        return repr(self.copy())
+
 
 class BllRequest(dict):
 
     RESERVED = (api.TARGET, api.ACTION, api.TXN_ID, api.REGION, api.AUTH_TOKEN,
                 api.DATA, api.LANGUAGE)
 
+    # Whether data generated by an iterator may be streamed back to the
+    # caller (see bll.api.stream).  Only set for requests received directly
+    # by the REST API, and deliberately not a dictionary item so that it is
+    # not passed on to requests derived from this one.
+    stream = False
+
     def __init__(self, request=None, target=None, auth_token=None,
                  operation=None, action=None, data=None, txn_id=None,
                  region=None, language=None, **kwargs):
@@ -45,8 +147,12 @@ class BllRequest(dict):
         In order to provide backward compatibility for older UI calls (which
         still populates the 'data' dictionary) and older BLL plugins (which
         still expect 'data' to be populated), this constructor will yield a
-        request object where all non-RESERVED request fields will be populated
-        as both top-level elements and as elements in the data dictionary.
+        request object where all non-RESERVED request fields are available
+        both as top-level elements and as elements in the data dictionary.
+        Each field is only stored once, at the top level: the data dictionary
+        is a :class:`RequestData` view of them, created when it is accessed
+        (so that the request holds no reference cycle that would delay the
+        release of a large payload).
         """
 
         if request:
@@ -57,37 +163,29 @@ class BllRequest(dict):
         if kwargs:
             self.update(**kwargs)
 
-        if not self.get(api.DATA):
-            self[api.DATA] = {}
+        # The operation may either be in a specific argument (when called
+        # from other plugins) or already populated (when called from the
+        # external REST API), and takes precedence over any operation in the
+        # data dictionary
+        op = operation or dict.get(self, api.OPERATION)
+
+        # Only the fields of the data dictionary whose names are RESERVED are
+        # stored under the data key; the rest are moved to the top level.
+        # (When copying another BllRequest, only those fields are found
+        # there, since the rest were copied with its top level.)
+        legacy = dict.get(self, api.DATA)
+        dict.__setitem__(self, api.DATA, {})
+        if isinstance(legacy, collections.Mapping):
+            self[api.DATA].update(legacy)
 
         if target:
             self[api.TARGET] = target
 
-        if isinstance(data, dict):
+        if isinstance(data, collections.Mapping):
             self[api.DATA].update(data)
 
-        # Copy the operation into the data dict.  The operation
-        # may either be in a specific argument (when called from other plugins)
-        # or already populated in (when called from external REST
-        # API)
-        op = operation or self.get(api.OPERATION)
         if op:
-            self[api.DATA][api.OPERATION] = op
-
-        # Provide backward compatibility to older callers by copying
-        # everything from the data dictionary into top-level elements of the
-        # request.
-
-        for key, value in self[api.DATA].iteritems():
-            if key not in self.RESERVED:
-                self[key] = value
-
-        # Provide backward compatibility to older services by copying
-        # everything from top level of the request into the data
-        # dictionary
-        for key, value in self.iteritems():
-            if key not in self.RESERVED and key not in self[api.DATA]:
-                self[api.DATA][key] = value
+            self[api.OPERATION] = op
 
         if action:
             self[api.ACTION] = action
@@ -111,6 +209,17 @@ class BllRequest(dict):
 
         self.txn_id = self[api.TXN_ID]
 
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if key == api.DATA and type(value) is dict:
+            return RequestData(self, value)
+        return value
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
     def _verify_request(self):
         if len(self) == 0:
             raise InvalidBllRequestException('No request')
@@ -138,7 +247,6 @@ class BllRequest(dict):
         # Print the DATA portion of the request with the OPERATION first,
         # and other keys afterward in sorted order
         data = self.get(api.DATA)
-        data_list = []
 
         text = ""
         if api.TARGET in self:
@@ -150,20 +258,21 @@ class BllRequest(dict):
         if api.ACTION in self:
             text += "ACTION:%s " % self[api.ACTION]
 
-        if isinstance(data, dict):
-            sorted_keys = sorted(data, key=operator.itemgetter(1))
+        if isinstance(data, collections.Mapping):
+            sorted_keys = sorted(data)
 
             if api.OPERATION in sorted_keys:
                 sorted_keys.remove(api.OPERATION)
                 text += "OPERATION:%s " % data[api.OPERATION]
 
-            for key in sorted_keys:
-                value = data[key]
-                data_list.append("%s:%s" % (key, scrub_passwords(value)))
-
-            text += scrub_passwords("DATA:{%s} " % ",".join(data_list))
+            fields = collections.OrderedDict(
+                (key, data[key]) for key in sorted_keys)
+            text += "DATA:%s " % scrub_passwords(fields)
 
         if api.TXN_ID in self:
             text += "TXN:%s " % self[api.TXN_ID]
 
         return text
+
+
+_RESERVED = frozenset(BllRequest.RESERVED)
@@ -2,6 +2,7 @@
 # (c) Copyright 2017 SUSE LLC
 #
 #     Created on Dec 16, 2014
+import copy
 import time
 from bll import api
 from bll.common.util import response_to_string
@@ -49,5 +50,18 @@ class BllResponse(dict):
         self[api.DATA].append({'stack_trace': stack_trace})
         return self
 
+    def copy_envelope(self):
+        """
+        Return a copy of this response in which the top-level fields and the
+        progress are copied, but the data payload is shared rather than
+        copied.  This is suitable for handing a response to another thread
+        when this response may continue to be updated, so long as the data
+        is replaced rather than modified in place.
+        """
+        envelope = copy.copy(self)
+        if isinstance(envelope.get(api.PROGRESS), dict):
+            envelope[api.PROGRESS] = dict(envelope[api.PROGRESS])
+        return envelope
+
     def __str__(self):
         return response_to_string(self)
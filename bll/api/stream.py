@@ -0,0 +1,240 @@
+# (c) Copyright 2018 SUSE LLC
+"""
+Support for streaming large responses.
+
+A plugin operation may return its data as an iterator (typically a
+generator) rather than a list, or as a dictionary in which some values are
+iterators.  When the request came directly from the REST API, the response
+is then written out as a chunked JSON document, with each iterator producing
+a JSON array as its items are generated, so that neither the full result nor
+its full JSON text need be held in memory at once.  In all other cases, such
+as calls from other plugins or results that are stored as job status, the
+iterators are simply converted into lists by :func:`materialize`.
+
+Before a reply is streamed, its iterators are wrapped by :func:`paginate`,
+which takes the first page of items from them straight away, so that a
+failure to produce it is reported in the reply as usual.  The remaining
+pages are fetched as the response is written out, by a function supplied by
+the plugin (see ``SvcBase._fetch_page``).
+"""
+import collections
+import functools
+import itertools
+import logging
+import time
+
+from bll import api
+from bll.api.renderer import encode
+from bll.common.util import context
+
+LOG = logging.getLogger(__name__)
+
+# Approximate number of bytes to accumulate before writing a chunk
+CHUNK_SIZE = 64 * 1024
+
+# Number of items taken from an iterator at a time while streaming
+PAGE_SIZE = 100
+
+
+def _is_iterator(value):
+    return isinstance(value, collections.Iterator)
+
+
+def is_stream(data):
+    """
+    Returns True if the data is, or is a dictionary containing, an iterator
+    """
+    if _is_iterator(data):
+        return True
+    if isinstance(data, dict):
+        return any(_is_iterator(v) for v in data.itervalues())
+    return False
+
+
+def materialize(data):
+    """
+    Returns the data with any iterators (see :func:`is_stream`) converted
+    into lists.  Data without iterators is returned unchanged.
+    """
+    if _is_iterator(data):
+        return list(data)
+    if isinstance(data, dict) and is_stream(data):
+        return {k: list(v) if _is_iterator(v) else v
+                for k, v in data.iteritems()}
+    return data
+
+
+class Pages(collections.Iterator):
+    """
+    Iterator over the items of another iterator, which are taken from it a
+    page of ``page_size`` items at a time.  The first page is taken when the
+    :class:`Pages` is created, and the others by calling ``fetch`` with a
+    function that takes the next page and returns it as a list.  Once the
+    items run out, fail, or are abandoned (see :meth:`close`), ``on_close``
+    is called.
+    """
+
+    def __init__(self, items, fetch, on_close=None, page_size=PAGE_SIZE):
+        self._items = iter(items)
+        self._fetch = fetch
+        self._on_close = on_close
+        self.page_size = page_size
+        self._page = collections.deque()
+        self._done = False
+        self._take(self._take_page)
+
+    def _take_page(self):
+        return list(itertools.islice(self._items, self.page_size))
+
+    def _take(self, take):
+        try:
+            page = take()
+        except Exception:
+            self.close()
+            raise
+        if len(page) < self.page_size:
+            self._done = True
+        self._page.extend(page)
+
+    def next(self):
+        if not self._page and not self._done:
+            self._take(functools.partial(self._fetch, self._take_page))
+        if not self._page:
+            self.close()
+            raise StopIteration()
+        return self._page.popleft()
+
+    __next__ = next
+
+    def close(self):
+        """
+        Stop taking items, e.g. because the response is no longer being
+        written
+        """
+        self._done = True
+        self._page.clear()
+        on_close, self._on_close = self._on_close, None
+        if on_close is not None:
+            on_close()
+
+
+def paginate(data, fetch, on_close=None, page_size=PAGE_SIZE):
+    """
+    Returns the data with any iterators (see :func:`is_stream`) wrapped in a
+    :class:`Pages`, taking their first page now.  Data without iterators is
+    returned unchanged.
+    """
+    def wrap(items):
+        return Pages(items, fetch, on_close, page_size)
+
+    if _is_iterator(data):
+        return wrap(data)
+    if isinstance(data, dict) and is_stream(data):
+        return {k: wrap(v) if _is_iterator(v) else v
+                for k, v in data.iteritems()}
+    return data
+
+
+def _close(data):
+    # Close any Pages in the data, releasing what they hold
+    values = data.itervalues() if isinstance(data, dict) else [data]
+    for value in values:
+        if isinstance(value, Pages):
+            value.close()
+
+
+def json_chunks(reply, chunk_size=CHUNK_SIZE, finish=None):
+    """
+    Generate the JSON text of the reply in chunks of roughly ``chunk_size``
+    bytes, consuming any iterators in its data as it goes.
+
+    The data is written before the rest of the reply so that, should the
+    data fail part way through, the reply can still be completed as valid
+    JSON whose status is ``error``.  The duration of the reply is updated to
+    include the time taken to generate the data.
+
+    If given, ``finish`` is called with the rest of the reply once the data
+    has been written, and returns it, with any fields that it adds.  It is
+    called with None if the response is abandoned before then.
+    """
+    # The data is generated after the controller has returned, so restore
+    # the transaction id for the benefit of logging in the plugin
+    caller_txn_id = getattr(context, 'txn_id', '')
+    context.txn_id = reply.get(api.TXN_ID, '')
+    envelope = dict(reply)
+    data = envelope.pop(api.DATA, None)
+    finished = False
+    try:
+        buf = ['{%s: ' % encode(api.DATA)]
+        size = 0
+        unclosed = []
+        try:
+            for text in _encode(data, unclosed):
+                buf.append(text)
+                size += len(text)
+                if size >= chunk_size:
+                    yield ''.join(buf)
+                    buf = []
+                    size = 0
+
+        except Exception as e:
+            LOG.exception("Failed while streaming response")
+            # Close any open arrays and objects, and report the error
+            buf.append(''.join(reversed(unclosed)))
+            envelope[api.STATUS] = api.STATUS_ERROR
+            envelope['error'] = "%s" % e
+
+        if api.STARTTIME in envelope:
+            envelope[api.ENDTIME] = time.time()
+            envelope[api.DURATION] = \
+                envelope[api.ENDTIME] - envelope[api.STARTTIME]
+
+        if finish is not None:
+            finished = True
+            envelope = finish(envelope)
+
+        for key, value in envelope.iteritems():
+            buf.append(', %s: %s' % (encode(key), encode(value)))
+        buf.append('}')
+        yield ''.join(buf)
+
+    finally:
+        _close(data)
+        if finish is not None and not finished:
+            finish(None)
+        context.txn_id = caller_txn_id
+
+
+def _encode(data, unclosed):
+    # Yield the JSON text of data, streaming any iterators within it.  The
+    # closing brackets of the arrays and objects that have been opened but
+    # not yet closed are kept in unclosed.
+    if _is_iterator(data):
+        for text in _encode_iterator(data, unclosed):
+            yield text
+
+    elif isinstance(data, dict) and is_stream(data):
+        unclosed.append('}')
+        yield '{'
+        for i, (key, value) in enumerate(data.iteritems()):
+            separator = ', ' if i else ''
+            if _is_iterator(value):
+                yield '%s%s: ' % (separator, encode(key))
+                for text in _encode_iterator(value, unclosed):
+                    yield text
+            else:
+                yield '%s%s: %s' % (separator, encode(key), encode(value))
+        unclosed.pop()
+        yield '}'
+
+    else:
+        yield encode(data)
+
+
+def _encode_iterator(items, unclosed):
+    unclosed.append(']')
+    yield '['
+    for i, item in enumerate(items):
+        yield (', ' if i else '') + encode(item)
+    unclosed.pop()
+    yield ']'
@@ -6,7 +6,11 @@ import atexit
 import logging
 from pecan import make_app
 
-from bll.common.util import setup_txn_logging
+from bll.api.renderer import JsonRenderer
+from bll.common import i18n, job_status
+from bll.common.util import get_conf, setup_async_logging, \
+    setup_txn_logging
+from bll.plugins import registry
 
 LOG = logging.getLogger(__name__)
 
@@ -15,13 +19,32 @@ def setup_app(config):
 
     app_conf = dict(config.app)
 
+    # Render json responses with the BLL's json codec
+    renderers = dict(app_conf.pop('custom_renderers', {}))
+    renderers.setdefault('json', JsonRenderer)
+
     app = make_app(
         app_conf.pop('root'),
         logging=getattr(config, 'logging', {}),
+        custom_renderers=renderers,
         **app_conf
     )
 
     setup_txn_logging()
+
+    # Write log records out on a background thread
+    if get_conf('async_logging.enabled', False):
+        setup_async_logging(get_conf('async_logging.max_queue', 10000))
+
+    # Resolve all plugins and read the message catalogs up front rather than
+    # on each request
+    registry.load()
+    i18n.preload()
+
+    # Delete expired job status in the background rather than as jobs are
+    # updated
+    job_status.start_janitor()
+
     LOG.info('*** BLL service started ****')
 
     return app
@@ -0,0 +1,225 @@
+# (c) Copyright 2018 SUSE LLC
+"""
+Instrumentation of the calls made by the BLL to the services that it depends
+upon, such as keystone, nova, monasca, ironic, cinder, ardana and mysql, so
+that the time taken by a request can be attributed to them.
+
+Each call is recorded in the ``bll_backend_*`` metrics (see
+:mod:`bll.common.metrics`) by dependency and endpoint, where the endpoint is
+a short description of the call that never contains ids, such as
+``GET servers/detail`` or ``metrics.list_statistics``.  Calls are recorded
+by:
+
+* :class:`Call`, a context manager around a single call
+* :class:`Client`, a proxy for a python client of a service, such as the
+  monasca client, which records each call to the methods of its managers
+* ``bll.api.auth_token.InstrumentedSession``, the keystone session used by
+  the nova, cinder and keystone clients
+
+Calls made by a transaction that is being traced are also recorded as spans
+of its trace (see :mod:`bll.common.trace`).
+
+When a breakdown has been started for a transaction (see
+:func:`start_breakdown`), the calls made on its behalf are also totalled,
+so that they can be returned in its response.  Calls made by threads working
+on behalf of the transaction are included, since their txn_id is derived
+from that of the transaction.
+"""
+import functools
+import inspect
+import re
+import threading
+import time
+
+from bll.common import metrics, trace
+from bll.common.util import context
+
+# Upper bounds, in bytes, of the buckets of the response size histogram
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304,
+                16777216)
+
+CALLS = metrics.Counter(
+    'bll_backend_calls_total',
+    'Calls to backend services, by dependency, endpoint and outcome',
+    ('dependency', 'endpoint', 'outcome'))
+SECONDS = metrics.Histogram(
+    'bll_backend_call_duration_seconds',
+    'Time taken by calls to backend services',
+    ('dependency', 'endpoint'))
+BYTES = metrics.Histogram(
+    'bll_backend_response_bytes',
+    'Size of the responses of backend services, where known',
+    ('dependency', 'endpoint'), buckets=SIZE_BUCKETS)
+
+# Path segments that are API versions or ids, which are left out of
+# endpoints
+_VERSION = re.compile(r'^v\d+(\.\d+)?$')
+_ID = re.compile(r'\d')
+
+# Totals of the calls made by transactions whose breakdown has been started,
+# keyed by root txn_id, then by (dependency, endpoint)
+_breakdowns = {}
+_lock = threading.Lock()
+
+
+def _root(txn_id):
+    return (txn_id or '').split('.')[0]
+
+
+def resource(path):
+    """
+    Returns the part of a url path that identifies the kind of resource it
+    refers to, by dropping its query, API versions and ids.  For example,
+    ``/v2.1/4a5c.../servers/detail?all_tenants=1`` becomes
+    ``servers/detail``, and ``/v3/users/4a5c.../groups`` becomes
+    ``users/*/groups``.
+    """
+    path = path.split('?')[0]
+    if '://' in path:
+        path = path.split('://', 1)[1].partition('/')[2]
+
+    segments = []
+    for segment in path.split('/'):
+        if not segment or _VERSION.match(segment):
+            continue
+        if _ID.search(segment):
+            # Ids at the start (such as a project id) say nothing of the
+            # resource
+            if segments:
+                segments.append('*')
+        else:
+            segments.append(segment)
+    return '/'.join(segments)
+
+
+def record(dependency, endpoint, seconds, size=None, failed=False):
+    """
+    Record a call to a backend service that took ``seconds`` and returned a
+    response of ``size`` bytes, if known
+    """
+    labels = (dependency, endpoint)
+    CALLS.inc(labels + ('error' if failed else 'ok',))
+    SECONDS.observe(seconds, labels)
+    if size is not None:
+        BYTES.observe(size, labels)
+
+    trace.record('%s %s' % labels, trace.BACKEND, time.time() - seconds,
+                 seconds)
+
+    if _breakdowns:
+        breakdown = _breakdowns.get(_root(getattr(context, 'txn_id', '')))
+        if breakdown is not None:
+            with _lock:
+                totals = breakdown.setdefault(labels, [0, 0.0, 0])
+                totals[0] += 1
+                totals[1] += seconds
+                totals[2] += size or 0
+
+
+class Call(object):
+    """
+    Context manager that records a call to a backend service made by its
+    body.  The call is recorded as failed if the body raises an exception
+    or sets ``failed``, and the size of the response may be set in ``size``.
+    """
+    def __init__(self, dependency, endpoint):
+        self.dependency = dependency
+        self.endpoint = endpoint
+        self.size = None
+        self.failed = False
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        record(self.dependency, self.endpoint, time.time() - self.start,
+               self.size, self.failed or exc_type is not None)
+
+
+class Client(object):
+    """
+    Proxy for a python client of a backend service, which records each call
+    to its methods, or to those of its managers, as an endpoint named after
+    the attributes used to reach the method.  For example::
+
+        client = backend.Client(msclient.Client(...), 'monasca')
+        client.metrics.list_statistics(...)
+
+    is recorded as a call to the ``metrics.list_statistics`` endpoint of
+    ``monasca``.  Other attributes, such as managers, are themselves
+    proxied, unless they are plain values.
+    """
+    # Attribute values that are returned as they are, rather than proxied
+    _PLAIN = (basestring, int, long, float, bool, type(None), dict, list,
+              tuple)
+
+    _OWN = ('_target', '_dependency', '_path')
+
+    def __init__(self, target, dependency, path=''):
+        self._target = target
+        self._dependency = dependency
+        self._path = path
+
+    def __getattr__(self, name):
+        value = getattr(self._target, name)
+        if name.startswith('_') or isinstance(value, self._PLAIN):
+            return value
+
+        endpoint = '%s.%s' % (self._path, name) if self._path else name
+        if not inspect.isroutine(value):
+            # Managers, including callable ones, keep their own attributes
+            return Client(value, self._dependency, endpoint)
+
+        @functools.wraps(value)
+        def call(*args, **kwargs):
+            with Call(self._dependency, endpoint):
+                return value(*args, **kwargs)
+        return call
+
+    def __call__(self, *args, **kwargs):
+        with Call(self._dependency, self._path):
+            return self._target(*args, **kwargs)
+
+    # The proxy passes for its target in isinstance checks, and attributes
+    # that are set on it (e.g. by mock.patch.object) are set on its target
+
+    @property
+    def __class__(self):
+        return type(self._target)
+
+    def __setattr__(self, name, value):
+        if name in self._OWN:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._target, name, value)
+
+    def __delattr__(self, name):
+        delattr(self._target, name)
+
+
+def start_breakdown(txn_id):
+    """
+    Start totalling the backend calls made on behalf of the transaction
+    """
+    with _lock:
+        _breakdowns.setdefault(_root(txn_id), {})
+
+
+def end_breakdown(txn_id):
+    """
+    Stop totalling the backend calls made on behalf of the transaction, and
+    return their totals as a list of dictionaries with the ``dependency``,
+    ``endpoint``, ``calls``, ``seconds`` and ``bytes`` of each endpoint
+    called, the slowest first
+    """
+    with _lock:
+        breakdown = _breakdowns.pop(_root(txn_id), {})
+        totals = sorted(breakdown.items(), key=lambda item: -item[1][1])
+
+    return [{'dependency': dependency,
+             'endpoint': endpoint,
+             'calls': calls,
+             'seconds': seconds,
+             'bytes': size}
+            for (dependency, endpoint), (calls, seconds, size) in totals]
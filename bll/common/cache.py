@@ -0,0 +1,231 @@
+# (c) Copyright 2018 SUSE LLC
+"""
+Bounded in-memory caches whose entries expire after a time-to-live.
+
+Each cache holds at most ``max_size`` entries, discarding the least recently
+used entry to make room for a new one.  An entry may also be given a stale
+period following its expiry, during which it is still returned (flagged as
+stale) so that the caller can use it while arranging for it to be refreshed.
+
+Caches are created on first use by :func:`get_cache` from the ``caches``
+section of the config file, for example::
+
+    caches = {
+        'response': {'max_size': 1000, 'enabled': True},
+    }
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from bll.common import metrics
+from bll.common.util import get_conf
+
+LOG = logging.getLogger(__name__)
+
+# Default maximum number of entries in each cache
+DEFAULT_MAX_SIZE = 1000
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+class TTLCache(object):
+    """
+    A thread-safe LRU cache whose entries expire after a time-to-live
+    """
+
+    def __init__(self, name, max_size=DEFAULT_MAX_SIZE, ttl=300,
+                 enabled=True):
+        self.name = name
+        self.max_size = max(1, int(max_size))
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+        # Statistics, keyed by the name supplied to lookup
+        self._stats = {}
+        self._evictions = 0
+
+    def lookup(self, key, name=None):
+        """
+        Returns a tuple of the cached value for the key and whether it is
+        still fresh, or None if there is no usable entry.
+        """
+        now = time.time()
+        with self._lock:
+            stats = self._stats.setdefault(name, {'hits': 0,
+                                                  'stale_hits': 0,
+                                                  'misses': 0})
+            entry = self._entries.pop(key, None)
+            if entry is None or now >= entry[2]:
+                stats['misses'] += 1
+                return None
+
+            # Re-insert the entry to mark it as the most recently used
+            self._entries[key] = entry
+            value, expires, _ = entry
+            if now < expires:
+                stats['hits'] += 1
+                return value, True
+
+            stats['stale_hits'] += 1
+            return value, False
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value for the key if it is still fresh, otherwise
+        the default.
+        """
+        entry = self.lookup(key)
+        if entry is None or not entry[1]:
+            return default
+        return entry[0]
+
+    def put(self, key, value, ttl=None, stale=0):
+        """
+        Store a value in the cache.
+
+        :param ttl: Number of seconds for which the value is fresh; defaults
+                    to the cache's ttl
+        :param stale: Number of seconds after the value expires during which
+                      it may still be returned as stale
+        """
+        if ttl is None:
+            ttl = self.ttl
+        expires = time.time() + ttl
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, expires, expires + stale)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, key):
+        """
+        Remove the entry for the key, if any
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_matching(self, predicate):
+        """
+        Remove all entries whose key satisfies the predicate, and return the
+        number of entries removed.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def begin_refresh(self, key):
+        """
+        Record that the entry for the key is being refreshed.  Returns False
+        if a refresh of it is already in progress.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def stats(self):
+        """
+        Returns a dictionary of statistics about the cache.  The hits,
+        stale_hits and misses are broken down by the name supplied to
+        :func:`lookup` in ``by_name``, and ``hit_ratio`` is the proportion of
+        all lookups that found an entry, whether fresh or stale.
+        """
+        with self._lock:
+            by_name = {name: dict(values)
+                       for name, values in self._stats.items()}
+            size = len(self._entries)
+            evictions = self._evictions
+
+        totals = {'hits': 0, 'stale_hits': 0, 'misses': 0}
+        for values in by_name.values():
+            for k in totals:
+                totals[k] += values[k]
+            values['hit_ratio'] = _hit_ratio(values)
+
+        totals.update({
+            'size': size,
+            'max_size': self.max_size,
+            'evictions': evictions,
+            'hit_ratio': _hit_ratio(totals),
+            'by_name': by_name,
+        })
+        return totals
+
+
+def _hit_ratio(values):
+    lookups = values['hits'] + values['stale_hits'] + values['misses']
+    if not lookups:
+        return 0
+    return float(values['hits'] + values['stale_hits']) / lookups
+
+
+def get_cache(name, max_size=DEFAULT_MAX_SIZE, ttl=300):
+    """
+    Returns the named cache, creating it on first use.  The ``max_size``,
+    ``ttl`` and ``enabled`` settings in the config file for the cache take
+    precedence over the given defaults.
+    """
+    cache = _caches.get(name)
+    if cache is not None:
+        return cache
+
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = TTLCache(
+                name,
+                max_size=get_conf('caches.%s.max_size' % name, max_size),
+                ttl=get_conf('caches.%s.ttl' % name, ttl),
+                enabled=get_conf('caches.%s.enabled' % name, True))
+        return _caches[name]
+
+
+def stats():
+    """
+    Returns the statistics of all caches that have been created, keyed by
+    cache name
+    """
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+
+@metrics.collector
+def _collect_metrics():
+    caches = sorted(stats().items())
+
+    def family(name, type_, documentation, key):
+        return (name, type_, documentation,
+                [({'cache': cache}, values[key]) for cache, values in caches])
+
+    lookups = []
+    for cache, values in caches:
+        for name, counts in sorted(values['by_name'].items()):
+            for result in ('hits', 'stale_hits', 'misses'):
+                lookups.append(({'cache': cache, 'name': name,
+                                 'result': result}, counts[result]))
+
+    return [
+        family('bll_cache_entries', 'gauge', 'Entries in the cache', 'size'),
+        family('bll_cache_evictions_total', 'counter',
+               'Entries evicted to make room for others', 'evictions'),
+        family('bll_cache_hit_ratio', 'gauge',
+               'Proportion of lookups that found an entry', 'hit_ratio'),
+        ('bll_cache_lookups_total', 'counter',
+         'Lookups by the name of the caller and their result', lookups),
+    ]
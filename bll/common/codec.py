@@ -0,0 +1,95 @@
+# (c) Copyright 2018 SUSE LLC
+"""
+JSON encoding and decoding for the hot paths of the BLL: parsing requests,
+rendering responses, and storing and retrieving job status.
+
+The fastest installed implementation is chosen separately for each
+direction.  Decoding uses ``simplejson`` when it is available with its C
+extension, since it parses about two to four times as fast as the standard
+library; otherwise it uses the ``json`` module from the standard library.
+Encoding always uses the standard library by default, since simplejson's
+``dumps`` is slower.  Implementations are configured to produce the same
+output as the standard library.  Callers should refer to the functions
+through the module (``codec.loads``) so that they follow any later call to
+:func:`use`.
+
+On python 2, simplejson decodes strings that are pure ASCII as ``str``
+rather than ``unicode`` (which the standard library always returns), so
+plugins may be given either type for the strings of a request.
+"""
+import functools
+import importlib
+import logging
+
+LOG = logging.getLogger(__name__)
+
+# Implementations in order of preference, for decoding and for encoding
+DECODERS = ('simplejson', 'json')
+ENCODERS = ('json',)
+CANDIDATES = ('simplejson', 'json')
+
+
+class Codec(object):
+    """
+    A JSON implementation, with ``loads`` and ``dumps`` functions that behave
+    like those of the standard library
+    """
+    def __init__(self, name, loads, dumps):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+
+def load(name):
+    """
+    Returns a :class:`Codec` for the named implementation, or raises
+    ImportError if it is not usable.
+    """
+    module = importlib.import_module(name)
+
+    if name == 'simplejson':
+        # Without its C extension simplejson is slower than the standard
+        # library
+        if module._import_c_make_encoder() is None:
+            raise ImportError("simplejson C extension is not available")
+
+        # Unlike the standard library, simplejson encodes namedtuples as
+        # objects by default
+        return Codec(name, module.loads,
+                     functools.partial(module.dumps,
+                                       namedtuple_as_object=False))
+
+    return Codec(name, module.loads, module.dumps)
+
+
+def available(candidates=CANDIDATES):
+    """
+    Returns the names of the usable implementations among the candidates, in
+    order of preference
+    """
+    names = []
+    for name in candidates:
+        try:
+            load(name)
+            names.append(name)
+        except ImportError:
+            pass
+    return names
+
+
+def use(decoder=None, encoder=None):
+    """
+    Switch to the named implementations for decoding and for encoding, or to
+    the preferred ones for those that are not given.
+    """
+    global loads, dumps, decoder_in_use, encoder_in_use
+    decoding = load(decoder or available(DECODERS)[0])
+    encoding = load(encoder or available(ENCODERS)[0])
+    loads, decoder_in_use = decoding.loads, decoding.name
+    dumps, encoder_in_use = encoding.dumps, encoding.name
+    LOG.debug("Using %s to decode and %s to encode JSON", decoder_in_use,
+              encoder_in_use)
+
+
+loads = dumps = decoder_in_use = encoder_in_use = None
+use()
@@ -0,0 +1,298 @@
+# (c) Copyright 2018 SUSE LLC
+"""
+A pool of reusable MySQL connections, shared by the job status store and the
+plugins that use the database, so that each use does not pay for opening a
+connection (a TCP handshake plus MySQL authentication).
+
+Connections are opened as they are needed, up to ``max_size`` at once;
+callers that find them all in use wait for one to be returned, and a
+:class:`ServiceUnavailableException` is raised if none is within
+``timeout`` seconds.  A connection that has been idle for ``check_after``
+seconds is pinged before being reused, and one that fails the check is
+replaced.  Connections that have been idle for ``max_idle`` seconds are
+closed, except for the ``min_size`` most recently used.
+
+The connection settings are read from the ``db`` section of the config file
+and those of the pool from the ``db_pool`` section, for example::
+
+    db_pool = {
+        'min_size': 1,
+        'max_size': 10,
+        'max_idle': 300,
+        'check_after': 30,
+        'timeout': 10,
+    }
+"""
+from contextlib import contextmanager
+import logging
+import threading
+import time
+
+import pecan
+import pymysql.cursors
+from pymysql.constants import SERVER_STATUS
+
+from bll.common import metrics
+from bll.common.exception import ServiceUnavailableException
+from bll.common.util import get_conf
+
+LOG = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'min_size': 1,
+    'max_size': 10,
+    'max_idle': 300,
+    'check_after': 30,
+    'timeout': 10,
+}
+
+WAIT_SECONDS = metrics.Histogram(
+    'bll_db_pool_wait_seconds',
+    'Time spent waiting for a database connection', ('pool',))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class ConnectionPool(object):
+    """
+    A thread-safe pool of the connections returned by ``connect``
+    """
+
+    def __init__(self, name, connect, min_size=1, max_size=10, max_idle=300,
+                 check_after=30, timeout=10):
+        self.name = name
+        self.connect = connect
+        self.max_size = max(1, int(max_size))
+        self.min_size = max(0, min(int(min_size), self.max_size))
+        self.max_idle = max_idle
+        self.check_after = check_after
+        self.timeout = timeout
+
+        # Idle connections and the time they were returned, the most
+        # recently used last
+        self._idle = []
+        self._size = 0
+        self._cond = threading.Condition()
+
+        # Statistics
+        self._waiting = 0
+        self._acquired = 0
+        self._created = 0
+        self._closed = 0
+        self._failed_checks = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager that yields a connection from the pool and returns
+        it afterwards.  Any transaction that is left open is rolled back.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def acquire(self):
+        """
+        Returns a connection, which must be given back with :meth:`release`
+        """
+        start = time.time()
+        conn = None
+        expired = []
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    expired.extend(self._expire(time.time()))
+                    if self._idle:
+                        conn, last_used = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+
+                    remaining = start + self.timeout - time.time()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise ServiceUnavailableException(
+                            "No database connection became available within "
+                            "%s seconds" % self.timeout)
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+            wait = time.time() - start
+            self._acquired += 1
+            self._wait_total += wait
+
+        WAIT_SECONDS.observe(wait, (self.name,))
+        for old in expired:
+            self._close(old)
+
+        if conn is not None and time.time() - last_used >= self.check_after:
+            if self._check(conn):
+                return conn
+            with self._cond:
+                self._failed_checks += 1
+            self._close(conn)
+            conn = None
+
+        if conn is None:
+            try:
+                conn = self.connect()
+            except Exception:
+                self._discarded()
+                raise
+            with self._cond:
+                self._created += 1
+        return conn
+
+    def release(self, conn):
+        """
+        Return a connection to the pool, or close it if it is no longer
+        usable
+        """
+        if not self._reset(conn):
+            self._close(conn)
+            self._discarded()
+            return
+
+        with self._cond:
+            self._idle.append((conn, time.time()))
+            self._cond.notify()
+
+    def close(self):
+        """
+        Close the idle connections
+        """
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._close(conn)
+
+    def stats(self):
+        """
+        Returns a dictionary of statistics about the pool.  Wait times are
+        the number of seconds that callers of :meth:`acquire` waited for a
+        connection.
+        """
+        with self._cond:
+            return {
+                'size': self._size,
+                'max_size': self.max_size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'waiting': self._waiting,
+                'acquired': self._acquired,
+                'created': self._created,
+                'closed': self._closed,
+                'failed_checks': self._failed_checks,
+                'timeouts': self._timeouts,
+                'wait_total': self._wait_total,
+            }
+
+    def _expire(self, now):
+        # Remove and return the connections that have been idle too long,
+        # oldest first, keeping at least min_size open.  Must be called with
+        # the lock held.
+        expired = []
+        while self._idle and self._size > self.min_size and \
+                now - self._idle[0][1] >= self.max_idle:
+            expired.append(self._idle.pop(0)[0])
+            self._size -= 1
+        return expired
+
+    def _discarded(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _check(self, conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception as e:
+            LOG.info("Replacing database connection that failed its check: "
+                     "%s", e)
+            return False
+
+    @staticmethod
+    def _reset(conn):
+        # Roll back any transaction left open, which would otherwise hold
+        # its locks and hide changes made since it started.  Returns False
+        # if the connection is not usable.
+        try:
+            if conn.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                conn.rollback()
+            return conn.open
+        except Exception as e:
+            LOG.info("Discarding database connection: %s", e)
+            return False
+
+    def _close(self, conn):
+        with self._cond:
+            self._closed += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def _connect():
+    config = pecan.conf.db.to_dict()
+    config['cursorclass'] = pymysql.cursors.DictCursor
+    return pymysql.connect(**config)
+
+
+def get_pool():
+    """
+    Returns the pool of connections to the BLL database, creating it from
+    the config file settings on first use
+    """
+    global _pool
+    if _pool is not None:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None:
+            settings = {key: get_conf('db_pool.%s' % key, default)
+                        for key, default in DEFAULTS.items()}
+            _pool = ConnectionPool('db', _connect, **settings)
+        return _pool
+
+
+@metrics.collector
+def _collect_metrics():
+    if _pool is None:
+        return []
+
+    values = _pool.stats()
+    labels = {'pool': _pool.name}
+
+    def family(name, type_, documentation, key):
+        return (name, type_, documentation, [(labels, values[key])])
+
+    return [
+        family('bll_db_pool_connections', 'gauge',
+               'Database connections open', 'size'),
+        family('bll_db_pool_connections_in_use', 'gauge',
+               'Database connections in use', 'in_use'),
+        family('bll_db_pool_waiting', 'gauge',
+               'Callers waiting for a database connection', 'waiting'),
+        family('bll_db_pool_created_total', 'counter',
+               'Database connections opened', 'created'),
+        family('bll_db_pool_closed_total', 'counter',
+               'Database connections closed', 'closed'),
+        family('bll_db_pool_failed_checks_total', 'counter',
+               'Idle database connections that failed their health check',
+               'failed_checks'),
+        family('bll_db_pool_timeouts_total', 'counter',
+               'Callers that gave up waiting for a database connection',
+               'timeouts'),
+    ]
@@ -25,3 +25,8 @@ class InvalidBllRequestException(BllException):
 
 class BllAuthenticationFailedException(BllException):
     overview = _("Authentication Failed to Backend Identity")
+
+
+class ServiceUnavailableException(BllException):
+    overview = _("Service unavailable")
+    status_code = 503
@@ -2,6 +2,34 @@
 # (c) Copyright 2017 SUSE LLC
 import gettext
 import os
+import threading
+
+LOCALE_DIR = os.path.realpath(os.path.join(
+    os.path.dirname(__file__), '..', 'locale'))
+
+# Languages whose catalogs are loaded by preload
+LANGUAGES = ('en', 'ja', 'zh')
+
+# Maximum number of languages whose translators are looked up by name;
+# beyond this (only reachable with made-up language names) their catalog is
+# looked up on every call
+MAX_LANGUAGES = 32
+
+DOMAIN = 'messages'
+
+# Translators keyed by language, and by the catalog that they use (None for
+# the fallback of untranslated text, shared by all unknown languages)
+_translators = {}
+_catalogs = {}
+_lock = threading.Lock()
+
+
+def _load(language):
+    translator = gettext.translation(domain=DOMAIN,
+                                     localedir=LOCALE_DIR,
+                                     fallback=True,
+                                     languages=[language])
+    return translator.ugettext
 
 
 def get_(language):
@@ -12,13 +40,34 @@ def get_(language):
         _ = get_('en')
         print _("localizable string")
 
+    The catalog for each language is only read on first use, and the same
+    function is returned thereafter.
+
     :param language:
     :return:
     """
-    locale_dir = os.path.realpath(os.path.join(
-        os.path.dirname(__file__), '..', 'locale'))
-    translator = gettext.translation(domain='messages',
-                                     localedir=locale_dir,
-                                     fallback=True,
-                                     languages=[language])
-    return translator.ugettext
+    translate = _translators.get(language)
+    if translate is not None:
+        return translate
+
+    # Loaded without holding the lock, so that requests in other languages
+    # are not held up by the disk access
+    catalog = gettext.find(DOMAIN, LOCALE_DIR, [language])
+    translate = _catalogs.get(catalog)
+    if translate is None:
+        translate = _load(language)
+
+    with _lock:
+        translate = _catalogs.setdefault(catalog, translate)
+        if len(_translators) < MAX_LANGUAGES:
+            _translators[language] = translate
+    return translate
+
+
+def preload():
+    """
+    Load the catalogs of the languages supported by the UI, so that the
+    first requests in each language need not
+    """
+    for language in LANGUAGES:
+        get_(language)
@@ -1,100 +1,535 @@
 # (c) Copyright 2016-2017 Hewlett Packard Enterprise Development LP
 # (c) Copyright 2017 SUSE LLC
+import abc
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-import json
 import logging
-import pecan
-import pymysql.cursors
+import threading
+import time
+
+import stevedore
+
 from bll import api
+from bll.common import backend
+from bll.common import codec
+from bll.common import db_pool
+from bll.common import metrics
+from bll.common.cache import get_cache
+from bll.common.util import get_conf
 
 LOG = logging.getLogger(__name__)
 
+JOB_STATUS_SECONDS = metrics.Histogram(
+    'bll_job_status_duration_seconds',
+    'Time taken to read and write job status', ('operation',))
+PURGED = metrics.Counter(
+    'bll_job_status_purged_total',
+    'Expired job status deleted by the janitor')
+COALESCED = metrics.Counter(
+    'bll_job_status_coalesced_total',
+    'Job progress updates superseded before being written')
+
+# Watches for jobs whose updates are awaited by other threads in this process,
+# keyed by txn_id
+_watches = {}
+_watches_lock = threading.Lock()
+
+_janitor = None
+_janitor_lock = threading.Lock()
+
+_write_behind = None
+_write_behind_lock = threading.Lock()
+
+# Default number of seconds for which the status of a job is kept after it was
+# last updated
+DEFAULT_RETENTION = 86400
+
+# Entry point namespace of the job status stores, and the one used by default
+NAMESPACE = 'bll.job_status'
+DEFAULT_STORE = 'mysql'
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def load_store(name=None):
+    """
+    Load the job status store published as ``name`` in the ``bll.job_status``
+    entry point namespace, or else the one named by the ``jobs.store``
+    setting of the config file (by default ``mysql``), passing it the
+    settings in the section of the ``jobs`` section named after it.  For
+    example::
+
+        jobs = {
+            'store': 'sqlite',
+            'sqlite': {'path': '/var/lib/bll/jobs.db'},
+        }
+
+    The stores provided are ``mysql`` (:class:`DbStatus`), which is shared by
+    all of the nodes of a cluster, and ``memory`` and ``sqlite`` (see
+    :mod:`bll.common.job_stores`), which are only suitable for a single node.
+    """
+    name = name or get_conf('jobs.store', DEFAULT_STORE)
+    options = get_conf('jobs.%s' % name)
+    options = options.to_dict() if options is not None else {}
+
+    mgr = stevedore.driver.DriverManager(NAMESPACE, name,
+                                         invoke_on_load=True,
+                                         invoke_kwds=options)
+    LOG.info("Using the %s job status store", name)
+    return mgr.driver
+
 
 def _get_status_obj():
-    # This function exists merely to facilitate injecting a test double
-    # during tests where mysql is not available
-    return DbStatus()
+    # This function also facilitates injecting a test double during tests
+    # where mysql is not available
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = load_store()
+    return _store
+
+
+def _write(txn_id, status):
+    with metrics.Timer(JOB_STATUS_SECONDS, ('write',)):
+        return _get_status_obj().update_job_status(txn_id, status)
+
+
+def _get_write_behind():
+    """
+    Returns the :class:`WriteBehind` of job status updates, configured by the
+    ``jobs`` section of the config file, for example::
+
+        jobs = {
+            'write_behind_interval': 1.0,
+            'write_behind_max_jobs': 10000,
+        }
+    """
+    global _write_behind
+    if _write_behind is None:
+        with _write_behind_lock:
+            if _write_behind is None:
+                _write_behind = WriteBehind(
+                    _write,
+                    interval=get_conf('jobs.write_behind_interval', 1.0),
+                    max_jobs=get_conf('jobs.write_behind_max_jobs', 10000))
+    return _write_behind
+
+
+def _get_results():
+    """
+    Returns the cache of the final status of jobs, which never changes once
+    written, so that polls for the result of a finished job need not read it
+    from the store.  It is configured by the ``caches.job_results`` section
+    of the config file; its entries expire ``jobs.retention`` seconds after
+    the job finished, or if the job finished on another node (and so the
+    time that it finished is not known), ``read_ttl`` seconds after it is
+    first read.  For example::
+
+        caches = {
+            'job_results': {'max_size': 1000, 'read_ttl': 3600},
+        }
+    """
+    return get_cache('job_results',
+                     ttl=get_conf('jobs.retention', DEFAULT_RETENTION))
+
+
+def is_final(status):
+    """
+    Returns True if the status is that of a job that has finished, which
+    will not change again
+    """
+    return isinstance(status, dict) and \
+        status.get(api.STATUS) in (api.COMPLETE, api.STATUS_ERROR)
 
 
 def update_job_status(txn_id, status):
-    return _get_status_obj().update_job_status(txn_id, status)
+    result = _get_write_behind().update(txn_id, status)
+
+    results = _get_results()
+    if results.enabled and is_final(status):
+        results.put(txn_id, dict(status))
+    else:
+        results.invalidate(txn_id)
+
+    _notify(txn_id, status)
+    return result
 
 
 def get_job_status(txn_id):
-    return _get_status_obj().get_job_status(txn_id)
+    status = _get_write_behind().pending(txn_id)
+    if status is not None:
+        return status
+
+    results = _get_results()
+    if results.enabled:
+        entry = results.lookup(txn_id, 'job_status')
+        if entry is not None:
+            # Copied, since the caller may add to the status
+            return dict(entry[0])
+
+    with metrics.Timer(JOB_STATUS_SECONDS, ('read',)):
+        status = _get_status_obj().get_job_status(txn_id)
 
+    if results.enabled and is_final(status):
+        ttl = get_conf('caches.job_results.read_ttl', 3600)
+        results.put(txn_id, dict(status), ttl=min(ttl, results.ttl))
+    return status
 
-class DbStatus(object):
+
+@contextmanager
+def watch_job_status(txn_id):
     """
-    Implementation using a mysql database.  This is suitable for production
-    clustered environments
+    Context manager that yields a :class:`JobWatch` which is notified of
+    each status update for the given txn_id that is made in this process.
+    Entering the context before starting the job ensures that no update is
+    missed.
     """
+    watch = JobWatch()
+    with _watches_lock:
+        _watches.setdefault(txn_id, []).append(watch)
+    try:
+        yield watch
+    finally:
+        with _watches_lock:
+            watches = _watches.get(txn_id, [])
+            watches.remove(watch)
+            if not watches:
+                _watches.pop(txn_id, None)
+
 
-    def _get_connection(self):
+def _notify(txn_id, status):
+    with _watches_lock:
+        watches = list(_watches.get(txn_id, ()))
+    if not watches:
+        return
+
+    # The job goes on to modify its status (normally its live response)
+    # while the watchers read it, so they are given a copy
+    if isinstance(status, dict):
+        status = dict(status)
+    for watch in watches:
+        watch.publish(status)
+
+
+class JobWatch(object):
+    """
+    Receives in-process status updates for a job.  Updates made by other
+    nodes in a cluster are not seen, so callers should fall back to
+    get_job_status when wait times out.
+    """
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._status = None
+        self._version = 0
+        self._seen = 0
+
+    def publish(self, status):
+        with self._condition:
+            self._status = status
+            self._version += 1
+            self._condition.notify_all()
+
+    def wait(self, timeout=None):
+        """
+        Wait up to timeout seconds for a status update that has not already
+        been returned, and return it.  Returns None if the timeout expires
+        first.
+        """
+        with self._condition:
+            if self._version == self._seen:
+                self._condition.wait(timeout)
+            if self._version == self._seen:
+                return None
+            self._seen = self._version
+            return self._status
+
+
+class WriteBehind(object):
+    """
+    Coalesces the progress updates of jobs in memory, writing the latest
+    update of each job at most once every ``interval`` seconds, so that jobs
+    that report their progress frequently do not each cost a database
+    write.
+
+    The first update of a job is written immediately, so that its status
+    can be found from any node of a cluster as soon as it has started, as
+    are all updates that are not progress (i.e. whose status is not
+    ``inprogress``), which replace any progress awaiting its write.  On
+    this node, the latest update of a job is returned even before it has
+    been written.  At most ``max_jobs`` updates are held at once; beyond
+    that, and if ``interval`` is 0, updates are written immediately.
+    """
 
-        # Retrieve a database connection based on the config
-        config = pecan.conf.db.to_dict()
-        config['cursorclass'] = pymysql.cursors.DictCursor
-        connection = pymysql.connect(**config)
-        return connection
+    def __init__(self, write, interval=1.0, max_jobs=10000):
+        self.write = write
+        self.interval = interval
+        self.max_jobs = max_jobs
+        self._lock = threading.Lock()
 
+        # Latest progress of each job that is yet to be written
+        self._pending = {}
+
+        # Jobs whose status has been written and is not yet final
+        self._started = OrderedDict()
+
+        # Jobs whose progress is being written by flush, with an event set
+        # once it has been written
+        self._flushing = {}
+
+        self._thread = None
+
+    def update(self, txn_id, status):
+        """
+        Write the status of the job now, or soon if it is progress of a
+        job that has already started
+        """
+        progress = isinstance(status, dict) and \
+            status.get(api.STATUS) == api.STATUS_INPROGRESS
+
+        with self._lock:
+            if progress and self.interval > 0 and \
+                    txn_id in self._started and \
+                    len(self._pending) < self.max_jobs:
+                if self._pending.pop(txn_id, None) is not None:
+                    COALESCED.inc()
+                # Copied, since the caller may go on to modify the status
+                self._pending[txn_id] = dict(status)
+                self._start()
+                return
+
+            self._pending.pop(txn_id, None)
+            flushing = self._flushing.get(txn_id)
+            if progress:
+                self._started[txn_id] = True
+                while len(self._started) > self.max_jobs:
+                    self._started.popitem(last=False)
+            else:
+                self._started.pop(txn_id, None)
+
+        # Let any earlier progress being written land first, so that it does
+        # not overwrite this update
+        if flushing is not None:
+            flushing.wait()
+        return self.write(txn_id, status)
+
+    def pending(self, txn_id):
+        """
+        Returns the progress of the job that is yet to be written, if any
+        """
+        with self._lock:
+            return self._pending.get(txn_id)
+
+    def flush(self):
+        """
+        Write all of the progress awaiting its write
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            for txn_id in pending:
+                self._flushing[txn_id] = threading.Event()
+
+        for txn_id, status in pending.iteritems():
+            try:
+                self.write(txn_id, status)
+            except Exception:
+                LOG.exception("Failed to write the progress of job %s",
+                              txn_id)
+            finally:
+                with self._lock:
+                    self._flushing.pop(txn_id).set()
+
+    def _start(self):
+        # Start the thread that flushes progress, if not already started.
+        # Must be called with the lock held.
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run,
+                                            name="JobStatusWriter")
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+
+class JobStatusStore(object):
+    """
+    Base class of the stores of job status, which are loaded by
+    :func:`load_store`.  Stores must be safe to use from several threads at
+    once, and must return a copy of the status that was written rather than
+    the object itself.
+
+    A store that does not discard expired status by itself should also have
+    a ``purge(before, limit)`` method, which deletes the status of up to
+    ``limit`` jobs that were last updated before the given datetime and
+    returns the number deleted, for the :class:`Janitor` to call.
+    """
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
     def update_job_status(self, txn_id, status):
-        connection = self._get_connection()
+        pass
+
+    @abc.abstractmethod
+    def get_job_status(self, txn_id):
+        """
+        Returns the status of the job, or a status of ``notfound`` if there
+        is none
+        """
+
+    @staticmethod
+    def encode(status):
         try:
-            with connection.cursor() as cursor:
-                sql = "SELECT `status` FROM `jobs` WHERE `id`=%s"
-                cursor.execute(sql, txn_id)
-                row = cursor.fetchone()
-                timestamp = datetime.now()
-                message = ""
-                try:
-                    message = json.dumps(status)
-                except TypeError:
-                    message = json.dumps(str(status))
-
-                if row is None:
+            return codec.dumps(status)
+        except TypeError:
+            return codec.dumps(str(status))
+
+
+class DbStatus(JobStatusStore):
+    """
+    Implementation using a mysql database.  This is suitable for production
+    clustered environments.  Connections are taken from the shared pool
+    (see :mod:`bll.common.db_pool`).
+
+    It has no settings of its own, since its connections are configured by
+    the ``db_pool`` section of the config file; any given in the
+    ``jobs.mysql`` section are ignored.
+    """
+    TABLE = 'jobs'
+
+    def __init__(self, **options):
+        if options:
+            LOG.warn("Ignoring the settings of the mysql job status store, "
+                     "which is configured by the db_pool section: %s",
+                     ", ".join(sorted(options)))
+
+    def update_job_status(self, txn_id, status):
+        message = self.encode(status)
+
+        with backend.Call('mysql', 'jobs.write') as call, \
+                db_pool.get_pool().connection() as connection:
+            try:
+                with connection.cursor() as cursor:
                     sql = """
-                        INSERT INTO `jobs` (`id`, `updated_at`, `status`)
+                        INSERT INTO `{0}` (`id`, `updated_at`, `status`)
                         VALUES (%s, %s, %s)
-                    """
-                    parms = [txn_id, timestamp, message]
-                else:
-                    sql = """
-                        UPDATE `jobs`
-                        SET `updated_at`=%s, `status`=%s
-                        WHERE `id`=%s
-                    """
-                    parms = [timestamp, message, txn_id]
+                        ON DUPLICATE KEY UPDATE
+                            `updated_at`=VALUES(`updated_at`),
+                            `status`=VALUES(`status`)
+                    """.format(self.TABLE)
+                    cursor.execute(sql, [txn_id, datetime.now(), message])
+                connection.commit()
+            except Exception as e:
+                call.failed = True
+                LOG.exception(e)
 
-                cursor.execute(sql, parms)
+    def get_job_status(self, txn_id):
 
-            connection.commit()
+        with backend.Call('mysql', 'jobs.read') as call, \
+                db_pool.get_pool().connection() as connection:
+            try:
+                with connection.cursor() as cursor:
+                    sql = "SELECT `status` FROM `{0}` WHERE `id`=%s".format(
+                        self.TABLE)
+                    cursor.execute(sql, txn_id)
+                    row = cursor.fetchone()
+                    if row is None:
+                        return {api.STATUS: api.STATUS_NOT_FOUND}
 
-            dayold = timestamp - timedelta(days=1)
+                    call.size = len(row.get("status"))
+                    return codec.loads(row.get("status"))
+            except Exception as e:
+                call.failed = True
+                LOG.exception(e)
 
+    def purge(self, before, limit):
+        """
+        Delete the status of up to ``limit`` jobs that were last updated
+        before the given datetime, and return the number deleted
+        """
+        with backend.Call('mysql', 'jobs.purge'), \
+                db_pool.get_pool().connection() as connection:
             with connection.cursor() as cursor:
-                sql = "DELETE FROM `jobs` where `updated_at` < %s"
-                cursor.execute(sql, dayold)
+                sql = """
+                    DELETE FROM `{0}` WHERE `updated_at` < %s LIMIT %s
+                """.format(self.TABLE)
+                count = cursor.execute(sql, [before, limit])
             connection.commit()
-        except Exception as e:
-            LOG.exception(e)
+        return count
 
-        finally:
-            connection.close()
 
-    def get_job_status(self, txn_id):
+class Janitor(object):
+    """
+    Periodically deletes the status of jobs that have not been updated for
+    ``retention`` seconds, in batches of at most ``batch_size`` jobs so that
+    no single statement holds locks on the table for long.  Only job status
+    stores that have a ``purge`` method need this.
+    """
 
-        connection = self._get_connection()
-        try:
-            with connection.cursor() as cursor:
-                sql = "SELECT `status` FROM `jobs` WHERE `id`=%s"
-                cursor.execute(sql, txn_id)
-                row = cursor.fetchone()
-                if row is None:
-                    return {api.STATUS: api.STATUS_NOT_FOUND}
-
-                return json.loads(row.get("status"))
-        except Exception as e:
-            LOG.exception(e)
-        finally:
-            connection.close()
+    def __init__(self, retention=DEFAULT_RETENTION, interval=300,
+                 batch_size=1000, pause=0.1):
+        self.retention = retention
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+
+    def run_once(self):
+        """
+        Delete all of the expired job status, and return the number deleted
+        """
+        purge = getattr(_get_status_obj(), 'purge', None)
+        if purge is None:
+            return 0
+
+        before = datetime.now() - timedelta(seconds=self.retention)
+        total = 0
+        while True:
+            count = purge(before, self.batch_size)
+            total += count
+            if count < self.batch_size:
+                break
+            time.sleep(self.pause)
+
+        if total:
+            PURGED.inc(amount=total)
+            LOG.debug("Deleted the status of %d expired jobs", total)
+        return total
+
+    def start(self):
+        t = threading.Thread(target=self._run, name="JobStatusJanitor")
+        t.daemon = True
+        t.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.run_once()
+            except Exception:
+                LOG.exception("Failed to delete expired job status")
+
+
+def start_janitor():
+    """
+    Start the janitor that deletes expired job status in the background,
+    configured by the ``jobs`` section of the config file, for example::
+
+        jobs = {
+            'retention': 86400,
+            'janitor_interval': 300,
+            'janitor_batch_size': 1000,
+        }
+    """
+    global _janitor
+    with _janitor_lock:
+        if _janitor is None:
+            _janitor = Janitor(
+                retention=get_conf('jobs.retention', DEFAULT_RETENTION),
+                interval=get_conf('jobs.janitor_interval', 300),
+                batch_size=get_conf('jobs.janitor_batch_size', 1000))
+            _janitor.start()
+        return _janitor
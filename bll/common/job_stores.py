@@ -0,0 +1,192 @@
+# (c) Copyright 2018 SUSE LLC
+"""
+Stores of job status for deployments of a single BLL node, which need no
+database server.  They are selected by the ``jobs.store`` setting of the
+config file (see :func:`bll.common.job_status.load_store`):
+
+* ``memory`` (:class:`MemoryStatus`) keeps the status of jobs in memory,
+  discarding that of the jobs that finished longest ago beyond ``max_jobs``,
+  and loses them when the BLL restarts
+* ``sqlite`` (:class:`SqliteStatus`) keeps them in an SQLite database file,
+  in write-ahead log mode so that reads are not blocked by writes
+
+For example::
+
+    jobs = {
+        'store': 'memory',
+        'memory': {'max_jobs': 10000},
+    }
+
+Job status is discarded once it has not been updated for ``jobs.retention``
+seconds (one day by default).
+"""
+from collections import OrderedDict
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from bll import api
+from bll.common import backend
+from bll.common import codec
+from bll.common.job_status import DEFAULT_RETENTION, JobStatusStore, \
+    is_final
+from bll.common.util import get_conf
+
+LOG = logging.getLogger(__name__)
+
+
+def _timestamp(when):
+    # Returns the time of a datetime as seconds since the epoch
+    return time.mktime(when.timetuple()) + when.microsecond / 1e6
+
+
+class MemoryStatus(JobStatusStore):
+    """
+    Implementation that keeps the status of jobs in memory.  Once there is
+    the status of more than ``max_jobs`` jobs, the status of the jobs that
+    finished longest ago is discarded; that of jobs still in progress is
+    only discarded once it expires, so that their callers can always find
+    it.  Expired status is deleted by the
+    :class:`bll.common.job_status.Janitor`, and is never returned.  Status is
+    kept encoded, so that it is copied as it is with the other stores.
+
+    Its settings are only taken from the ``jobs.memory`` section of the
+    config file, except that ``retention`` defaults to ``jobs.retention``.
+    """
+
+    def __init__(self, max_jobs=10000, retention=None):
+        if retention is None:
+            retention = get_conf('jobs.retention', DEFAULT_RETENTION)
+        self.max_jobs = max(1, int(max_jobs))
+        self.retention = retention
+        self._lock = threading.Lock()
+
+        # The encoded status of jobs and the time they were last updated,
+        # the least recently updated first
+        self._running = OrderedDict()
+        self._finished = OrderedDict()
+
+    def update_job_status(self, txn_id, status):
+        entry = (self.encode(status), time.time())
+        with self._lock:
+            self._running.pop(txn_id, None)
+            self._finished.pop(txn_id, None)
+            if is_final(status):
+                self._finished[txn_id] = entry
+            else:
+                self._running[txn_id] = entry
+
+            excess = len(self._running) + len(self._finished) - \
+                self.max_jobs
+            for _ in range(min(excess, len(self._finished))):
+                self._finished.popitem(last=False)
+
+    def get_job_status(self, txn_id):
+        with self._lock:
+            entry = self._running.get(txn_id) or self._finished.get(txn_id)
+
+        if entry is None or entry[1] < time.time() - self.retention:
+            return {api.STATUS: api.STATUS_NOT_FOUND}
+        return codec.loads(entry[0])
+
+    def purge(self, before, limit):
+        """
+        Delete the status of up to ``limit`` jobs that were last updated
+        before the given datetime, and return the number deleted
+        """
+        before = _timestamp(before)
+        count = 0
+        with self._lock:
+            for jobs in (self._running, self._finished):
+                while jobs and count < limit and \
+                        next(jobs.itervalues())[1] < before:
+                    jobs.popitem(last=False)
+                    count += 1
+        return count
+
+    def count(self):
+        """
+        Returns the number of jobs whose status is kept
+        """
+        with self._lock:
+            return len(self._running) + len(self._finished)
+
+
+class SqliteStatus(JobStatusStore):
+    """
+    Implementation using an SQLite database file, with a connection for each
+    thread that uses it.  Expired status is deleted by the
+    :class:`bll.common.job_status.Janitor`.
+    """
+    TABLE = 'jobs'
+
+    def __init__(self, path=None, timeout=10):
+        self.path = path or os.path.join(tempfile.gettempdir(), 'bll_jobs.db')
+        self.timeout = timeout
+        self._local = threading.local()
+
+        connection = self._connection()
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS `{0}` (
+                `id` TEXT PRIMARY KEY,
+                `updated_at` REAL NOT NULL,
+                `status` TEXT NOT NULL
+            )""".format(self.TABLE))
+        connection.execute("""
+            CREATE INDEX IF NOT EXISTS `{0}_updated_at`
+                ON `{0}` (`updated_at`)""".format(self.TABLE))
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Statements are committed as they are executed, since each is a
+            # transaction of its own
+            connection = sqlite3.connect(self.path, timeout=self.timeout,
+                                         isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def update_job_status(self, txn_id, status):
+        message = self.encode(status)
+
+        with backend.Call('sqlite', 'jobs.write') as call:
+            try:
+                self._connection().execute(
+                    "INSERT OR REPLACE INTO `{0}` (`id`, `updated_at`, "
+                    "`status`) VALUES (?, ?, ?)".format(self.TABLE),
+                    (txn_id, time.time(), message))
+            except Exception as e:
+                call.failed = True
+                LOG.exception(e)
+
+    def get_job_status(self, txn_id):
+        with backend.Call('sqlite', 'jobs.read') as call:
+            try:
+                row = self._connection().execute(
+                    "SELECT `status` FROM `{0}` WHERE `id`=?".format(
+                        self.TABLE), (txn_id,)).fetchone()
+                if row is None:
+                    return {api.STATUS: api.STATUS_NOT_FOUND}
+
+                call.size = len(row[0])
+                return codec.loads(row[0])
+            except Exception as e:
+                call.failed = True
+                LOG.exception(e)
+
+    def purge(self, before, limit):
+        """
+        Delete the status of up to ``limit`` jobs that were last updated
+        before the given datetime, and return the number deleted
+        """
+        with backend.Call('sqlite', 'jobs.purge'):
+            cursor = self._connection().execute("""
+                DELETE FROM `{0}` WHERE `id` IN (
+                    SELECT `id` FROM `{0}` WHERE `updated_at` < ? LIMIT ?)
+                """.format(self.TABLE), (_timestamp(before), limit))
+        return cursor.rowcount
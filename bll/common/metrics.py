@@ -0,0 +1,237 @@
+# (c) Copyright 2018 SUSE LLC
+"""
+Counters, gauges and latency histograms describing the activity of the BLL,
+served in the Prometheus text format by the ``/v1/metrics`` REST endpoint.
+
+Metrics are created at module level by the code that updates them, for
+example::
+
+    REQUESTS = metrics.Counter('bll_requests_total', 'Requests handled',
+                               ('target', 'operation'))
+
+    REQUESTS.inc(('compute', 'get_cluster_utilization'))
+
+Statistics that are already kept elsewhere (such as those of the worker
+pools and caches) are read when the metrics are rendered, by functions
+registered with :func:`collector`.
+
+Since label values come from requests, each metric keeps at most
+``MAX_SERIES`` distinct sets of them; any further ones are recorded with
+every label value set to ``other``.
+"""
+import bisect
+import threading
+import time
+
+MAX_SERIES = 1000
+
+# Upper bounds, in seconds, of the buckets of latency histograms
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_registry = []
+_collectors = []
+_registry_lock = threading.Lock()
+
+
+class _Metric(object):
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    @staticmethod
+    def _key(labels):
+        return tuple('' if v is None else v for v in labels)
+
+    def _get(self, labels):
+        # Returns the series for the label values, creating it if needed.
+        # Must be called with the lock held.
+        labels = self._key(labels)
+        series = self._series.get(labels)
+        if series is None:
+            if len(self._series) >= MAX_SERIES:
+                labels = ('other',) * len(self.labelnames)
+                series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = self._new_series()
+        return series
+
+    def _new_series(self):
+        return [0]
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def samples(self):
+        """
+        Returns a list of (name, labels dict, value) tuples
+        """
+        with self._lock:
+            return [(self.name, dict(zip(self.labelnames, labels)), series[0])
+                    for labels, series in sorted(self._series.items())]
+
+
+class Counter(_Metric):
+    """
+    A count that only goes up
+    """
+    type = 'counter'
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._get(labels)[0] += amount
+
+    def value(self, labels=()):
+        with self._lock:
+            return self._series.get(self._key(labels), [0])[0]
+
+
+class Gauge(Counter):
+    """
+    A value that can go up and down, such as the number of requests in
+    progress
+    """
+    type = 'gauge'
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+    def set(self, value, labels=()):
+        with self._lock:
+            self._get(labels)[0] = value
+
+
+class Histogram(_Metric):
+    """
+    Counts of observed values (typically durations in seconds) in buckets,
+    along with their count and sum
+    """
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super(Histogram, self).__init__(name, documentation, labelnames)
+
+    def _new_series(self):
+        # Count per bucket (the last being +Inf), then the sum
+        return [0] * (len(self.buckets) + 1) + [0.0]
+
+    def observe(self, value, labels=()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._get(labels)
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, labels=()):
+        with self._lock:
+            return sum(self._series.get(self._key(labels), [0, 0])[:-1])
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(series))
+                     for labels, series in sorted(self._series.items())]
+
+        samples = []
+        bounds = [_format_value(b) for b in self.buckets] + ['+Inf']
+        for labels, series in items:
+            labels = dict(zip(self.labelnames, labels))
+            total = 0
+            for bound, count in zip(bounds, series):
+                total += count
+                samples.append((self.name + '_bucket',
+                                dict(labels, le=bound), total))
+            samples.append((self.name + '_sum', labels, series[-1]))
+            samples.append((self.name + '_count', labels, total))
+        return samples
+
+
+class Timer(object):
+    """
+    Context manager that observes the time taken by its body in a histogram
+    """
+    def __init__(self, histogram, labels=()):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.time() - self.start, self.labels)
+
+
+def collector(fn):
+    """
+    Register a function to be called when the metrics are rendered.  It
+    should return a list of (name, type, documentation, samples) tuples,
+    where samples is a list of (labels dict, value) tuples.  May be used as
+    a decorator.
+    """
+    with _registry_lock:
+        _collectors.append(fn)
+    return fn
+
+
+def render():
+    """
+    Returns the text of all metrics, in the Prometheus text format
+    """
+    lines = []
+    with _registry_lock:
+        metrics = list(_registry)
+        collectors = list(_collectors)
+
+    for metric in metrics:
+        _render_family(lines, metric.name, metric.type, metric.documentation,
+                       metric.samples())
+
+    for fn in collectors:
+        for name, type_, documentation, samples in fn():
+            _render_family(lines, name, type_, documentation,
+                           [(name, labels, value)
+                            for labels, value in samples])
+
+    return '\n'.join(lines) + '\n'
+
+
+def _render_family(lines, name, type_, documentation, samples):
+    lines.append('# HELP %s %s' % (name, documentation))
+    lines.append('# TYPE %s %s' % (name, type_))
+    for sample_name, labels, value in samples:
+        if labels:
+            text = ','.join('%s="%s"' % (k, _escape(v))
+                            for k, v in sorted(labels.items()))
+            lines.append('%s{%s} %s' % (sample_name, text,
+                                        _format_value(value)))
+        else:
+            lines.append('%s %s' % (sample_name, _format_value(value)))
+
+
+def _escape(value):
+    if not isinstance(value, basestring):
+        value = str(value)
+    if isinstance(value, unicode):
+        value = value.encode('utf-8')
+    return value.replace('\\', r'\\').replace('\n', r'\n') \
+        .replace('"', r'\"')
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        if value == float('inf'):
+            return '+Inf'
+        return repr(value)
+    return str(value)
@@ -0,0 +1,137 @@
+# (c) Copyright 2018 SUSE LLC
+"""
+Coalescing of identical concurrent operations.
+
+When several callers ask for the same thing at the same moment, only the
+first of them (the leader) actually performs the work; the others wait for
+it to finish and are given its result, or the exception that it raised.
+Calls are identified by a hashable key supplied by the caller, which must
+capture everything that could make two results differ.
+
+Each waiting caller receives its own deep copy of the leader's result, so
+that callers remain free to modify the data that they are given.
+"""
+import copy
+import logging
+import threading
+import time
+
+from bll.common import metrics
+from bll.common.worker_pool import Future
+
+LOG = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_calls = {}
+_stats = {}
+
+
+class _Call(Future):
+    def __init__(self):
+        super(_Call, self).__init__()
+        self.waiters = 0
+
+
+def do(key, fn, name=None):
+    """
+    Call fn (which takes no arguments) and return its result, unless a call
+    with the same key is already in progress, in which case wait for that
+    call to complete and return a copy of its result instead.
+
+    :param key: Hashable value identifying the call
+    :param fn: Function to call
+    :param name: Name under which to record statistics for the call
+                 (optional)
+    """
+    with _lock:
+        stats = _stats.setdefault(name, _new_stats())
+        stats['calls'] += 1
+        call = _calls.get(key)
+        if call is None:
+            call = _calls[key] = _Call()
+            stats['executions'] += 1
+            leader = True
+        else:
+            call.waiters += 1
+            leader = False
+
+    if not leader:
+        start = time.time()
+        try:
+            result = call.result()
+        finally:
+            with _lock:
+                stats['shared'] += 1
+                stats['wait_total'] += time.time() - start
+        LOG.debug("Shared result of in-flight call %s", name)
+        return copy.deepcopy(result)
+
+    # The waiters are signalled however the call ends, including by a
+    # KeyboardInterrupt or a greenlet being killed, since they would
+    # otherwise wait forever
+    result = failure = None
+    try:
+        result = fn()
+        return result
+    except BaseException as e:
+        failure = e
+        raise
+    finally:
+        # No further callers can join once the key is removed, so the number
+        # of waiters is final
+        with _lock:
+            del _calls[key]
+
+        if failure is not None:
+            call.set_exception(failure)
+        else:
+            try:
+                # Give the waiters a snapshot, since the leader's caller may
+                # go on to modify the result while they are still copying it
+                call.set_result(copy.deepcopy(result) if call.waiters
+                                else None)
+            except BaseException as e:
+                call.set_exception(e)
+                raise
+
+
+def _new_stats():
+    return {
+        'calls': 0,
+        'executions': 0,
+        'shared': 0,
+        'wait_total': 0.0,
+    }
+
+
+def stats():
+    """
+    Returns statistics about coalesced calls, keyed by the name under which
+    the calls were made.  ``calls`` is the total number of calls,
+    ``executions`` the number that actually performed the work, ``shared``
+    the number that were given the result of another call, and
+    ``wait_total`` the number of seconds spent by those callers waiting.
+    """
+    with _lock:
+        return {name: dict(values) for name, values in _stats.items()}
+
+
+@metrics.collector
+def _collect_metrics():
+    calls = sorted(stats().items())
+
+    def family(name, documentation, key):
+        return (name, 'counter', documentation,
+                [({'name': name_ or ''}, values[key])
+                 for name_, values in calls])
+
+    return [
+        family('bll_single_flight_calls_total', 'Coalescable calls', 'calls'),
+        family('bll_single_flight_executions_total',
+               'Calls that performed the work', 'executions'),
+        family('bll_single_flight_shared_total',
+               'Calls given the result of another call', 'shared'),
+        family('bll_single_flight_wait_seconds_total',
+               'Time spent waiting for the result of another call',
+               'wait_total'),
+    ]
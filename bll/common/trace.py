@@ -0,0 +1,191 @@
+# (c) Copyright 2018 SUSE LLC
+"""
+Tracing of the processing of individual transactions, recorded as a tree of
+timed spans: one for each request dispatched by ``spawn_service`` (including
+those of nested ``call_service`` calls), one for the long-running complete
+processing of a request, and one for each call to a backend service (see
+:mod:`bll.common.backend`).
+
+Tracing is started for a transaction by :func:`start`, after which spans are
+recorded for it and for all of the transactions derived from it (whose
+txn_ids share its root; see ``bll.common.util.new_txn_id``).  Since derived
+txn_ids do not record which transaction they were derived from, the parent
+of each span is the transaction on whose thread it was started.
+
+A trace is kept, and can be retrieved with :func:`tree`, for a while after
+it was started, so that the spans of long-running processing can be seen
+by the requests that poll for its status.  How many traces are kept, and for
+how long, are set by the ``caches.trace`` section of the config file.  At
+most ``trace.max_spans`` spans are kept for each trace; those recorded after
+that are only counted.
+"""
+import threading
+import time
+
+from bll.common.cache import get_cache
+from bll.common.util import context, get_conf
+
+# Kinds of span
+REQUEST = 'request'
+COMPLETE = 'complete'
+BACKEND = 'backend'
+DROPPED = 'dropped'
+
+DEFAULT_MAX_SPANS = 1000
+
+# Traces are not looked up until the first one is started
+_started = False
+
+
+def _root(txn_id):
+    return (txn_id or '').split('.')[0]
+
+
+def _traces():
+    return get_cache('trace', max_size=100, ttl=600)
+
+
+class Trace(object):
+    """
+    The spans recorded for a transaction and those derived from it, of which
+    at most ``max_spans`` are kept
+    """
+    def __init__(self, txn_id, max_spans=DEFAULT_MAX_SPANS):
+        self.txn_id = txn_id
+        self.start = time.time()
+        self.spans = []
+        self.max_spans = max_spans
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+    def tree(self):
+        """
+        Returns the spans as a list of trees (normally just one, for the
+        transaction that was traced).  Each node is a dictionary with the
+        ``name``, ``kind`` and ``txn_id`` of the span, its ``start`` in
+        seconds after the trace was started, its ``duration`` (which is None
+        while it is in progress), and its ``children`` in the order that
+        they started.  If spans were dropped, a last node of kind
+        ``dropped`` gives their ``count``.
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start)
+            dropped = self.dropped
+
+        nodes = []
+        requests = {}
+        for span in spans:
+            node = {
+                'name': span.name,
+                'kind': span.kind,
+                'txn_id': span.txn_id,
+                'start': span.start - self.start,
+                'duration': span.duration,
+                'children': [],
+            }
+            nodes.append((span, node))
+            if span.kind == REQUEST:
+                requests.setdefault(span.txn_id, node)
+
+        roots = []
+        for span, node in nodes:
+            # A request span belongs to its caller; the others belong to the
+            # request of their own transaction
+            owner = span.parent if span.kind == REQUEST else span.txn_id
+            parent = requests.get(owner)
+            if parent is None or parent is node:
+                roots.append(node)
+            else:
+                parent['children'].append(node)
+
+        if dropped:
+            roots.append({
+                'name': 'dropped spans',
+                'kind': DROPPED,
+                'txn_id': self.txn_id,
+                'start': None,
+                'duration': None,
+                'count': dropped,
+                'children': [],
+            })
+        return roots
+
+
+class Span(object):
+    """
+    Context manager that records its body as a span of the trace of the
+    current transaction, if it is being traced.  Request spans are
+    given the txn_id of the request, and their parent is the transaction
+    that is current when they start.
+    """
+    def __init__(self, name, kind, txn_id=None):
+        self.name = name
+        self.kind = kind
+        self.parent = getattr(context, 'txn_id', '')
+        self.txn_id = txn_id or self.parent
+        self.start = None
+        self.duration = None
+
+    def __enter__(self):
+        self.start = time.time()
+        trace = get(self.txn_id)
+        if trace is not None:
+            trace.add(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.duration = time.time() - self.start
+
+
+def record(name, kind, start, duration, txn_id=None):
+    """
+    Record a span that has already finished, for the given transaction or
+    else the current one
+    """
+    if not _started:
+        return
+    trace = get(txn_id or getattr(context, 'txn_id', ''))
+    if trace is not None:
+        span = Span(name, kind, txn_id)
+        span.start = start
+        span.duration = duration
+        trace.add(span)
+
+
+def start(txn_id):
+    """
+    Start tracing the transaction, unless it is already being traced
+    """
+    global _started
+    _started = True
+    root = _root(txn_id)
+    if _traces().get(root) is None:
+        _traces().put(root, Trace(
+            root, get_conf('trace.max_spans', DEFAULT_MAX_SPANS)))
+
+
+def get(txn_id):
+    """
+    Returns the :class:`Trace` for the transaction, or None if it is not
+    being traced
+    """
+    if not _started:
+        return None
+    return _traces().get(_root(txn_id))
+
+
+def tree(txn_id):
+    """
+    Returns the tree of spans of the transaction (see :meth:`Trace.tree`),
+    or None if it is not being traced
+    """
+    trace = get(txn_id)
+    if trace is not None:
+        return trace.tree()
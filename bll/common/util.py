@@ -1,12 +1,15 @@
 # (c) Copyright 2015-2016 Hewlett Packard Enterprise Development LP
 # (c) Copyright 2017-2018 SUSE LLC
 from dogpile.cache.api import CachedValue
+import collections
 import re
 import logging
+import Queue
 import threading
 import time
 
 from bll import api
+from json.encoder import encode_basestring_ascii
 from uuid import uuid4, uuid1
 from pecan import conf
 
@@ -33,66 +36,224 @@ def deepMerge(d1, d2, inconflict=lambda v1, v2: v2):
     return d1
 
 
-def scrub_passwords(_val):
+# Maximum length of the text produced by scrub_passwords
+SCRUB_MAX_LENGTH = 8192
 
+_TRUNCATED = '...(truncated)'
+
+
+class _Truncated(Exception):
+    pass
+
+
+class _Scrubber(object):
+    # Writes the JSON text of a value, masking the values of sensitive keys
+    # as it goes, until max_length characters have been written
+
+    def __init__(self, max_length):
+        self.out = []
+        self.remaining = max_length
+
+    def write(self, text):
+        self.out.append(text)
+        if self.remaining:
+            self.remaining -= len(text)
+            if self.remaining <= 0:
+                raise _Truncated()
+
+    def value(self, value):
+        text = _scalar(value)
+        if text is not None:
+            self.write(text)
+        elif isinstance(value, (dict, collections.Mapping)):
+            self.mapping(value)
+        elif isinstance(value, (list, tuple)):
+            self.sequence(value)
+        else:
+            self.write(_json_string(_scrub_string(str(value))))
+
+    def mapping(self, value):
+        write = self.write
+        write('{')
+        separator = ''
+        for key, item in value.iteritems():
+            if not isinstance(key, basestring):
+                key = str(key)
+            prefix = separator + _json_string(key) + ': '
+            separator = ', '
+
+            lower = key.lower()
+            if 'password' in lower or 'cert' in lower:
+                write(prefix + '"****"')
+            elif 'token' in lower and item is not None:
+                if isinstance(item, basestring):
+                    item = '*' * (len(item) - 4) + item[-4:]
+                else:
+                    item = '****'
+                write(prefix + _json_string(item))
+            else:
+                text = _scalar(item)
+                if text is None:
+                    write(prefix)
+                    self.value(item)
+                else:
+                    write(prefix + text)
+        write('}')
+
+    def sequence(self, value):
+        write = self.write
+        write('[')
+        separator = ''
+        for item in value:
+            text = _scalar(item)
+            if text is None:
+                write(separator)
+                self.value(item)
+            else:
+                write(separator + text)
+            separator = ', '
+        write(']')
+
+
+def _json_string(value):
+    try:
+        return encode_basestring_ascii(value)
+    except UnicodeDecodeError:
+        return encode_basestring_ascii(value.decode('utf-8', 'replace'))
+
+
+def _scalar(value):
+    # Returns the JSON text of a scalar value, or None for other values
+    convert = _SCALARS.get(type(value))
+    return convert(value) if convert else None
+
+
+_SCALARS = {
+    str: lambda v: _json_string(_scrub_string(v)),
+    unicode: lambda v: _json_string(_scrub_string(v)),
+    int: str,
+    long: str,
+    float: repr,
+    bool: lambda v: 'true' if v else 'false',
+    # Written as a string, as the regex version always has
+    type(None): lambda v: '"None"',
+}
+
+
+def _scrub_string(value):
+    # Strings may themselves hold key/value pairs, such as JSON text or the
+    # repr of a dictionary, so use the regex version on any that might
+    # contain a sensitive key
+    if ':' in value:
+        lower = value.lower()
+        if 'password' in lower or 'cert' in lower or 'token' in lower:
+            return _scrub_text(value)
+    return value
+
+
+def scrub_passwords(_val, max_length=SCRUB_MAX_LENGTH):
+    """
+    Returns a string representation of the value, for logging, in which the
+    values of keys containing 'password' or 'cert' are replaced with '****'
+    and those of keys containing 'token' have all but their last four
+    characters replaced with '*'.
+
+    Dictionaries and lists are written as JSON in a single pass, masking
+    values as they are reached, and writing stops once the text reaches
+    max_length characters (if not zero).  Strings and other objects are
+    scrubbed with regular expressions, as text.
+    """
     if _val is None:
         return _val
 
     try:
-
-        # We want to get a string value out of this object
-        # strings are immutable so _val is never modified.
-        if type(_val) in (str, unicode):
-            out = _val
+        if isinstance(_val, (dict, list, tuple, collections.Mapping)):
+            scrubber = _Scrubber(max_length)
+            try:
+                scrubber.value(_val)
+            except _Truncated:
+                return ''.join(scrubber.out)[:max_length] + _TRUNCATED
+            return ''.join(scrubber.out)
+
+        if isinstance(_val, basestring):
+            out = _scrub_text(_val)
         else:
-            out = str(_val)
-
-        # convert u'blah' to "blah" since 'u' literals are not json-compatible
-        # but also convert non-unicode strings, too
-        out = re.sub("u?'(.*?)'([:\s,}\]])",
-                     lambda match: '"%s"%s' %
-                                   (match.group(1), match.group(2)), out)
-
-        # Some Python-represented values may be None, but None is not a valid
-        # value in json.  Let's convert that None to "None".  This isn't
-        # necessary, but it makes it easier for unit-testing to take place
-        out = re.sub(": None", ": \"None\"", out)
-
-        # Search for key-value pairs where the key contains 'password/cert'
-        # and "4-star" the values
-        out = re.sub(RE_KEYVALUE,
-                     lambda match: "%s%s%s: %s%s%s%s" %
-                                   (match.group(1), match.group(2),
-                                    match.group(3), match.group(4),
-                                    '****', match.group(6), match.group(7))
-                     if 'password' in match.group(2).lower() or
-                        'cert' in match.group(2).lower()
-                     else match.group(0),
-                     out)
-
-        # Search for key-value pairs where the key contains 'token'
-        out = re.sub(RE_KEYVALUE,
-                     lambda match: "%s%s%s: %s%s%s%s" %
-                                   (match.group(1), match.group(2),
-                                    match.group(3), match.group(4),
-                                    "%s%s" % ('*' * (len(match.group(5)) - 4),
-                                              match.group(5)
-                                              [-(min(4,
-                                                     len(match.group(5)))):]),
-                                    match.group(6), match.group(7))
-                     if 'token' in match.group(2).lower()
-                     else match.group(0),
-                     out)
-
-        # we only need to return a string representation of the object
-        # since this is only used for logging
+            out = _scrub_text(str(_val))
+
+        if max_length and len(out) > max_length:
+            return out[:max_length] + _TRUNCATED
         return out
+
     except Exception:
         # Not sure how we'd ever get here, but just in case we can't scrub
         # the passwords, we'll just print this useless message
         return "Could not properly scrub_passwords for passed in object"
 
 
+def _scrub_text(out):
+    """
+    Scrub the passwords and tokens from text, such as the str() of an
+    object, using regular expressions.  This is slower than scrubbing the
+    object itself and is only used for values that are already strings.
+    """
+    # convert u'blah' to "blah" since 'u' literals are not json-compatible
+    # but also convert non-unicode strings, too
+    out = re.sub("u?'(.*?)'([:\s,}\]])",
+                 lambda match: '"%s"%s' %
+                               (match.group(1), match.group(2)), out)
+
+    # Some Python-represented values may be None, but None is not a valid
+    # value in json.  Let's convert that None to "None".  This isn't
+    # necessary, but it makes it easier for unit-testing to take place
+    out = re.sub(": None", ": \"None\"", out)
+
+    # Search for key-value pairs where the key contains 'password/cert'
+    # and "4-star" the values
+    out = re.sub(RE_KEYVALUE,
+                 lambda match: "%s%s%s: %s%s%s%s" %
+                               (match.group(1), match.group(2),
+                                match.group(3), match.group(4),
+                                '****', match.group(6), match.group(7))
+                 if 'password' in match.group(2).lower() or
+                    'cert' in match.group(2).lower()
+                 else match.group(0),
+                 out)
+
+    # Search for key-value pairs where the key contains 'token'
+    out = re.sub(RE_KEYVALUE,
+                 lambda match: "%s%s%s: %s%s%s%s" %
+                               (match.group(1), match.group(2),
+                                match.group(3), match.group(4),
+                                "%s%s" % ('*' * (len(match.group(5)) - 4),
+                                          match.group(5)
+                                          [-(min(4,
+                                                 len(match.group(5)))):]),
+                                match.group(6), match.group(7))
+                 if 'token' in match.group(2).lower()
+                 else match.group(0),
+                 out)
+
+    # we only need to return a string representation of the object
+    # since this is only used for logging
+    return out
+
+
+class Scrubbed(object):
+    """
+    Wrapper for a value to be logged, which is only scrubbed (see
+    :func:`scrub_passwords`) if the log record is actually emitted::
+
+        LOG.debug("Received %s", Scrubbed(data))
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return str(scrub_passwords(self.value))
+
+
 def empty(value):
     if value is None:
         return True
@@ -154,10 +315,132 @@ class ContextFilter(logging.Filter):
     """
 
     def filter(self, record):
-        record.txn_id = getattr(context, 'txn_id', '')
+        # A record handled by an AsyncHandler reaches the filter on the
+        # logging thread, by which time it already has its txn id
+        if not hasattr(record, 'txn_id'):
+            record.txn_id = getattr(context, 'txn_id', '')
         return True
 
 
+class Deferred(object):
+    """
+    Wrapper for a function that produces text to be logged, which is only
+    called if the log record is actually emitted::
+
+        LOG.info("Response %s", Deferred(response_to_string, ret))
+    """
+    __slots__ = ('fn', 'args')
+
+    def __init__(self, fn, *args):
+        self.fn = fn
+        self.args = args
+
+    def __str__(self):
+        return str(self.fn(*self.args))
+
+
+class AsyncHandler(logging.Handler):
+    """
+    A logging handler that passes records to another handler on a
+    background thread, so that the thread logging the message does not wait
+    for it to be written out.
+
+    The message of each record is formatted before it is queued, since its
+    arguments may change once the caller carries on.  The record is also
+    given the txn id of the calling thread, since the filters of the wrapped
+    handler (such as :class:`ContextFilter`) only run on the background
+    thread.  Should ``max_queue`` records be waiting, further records are
+    dropped (and a count of them logged) rather than holding up the caller.
+    """
+
+    def __init__(self, target, max_queue=10000):
+        logging.Handler.__init__(self)
+        self.target = target
+        self.dropped = 0
+        self._queue = Queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._work,
+                                        name="AsyncHandler-%s" % target.name)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def emit(self, record):
+        try:
+            self._queue.put_nowait(self._prepare(record))
+        except Queue.Full:
+            self.dropped += 1
+        except Exception:
+            self.handleError(record)
+
+    def _prepare(self, record):
+        if not hasattr(record, 'txn_id'):
+            record.txn_id = getattr(context, 'txn_id', '')
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Format the traceback now, and release its frames
+            if not record.exc_text:
+                record.exc_text = _formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def _work(self):
+        while True:
+            record = self._queue.get()
+            if record is None:
+                break
+
+            dropped, self.dropped = self.dropped, 0
+            if dropped:
+                self.target.handle(logging.makeLogRecord({
+                    'name': __name__,
+                    'levelno': logging.WARN,
+                    'levelname': 'WARNING',
+                    'msg': 'Dropped %d log records while the log queue was '
+                           'full' % dropped,
+                    'txn_id': ''}))
+            try:
+                self.target.handle(record)
+            except Exception:
+                self.target.handleError(record)
+
+    def close(self):
+        # Write out the records that are already queued before closing
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(5)
+        self.target.close()
+        logging.Handler.close(self)
+
+
+_formatter = logging.Formatter()
+
+
+def setup_async_logging(max_queue=10000, loggers=None):
+    """
+    Replace each log handler of the given loggers (by default, all of them)
+    with an :class:`AsyncHandler` that passes its records on to it.  This is
+    enabled by the ``async_logging`` section of the config file, for
+    example::
+
+        async_logging = {'enabled': True, 'max_queue': 10000}
+    """
+    if loggers is None:
+        loggers = [logging.getLogger()] + [
+            logger for logger in logging.Logger.manager.loggerDict.values()
+            if isinstance(logger, logging.Logger)]
+
+    # A handler shared between loggers is given a single AsyncHandler
+    wrapped = {}
+    for logger in loggers:
+        for handler in list(logger.handlers):
+            if isinstance(handler, AsyncHandler):
+                continue
+            if handler not in wrapped:
+                wrapped[handler] = AsyncHandler(handler, max_queue)
+            logger.removeHandler(handler)
+            logger.addHandler(wrapped[handler])
+
+
 def new_txn_id(txn_id=None):
     """
     Create a new txn id using an exiting transaction id.  The newly created txn
@@ -213,15 +496,9 @@ def response_to_string(resp, print_data=False):
         data = resp.get(api.DATA)
 
         if isinstance(data, dict):
-            sorted_keys = sorted(data.keys())
-
-            data_list = []
-            for key in sorted_keys:
-                data_list.append("%s:%s" % (key, str(data[key])))
-
-            data_str = scrub_passwords("{%s}" % ",".join(data_list))
-        else:
-            data_str = scrub_passwords(data)
+            data = collections.OrderedDict(
+                (key, data[key]) for key in sorted(data))
+        data_str = scrub_passwords(data)
         data_str = "DATA:%s" % data_str
     else:
         data_str = ""
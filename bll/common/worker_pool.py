@@ -0,0 +1,306 @@
+# (c) Copyright 2018 SUSE LLC
+"""
+Bounded pools of reusable worker threads used to execute plugin requests.
+
+Each pool has a fixed number of worker threads that pull work from a queue.
+Once ``max_queue`` items are waiting in the queue, further submissions are
+rejected with a :class:`ServiceUnavailableException`, which the REST layer
+reports as HTTP 503.  The size of each pool is read from the ``worker_pool``
+section of the config file, for example::
+
+    worker_pool = {
+        'handle': {'size': 16, 'max_queue': 256},
+        'complete': {'size': 16, 'max_queue': 256},
+        'fanout': {'size': 16, 'max_queue': 256},
+        'refresh': {'size': 2, 'max_queue': 64},
+    }
+"""
+import logging
+import Queue
+import threading
+import time
+
+from bll.common import metrics
+from bll.common.exception import ServiceUnavailableException
+from bll.common.util import get_conf
+
+LOG = logging.getLogger(__name__)
+
+# Default (size, max_queue) for the pools used by the BLL
+DEFAULTS = {
+    'handle': (16, 256),
+    'complete': (16, 256),
+    'fanout': (16, 256),
+    'refresh': (2, 64),
+}
+
+_local = threading.local()
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class Future(object):
+    """
+    Holds the eventual result of a function submitted to a WorkerPool
+    """
+    def __init__(self):
+        self._event = threading.Event()
+        self._result = None
+        self._exception = None
+
+    def set_result(self, result):
+        self._result = result
+        self._event.set()
+
+    def set_exception(self, exception):
+        self._exception = exception
+        self._event.set()
+
+    def done(self):
+        return self._event.is_set()
+
+    def result(self, timeout=None):
+        """
+        Wait for the function to complete and return its value, or raise the
+        exception that it raised.  If the timeout (in seconds) expires before
+        the function completes, a ``PoolTimeoutError`` is raised.
+        """
+        if not self._event.wait(timeout):
+            raise PoolTimeoutError("Timed out after %s seconds" % timeout)
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class WorkerPool(object):
+    """
+    A fixed-size pool of worker threads fed by a bounded queue.
+
+    Functions submitted from one of the pool's own worker threads are run
+    immediately on that thread rather than queued, since a worker that blocks
+    waiting for work queued behind it could otherwise deadlock the pool.
+    """
+
+    def __init__(self, name, size, max_queue=0):
+        self.name = name
+        self.size = max(1, int(size))
+        self.max_queue = max(0, int(max_queue))
+        self._queue = Queue.Queue(maxsize=self.max_queue)
+        self._threads = []
+        self._lock = threading.Lock()
+
+        # Statistics
+        self._busy = 0
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def is_worker(self):
+        """
+        Returns True if the current thread is one of this pool's workers
+        """
+        return getattr(_local, 'pool', None) is self
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queue fn to be called with the given arguments on a worker thread,
+        and return a :class:`Future` for its result.
+        """
+        future = Future()
+        if self.is_worker():
+            self._run(future, fn, args, kwargs)
+            return future
+
+        self._start()
+        try:
+            self._queue.put_nowait((future, fn, args, kwargs, time.time()))
+        except Queue.Full:
+            with self._lock:
+                self._rejected += 1
+            LOG.warn("Worker pool %s is full (%d queued), rejecting request",
+                     self.name, self.max_queue)
+            raise ServiceUnavailableException(
+                "Too many requests in progress, try again later")
+
+        with self._lock:
+            self._submitted += 1
+        return future
+
+    def stats(self):
+        """
+        Returns a dictionary of statistics about the pool's activity.  Wait
+        times are the number of seconds that items spent in the queue before
+        a worker picked them up.
+        """
+        with self._lock:
+            started = self._submitted - self._queue.qsize()
+            return {
+                'size': self.size,
+                'threads': len(self._threads),
+                'max_queue': self.max_queue,
+                'queue_depth': self._queue.qsize(),
+                'busy': self._busy,
+                'submitted': self._submitted,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'wait_total': self._wait_total,
+                'wait_max': self._wait_max,
+                'wait_avg': self._wait_total / started if started > 0 else 0,
+            }
+
+    def _start(self):
+        # Threads are started on first use so that merely importing or
+        # configuring the pool does not create any
+        if len(self._threads) >= self.size:
+            return
+
+        with self._lock:
+            while len(self._threads) < self.size:
+                t = threading.Thread(
+                    target=self._work,
+                    name="%s-%d" % (self.name, len(self._threads)))
+                t.daemon = True
+                t.start()
+                self._threads.append(t)
+
+    def _work(self):
+        _local.pool = self
+        while True:
+            future, fn, args, kwargs, queued_at = self._queue.get()
+            wait = time.time() - queued_at
+            with self._lock:
+                self._busy += 1
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+            self._run(future, fn, args, kwargs, self._finished)
+
+    def _finished(self):
+        with self._lock:
+            self._busy -= 1
+            self._completed += 1
+
+    @staticmethod
+    def _run(future, fn, args, kwargs, finished=None):
+        # The statistics are updated before the future is resolved, so that
+        # they are current by the time the submitter sees the result
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if finished:
+                finished()
+            future.set_exception(e)
+        else:
+            if finished:
+                finished()
+            future.set_result(result)
+
+
+def in_worker():
+    """
+    Returns True if the current thread belongs to any worker pool
+    """
+    return getattr(_local, 'pool', None) is not None
+
+
+def get_pool(name):
+    """
+    Returns the named worker pool, creating it from the config file settings
+    on first use.
+    """
+    pool = _pools.get(name)
+    if pool is not None:
+        return pool
+
+    with _pools_lock:
+        if name not in _pools:
+            size, max_queue = DEFAULTS.get(name, DEFAULTS['handle'])
+            size = get_conf('worker_pool.%s.size' % name, size)
+            max_queue = get_conf('worker_pool.%s.max_queue' % name,
+                                 max_queue)
+            _pools[name] = WorkerPool(name, size, max_queue)
+        return _pools[name]
+
+
+def run_concurrently(pool, calls, concurrency=None, timeout=None):
+    """
+    Run each of the given functions (which take no arguments) on the pool,
+    with at most ``concurrency`` of them running at once, and return a list
+    of their results in the same order as the functions.  If a function
+    raises an exception, or does not finish within ``timeout`` seconds of
+    being submitted, the exception is placed in the list instead of a result.
+    """
+    slots = threading.BoundedSemaphore(concurrency) if concurrency else None
+
+    def run(fn):
+        try:
+            return fn()
+        finally:
+            if slots:
+                slots.release()
+
+    pending = []
+    for fn in calls:
+        if slots:
+            slots.acquire()
+        try:
+            pending.append((pool.submit(run, fn), time.time()))
+        except ServiceUnavailableException as e:
+            if slots:
+                slots.release()
+            pending.append((e, None))
+
+    results = []
+    for future, started in pending:
+        if started is None:
+            results.append(future)
+            continue
+        try:
+            if timeout is None:
+                results.append(future.result())
+            else:
+                remaining = max(0, started + timeout - time.time())
+                results.append(future.result(remaining))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def stats():
+    """
+    Returns the statistics of all pools that have been created, keyed by
+    pool name
+    """
+    return {name: pool.stats() for name, pool in _pools.items()}
+
+
+@metrics.collector
+def _collect_metrics():
+    pools = sorted(stats().items())
+
+    def family(name, type_, documentation, key):
+        return (name, type_, documentation,
+                [({'pool': pool}, values[key]) for pool, values in pools])
+
+    return [
+        family('bll_worker_pool_threads', 'gauge',
+               'Worker threads started', 'threads'),
+        family('bll_worker_pool_busy', 'gauge',
+               'Worker threads running a function', 'busy'),
+        family('bll_worker_pool_queue_depth', 'gauge',
+               'Functions waiting for a worker', 'queue_depth'),
+        family('bll_worker_pool_submitted_total', 'counter',
+               'Functions queued for a worker', 'submitted'),
+        family('bll_worker_pool_completed_total', 'counter',
+               'Functions run by a worker', 'completed'),
+        family('bll_worker_pool_rejected_total', 'counter',
+               'Functions rejected because the queue was full', 'rejected'),
+        family('bll_worker_pool_wait_seconds_total', 'counter',
+               'Time spent by functions waiting for a worker', 'wait_total'),
+    ]
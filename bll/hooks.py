@@ -18,18 +18,18 @@ class RestHook(PecanHook):
         '''
         Using 'before' hook to inspect state before controller code is run.
         '''
-        LOG.info('Request from: %s "%s %s"' %
-                 (state.request.remote_addr, state.request.method,
-                  state.request.path_qs))
+        LOG.info('Request from: %s "%s %s"',
+                 state.request.remote_addr, state.request.method,
+                 state.request.path_qs)
 
     def after(self, state):
         '''
         Using 'after' hook to inspect state after controller code is run.
         '''
-        LOG.info('Response  to: %s "%s %s" %s %s' %
-                 (state.request.remote_addr, state.request.method,
-                  state.request.path_qs, state.response.status_code,
-                  state.response.content_length))
+        LOG.info('Response  to: %s "%s %s" %s %s',
+                 state.request.remote_addr, state.request.method,
+                 state.request.path_qs, state.response.status_code,
+                 state.response.content_length)
 
     def on_error(self, state, e):
         '''
@@ -39,8 +39,8 @@ class RestHook(PecanHook):
         '''
         status_code = getattr(e, 'status_code', 400)
         state.response.status = state.response.status_code = status_code
-        LOG.warn('Exception %r in: %s "%s %s" %s %s' %
-                 (e, state.request.remote_addr, state.request.method,
-                  state.request.path_qs, state.response.status_code,
-                  state.response.content_length))
+        LOG.warn('Exception %r in: %s "%s %s" %s %s',
+                 e, state.request.remote_addr, state.request.method,
+                 state.request.path_qs, state.response.status_code,
+                 state.response.content_length)
         return state.response
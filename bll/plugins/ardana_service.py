@@ -1,6 +1,7 @@
 # (c) Copyright 2016-2017 Hewlett Packard Enterprise Development LP
 # (c) Copyright 2017-2018 SUSE LLC
 from bll import api
+from bll.common import backend
 from bll.common.util import get_conf
 from bll.plugins.service import expose, SvcBase
 from bll.common.exception import InvalidBllRequestException
@@ -198,12 +199,16 @@ class ArdSvc(SvcBase):
             'User-Agent': api.USER_AGENT
         }
 
-        response = requests.request(action,
-                                    url,
-                                    params=query_params,
-                                    data=body,
-                                    headers=headers,
-                                    verify=not get_conf("insecure"))
+        with backend.Call('ardana', '%s %s' % (
+                action, backend.resource(relative_path))) as call:
+            response = requests.request(action,
+                                        url,
+                                        params=query_params,
+                                        data=body,
+                                        headers=headers,
+                                        verify=not get_conf("insecure"))
+            call.failed = response.status_code >= 400
+            call.size = len(response.content)
 
         if 400 <= response.status_code < 600:
             # Raise an exception if not found. The content has the error
@@ -2,27 +2,15 @@
 # (c) Copyright 2017-2018 SUSE LLC
 
 import logging
-import stevedore
 
 from keystoneclient.v3 import client as ksclient
 from bll import api
-from bll.plugins import service
+from bll.plugins import registry, service
 from bll.common.util import get_conf, get_val
 
 LOG = logging.getLogger(__name__)
 
 
-def on_load_failures(manager, entrypoint, exception):
-    """
-    Some plugins import modules that may not be present in some
-    environments, which is normally not an error.
-    """
-    if isinstance(exception, ImportError):
-        LOG.warn("Error loading %s: %s", entrypoint.module_name, exception)
-    else:
-        LOG.exception(exception)
-
-
 class CatalogSvc(service.SvcBase):
     """
     Obtain a catalog of BLL plugins and openstack services available
@@ -31,7 +19,7 @@ class CatalogSvc(service.SvcBase):
     The ``target`` value for this plugin is ``catalog``. See :ref:`rest-api`
     for a full description of the request and response formats.
     """
-    @service.expose()
+    @service.expose(cache_ttl=300, cache_key=service.CACHE_KEY_GLOBAL)
     def get_plugins(self):
         """
         Gets the list of BLL plugin names whose dependent services are
@@ -50,14 +38,10 @@ class CatalogSvc(service.SvcBase):
         """
         available = self._get_services()
 
-        mgr = stevedore.extension.ExtensionManager(
-            'bll.plugins',
-            on_load_failure_callback=on_load_failures)
-
         plugins = []
-        for ext in mgr:
-            if ext.plugin.is_available(available):
-                plugins.append(ext.name)
+        for name, plugin in registry.items():
+            if plugin.is_available(available):
+                plugins.append(name)
 
         # monasca-transform components will not show up in keystone's list of
         # services, so search for it's existence in config's services
@@ -170,7 +154,7 @@ class CatalogSvc(service.SvcBase):
             cluster.append(comp_hostname)
         return cplanes
 
-    @service.expose()
+    @service.expose(single_flight=True)
     def get_swift_clusters(self):
         """
         Returns swift cluster data with control plane and region data.
@@ -255,7 +239,7 @@ class CatalogSvc(service.SvcBase):
 
         return services
 
-    @service.expose()
+    @service.expose(cache_ttl=300, cache_key=service.CACHE_KEY_GLOBAL)
     def get_regions(self):
         """
         Obtain a list of regions available in the current environment.
@@ -44,6 +44,7 @@ class CinderSvc(service.SvcBase):
         """
         vol_type = self.request[api.DATA]["volume_type_id"]
         response = self.cinder_client.volume_types.delete(vol_type)
+        self.invalidate_cache('volume_type_list')
         return response
 
     @service.expose(action="PUT")
@@ -60,10 +61,11 @@ class CinderSvc(service.SvcBase):
         """
         vol_type = self.request[api.DATA]["volume_type"]
         volume_type = self.cinder_client.volume_types.create(vol_type)
+        self.invalidate_cache('volume_type_list')
         response = {'id': volume_type.id, 'name': volume_type.name}
         return response
 
-    @service.expose()
+    @service.expose(cache_ttl=60)
     def volume_type_list(self):
         """
         Return a list of volume types.
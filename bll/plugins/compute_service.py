@@ -158,24 +158,27 @@ class ComputeSvc(SvcBase):
             return None
 
     def _get_monasca_meas_value(self, metrics, dim):
+        start_time = (datetime.utcnow() - timedelta(minutes=5)).isoformat()
+        metric_names = list(metrics)
+        calls = []
+        for metric_name in metric_names:
+            data = {
+                'operation': 'measurement_list',
+                'name': metric_name,
+                'start_time': start_time,
+                'merge_metrics': True
+            }
+
+            # Get potential monasca parms we might need to provide
+            data.update(dim)
+            calls.append({'target': 'monitor', 'data': data})
+
         results = {}
-        for metric_name in metrics:
+        for metric_name, meas_list in zip(metric_names,
+                                          self.call_services_parallel(calls)):
             try:
-                start_time = (datetime.utcnow() - timedelta(
-                    minutes=5)).isoformat()
-                data = {
-                    'operation': 'measurement_list',
-                    'name': metric_name,
-                    'start_time': start_time,
-                    'merge_metrics': True
-                }
-
-                # Get potential monasca parms we might need to provide
-                data.update(dim)
-                meas_list = self.call_service(
-                    target='monitor',
-                    data=data,
-                )
+                if isinstance(meas_list, Exception):
+                    raise meas_list
 
                 # There should only be one measurement list.
                 # If not, it means our dimension filter is not strict enough
@@ -244,10 +247,10 @@ class ComputeSvc(SvcBase):
 
         # Monasca operates on dimensions, not hypervisor_id, so get hostname
         # and use it to determine utilization
-        hyp_list = self.call_service(
-            target='nova',
-            operation='hypervisor-list'
-        )
+        hyp_list, server_info = self._call_all([
+            {'target': 'nova', 'operation': 'hypervisor-list'},
+            {'target': 'ardana', 'path': '/model/cp_output/server_info.yml'}
+        ])
         hyp_dict = {hyp['hypervisor_id']: hyp for hyp in hyp_list}
         hostname = hyp_dict[int(hypervisor_id)]['name']
         details['instances'] = hyp_dict[int(hypervisor_id)]['instances']
@@ -257,10 +260,6 @@ class ComputeSvc(SvcBase):
 
         # Use the hostname to reverse-lookup the server name from the
         # config processor output's perspective
-        server_info = self.call_service(
-            target='ardana',
-            path='/model/cp_output/server_info.yml'
-        )
         cp_host = None
         for host, info in server_info.iteritems():
             if info['hostname'] == hostname:
@@ -294,12 +293,26 @@ class ComputeSvc(SvcBase):
                                      operation='hypervisor-list',
                                      data={'include_status': True})
         self.data['hypervisor-list'] = hyp_list
-        # first, get the compute clusters in the environment
-        clusters = self.call_service(
-            target='catalog',
-            data={'operation': 'get_compute_clusters',
-                  'hypervisor-list': hyp_list}
-        )
+        # Get the compute clusters in the environment along with all of the
+        # measurements of each monasca metric across all hosts
+        start_time = (datetime.utcnow() - timedelta(minutes=5)).isoformat()
+        metrics = METRICS_MAP.items()
+        calls = [{'target': 'catalog',
+                  'data': {'operation': 'get_compute_clusters',
+                           'hypervisor-list': hyp_list}}]
+        for metric_name, ui_equiv in metrics:
+            calls.append({
+                'target': 'monitor',
+                'data': {
+                    'operation': 'measurement_list',
+                    'name': metric_name,
+                    'start_time': start_time,
+                    'group_by': '*',
+                    'merge_metrics': True
+                }
+            })
+        results = self._call_all(calls)
+        clusters = results[0]
 
         ############################################################
         # TODO: We also need to get rid of get_compute_data and just
@@ -321,20 +334,7 @@ class ComputeSvc(SvcBase):
         esx_equiv_hosts = {host['service_host']: host['hypervisor_hostname']
                            for host in compute_list}
 
-        for metric_name, ui_equiv in METRICS_MAP.iteritems():
-            # For each monasca metric, get all the measurements
-            # across all hosts
-            start_time = (datetime.utcnow() - timedelta(minutes=5)).isoformat()
-            meas_list = self.call_service(
-                target='monitor',
-                data={
-                    'operation': 'measurement_list',
-                    'name': metric_name,
-                    'start_time': start_time,
-                    'group_by': '*',
-                    'merge_metrics': True
-                }
-            )
+        for (metric_name, ui_equiv), meas_list in zip(metrics, results[1:]):
             for meas in meas_list:
                 hostname = meas['dimensions']['hostname']
                 if hostname not in compute_hosts:
@@ -391,6 +391,14 @@ class ComputeSvc(SvcBase):
 
         return results
 
+    def _call_all(self, calls):
+        # Make the calls concurrently, failing if any of them failed
+        results = self.call_services_parallel(calls)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return results
+
     @classmethod
     def needs_services(cls):
         return ['compute', 'monitoring', 'ardana']
@@ -1,6 +1,7 @@
 # (c) Copyright 2016-2017 Hewlett Packard Enterprise Development LP
 # (c) Copyright 2017-2018 SUSE LLC
 from bll import api
+from bll.common import backend
 from bll.plugins import service
 from ironicclient import client as ironic_client
 from bll.plugins.region_client import RegionClient
@@ -20,13 +21,14 @@ class IronicSvc(service.SvcBase):
                                     self.token, self.region)
 
     def _get_ironic_client(self, region=None, url=None, **kwargs):
-        return ironic_client.get_client(
-            1,
-            os_auth_token=self.token,
-            ironic_url=url,
-            os_region_name=region,
-            user_agent=api.USER_AGENT,
-            insecure=get_conf("insecure"))
+        return backend.Client(
+            ironic_client.get_client(1,
+                                     os_auth_token=self.token,
+                                     ironic_url=url,
+                                     os_region_name=region,
+                                     user_agent=api.USER_AGENT,
+                                     insecure=get_conf("insecure")),
+            'ironic')
 
     @service.expose('node.list')
     def list_nodes(self):
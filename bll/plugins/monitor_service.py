@@ -8,8 +8,9 @@ from monascaclient import client as msclient
 from collections import defaultdict
 
 from bll import api
+from bll.common import backend
 from bll.common.util import get_conf
-from bll.plugins.service import SvcBase, expose
+from bll.plugins.service import SvcBase, expose, CACHE_KEY_GLOBAL
 from bll.common.exception import InvalidBllRequestException
 
 TYPE_UNKNOWN = 'unknown'
@@ -61,14 +62,16 @@ class MonitorSvc(SvcBase):
         # to that project
         token = self.token_helper.get_token_for_project('admin')
 
-        return msclient.Client(api_version=api_version,
-                               endpoint=monasca_url,
-                               token=token,
-                               auth_url=keystone_url,
-                               project_name='admin',
-                               project_domain_name='Default',
-                               insecure=get_conf("insecure"),
-                               user_agent=api.USER_AGENT)
+        return backend.Client(
+            msclient.Client(api_version=api_version,
+                            endpoint=monasca_url,
+                            token=token,
+                            auth_url=keystone_url,
+                            project_name='admin',
+                            project_domain_name='Default',
+                            insecure=get_conf("insecure"),
+                            user_agent=api.USER_AGENT),
+            'monasca')
 
     def _get_alarm_data(self):
         """
@@ -199,7 +202,7 @@ class MonitorSvc(SvcBase):
 
         return self.client.notifications.update(**data)
 
-    @expose()
+    @expose(cache_ttl=3600, cache_key=CACHE_KEY_GLOBAL)
     def notificationtype_list(self):
         return self.client.notificationtypes.list(**self.request.get_data())
 
@@ -64,7 +64,7 @@ class NovaSvc(service.SvcBase):
             LOG.error("Error creating nova client : %s ", e)
             raise requests.exceptions.HTTPError(e.message)
 
-    @service.expose('hypervisor-stats')
+    @service.expose('hypervisor-stats', cache_ttl=30)
     def hypervisor_stats(self):
         """
         Get the statistics for cpu, memory, and storage across all hypervisors.
@@ -213,7 +213,7 @@ class NovaSvc(service.SvcBase):
 
         return {'created': created_data, 'deleted': deleted_data}
 
-    @service.expose('hypervisor-list')
+    @service.expose('hypervisor-list', single_flight=True)
     def _hypervisor_list(self):
         """
         Get list of hypervisors with details, optionally including their ping
@@ -309,8 +309,12 @@ class NovaSvc(service.SvcBase):
                                         region=self.region)
             bm_uuid_list = [bmi['instance_uuid'] for bmi in bm_list]
 
-        # Create a list for the UI to use
-        instance_list = []
+        # The instances are generated one at a time, so that a large list can
+        # be streamed back to the caller
+        return {'instances': self._generate_instances(proj_dict,
+                                                      bm_uuid_list)}
+
+    def _generate_instances(self, proj_dict, bm_uuid_list):
         search_opts = {'all_tenants': True}
         for client, region in self.clients.get_clients():
             server_list = client.servers.list(search_opts=search_opts,
@@ -379,9 +383,7 @@ class NovaSvc(service.SvcBase):
                     instance['storage'] = None
 
                 self._populate_metrics(instance)
-                instance_list.append(instance)
-
-        return {'instances': instance_list}
+                yield instance
 
     def _populate_metrics(self, instance):
         monasca_metrics = self.request[api.DATA].get('monasca_metrics')
@@ -9,6 +9,7 @@ import copy
 from datetime import datetime, timedelta
 from monascaclient import client
 from bll import api
+from bll.common import backend
 from bll.common.util import get_conf
 from bll.plugins.service import SvcBase, expose
 
@@ -47,14 +48,16 @@ class ObjectStorageSummarySvc(SvcBase):
         # to that project
         token = self.token_helper.get_token_for_project('admin')
 
-        return client.Client(api_version=api_version,
-                             endpoint=monasca_url,
-                             token=token,
-                             auth_url=keystone_url,
-                             project_name='admin',
-                             project_domain_name='Default',
-                             insecure=get_conf("insecure"),
-                             user_agent=api.USER_AGENT)
+        return backend.Client(
+            client.Client(api_version=api_version,
+                          endpoint=monasca_url,
+                          token=token,
+                          auth_url=keystone_url,
+                          project_name='admin',
+                          project_domain_name='Default',
+                          insecure=get_conf("insecure"),
+                          user_agent=api.USER_AGENT),
+            'monasca')
 
     def _get_time_series(self, end_time, interval, ret_fields_mapping, period):
         resp_dict = {}
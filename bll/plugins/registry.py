@@ -0,0 +1,94 @@
+# (c) Copyright 2018 SUSE LLC
+"""
+Process-wide registry of the plugins published in the ``bll.plugins`` entry
+point namespace.
+
+The entry points are resolved once (normally when the application starts) and
+the plugin classes are cached, so that dispatching a request to its target is
+a dictionary lookup.  Plugins installed after startup can be picked up by
+calling :func:`reload`.
+"""
+import logging
+import threading
+
+import stevedore
+
+from bll.common.exception import InvalidBllRequestException
+
+LOG = logging.getLogger(__name__)
+
+NAMESPACE = 'bll.plugins'
+
+_plugins = None
+_lock = threading.Lock()
+
+
+def on_load_failures(manager, entrypoint, exception):
+    """
+    Some plugins import modules that may not be present in some
+    environments, which is normally not an error.
+    """
+    if isinstance(exception, ImportError):
+        LOG.warn("Error loading %s: %s", entrypoint.module_name, exception)
+    else:
+        LOG.exception(exception)
+
+
+def load():
+    """
+    Resolve all of the entry points in the plugin namespace and cache their
+    classes, replacing anything previously loaded.  Returns a dictionary of
+    plugin classes keyed by target name.
+    """
+    global _plugins
+
+    mgr = stevedore.extension.ExtensionManager(
+        NAMESPACE,
+        on_load_failure_callback=on_load_failures)
+
+    plugins = {ext.name: ext.plugin for ext in mgr}
+    with _lock:
+        _plugins = plugins
+
+    LOG.info("Loaded %d plugins: %s", len(plugins),
+             ",".join(sorted(plugins)))
+    return plugins
+
+
+def reload():
+    """
+    Re-scan the plugin namespace, e.g. after installing a new plugin
+    """
+    return load()
+
+
+def _get_plugins():
+    plugins = _plugins
+    if plugins is None:
+        plugins = load()
+    return plugins
+
+
+def get(target):
+    """
+    Return the plugin class for the given target name
+    """
+    try:
+        return _get_plugins()[target]
+    except KeyError:
+        raise InvalidBllRequestException(
+            "No plugin found for target '%s'" % target)
+
+
+def names():
+    """
+    Return a sorted list of the target names of all loaded plugins
+    """
+    return sorted(_get_plugins())
+
+
+def items():
+    """
+    Return a list of (target name, plugin class) tuples for all loaded plugins
+    """
+    return sorted(_get_plugins().items())
@@ -3,27 +3,65 @@
 
 import logging
 import inspect
-import pykka
 import copy
+import functools
+import json
 import time
 import traceback
 from bll.common import util
 
-from bll.common.exception import InvalidBllRequestException, BllException
-from bll.api.auth_token import TokenHelpers
+from bll.common.exception import InvalidBllRequestException, BllException, \
+    ServiceUnavailableException
+from bll.api.auth_token import TokenHelpers, get_appropriate_auth_ref
 from bll.api.response import BllResponse
 from bll.api.request import BllRequest
+from bll.api.stream import is_stream, materialize, paginate
 from bll import api
-from bll.common.job_status import get_job_status, update_job_status
+from bll.common.job_status import get_job_status, update_job_status, \
+    watch_job_status
 from bll.common import i18n
+from bll.common import metrics
+from bll.common.cache import get_cache
+from bll.common import single_flight
+from bll.common import trace
+from bll.common import worker_pool
 from bll.common.util import context, new_txn_id
-from stevedore import driver
+from bll.plugins import registry
+from dogpile.cache.api import NO_VALUE
 from requests.exceptions import HTTPError
 
 LOG = logging.getLogger(__name__)
 
-
-def expose(operation=None, action='GET', is_long=False):
+# Cache key policies for @expose(cache_ttl=...)
+CACHE_KEY_SCOPE = 'scope'
+CACHE_KEY_GLOBAL = 'global'
+
+_LABELS = ('target', 'operation', 'action')
+
+REQUESTS = metrics.Counter(
+    'bll_requests_total',
+    'Requests dispatched to plugins, by the status of their reply',
+    _LABELS + ('status',))
+REQUEST_SECONDS = metrics.Histogram(
+    'bll_request_duration_seconds',
+    'Time taken to reply to requests dispatched to plugins', _LABELS)
+HANDLE_SECONDS = metrics.Histogram(
+    'bll_handle_duration_seconds',
+    'Time taken by the handle processing of plugins', _LABELS)
+COMPLETE_SECONDS = metrics.Histogram(
+    'bll_complete_duration_seconds',
+    'Time taken by the complete (long-running) processing of plugins',
+    _LABELS)
+COMPLETE_ERRORS = metrics.Counter(
+    'bll_complete_errors_total',
+    'Complete (long-running) processing that failed', _LABELS)
+IN_FLIGHT = metrics.Gauge(
+    'bll_requests_in_flight',
+    'Plugin requests being processed, by stage', ('stage',))
+
+
+def expose(operation=None, action='GET', is_long=False, single_flight=False,
+           cache_ttl=None, cache_stale=None, cache_key=CACHE_KEY_SCOPE):
     """ A decorator for exposing methods as BLL operations/actions
 
     Keyword arguments:
@@ -51,6 +89,37 @@ def expose(operation=None, action='GET', is_long=False):
         handle; in this case, the function should return a recommended
         polling interval.
 
+    * single_flight
+        indicates that identical requests for this (short-running, read-only)
+        method that arrive while one is already being processed should wait
+        for that one to complete and share its result, rather than each
+        calling the backend services again.  Requests are identical when
+        they have the same target, operation, action, data, region and
+        language, and are made with the same privileges.
+
+    * cache_ttl
+        the number of seconds for which the result of this (short-running,
+        read-only) method may be cached and returned for identical requests,
+        in the same sense as for ``single_flight``.  Cached results are held
+        in the ``response`` cache (see :mod:`bll.common.cache`).  Concurrent
+        identical requests for an uncached result are coalesced as with
+        ``single_flight``.
+
+    * cache_stale
+        the number of seconds after a cached result expires during which it
+        will still be returned, while it is refreshed in the background.
+        Defaults to ``cache_ttl``.
+
+    * cache_key
+        the policy for deciding which requests may share a cached result.
+        With ``CACHE_KEY_SCOPE`` (the default), the requests must be made
+        with the same privileges; with ``CACHE_KEY_GLOBAL``, the result does
+        not depend on the privileges of the caller.  A function may also be
+        supplied, which will be called with the plugin instance and should
+        return a hashable value that identifies the result; in this case,
+        the data, region and language of the request are not considered
+        unless the function includes them.
+
     Note, if you override handle or complete, this decorations will be ignored!
 
     When a normal (short-running) method is called, its return value should
@@ -86,6 +155,14 @@ def expose(operation=None, action='GET', is_long=False):
         if is_long:
             f.is_long = is_long
 
+        if single_flight:
+            f.single_flight = single_flight
+
+        if cache_ttl:
+            f.cache_ttl = cache_ttl
+            f.cache_stale = cache_ttl if cache_stale is None else cache_stale
+            f.cache_key = cache_key
+
         # normally a decorator returns a wrapped function, but here
         # we return f unmodified, after registering it
         return f
@@ -93,10 +170,70 @@ def expose(operation=None, action='GET', is_long=False):
     return decorate
 
 
-class SvcBase(pykka.ThreadingActor):
+class DispatchTable(object):
+    """
+    Index of the @exposed methods of a plugin class, keyed by operation and
+    action, so that requests can be dispatched without inspecting the class.
+    The table is built once per class and is not modified afterwards.
+
+    Candidates for an operation are considered in method name order, which
+    is the same order in which earlier versions of the BLL found them via
+    inspection.
+    """
+
+    def __init__(self, cls):
+        exposed = tuple((name, f.im_func)
+                        for name, f in inspect.getmembers(cls,
+                                                          inspect.ismethod)
+                        if getattr(f, 'exposed', False))
+
+        candidates = {None: exposed}
+        for name, f in exposed:
+            for op in f.operation:
+                candidates[op] = candidates.get(op, ()) + ((name, f),)
+
+        # Map each (operation, action) pair to the function to call.  When
+        # there is only a single candidate for an operation, it is used
+        # regardless of the action, which is recorded here with an action of
+        # None
+        table = {}
+        for op, funcs in candidates.iteritems():
+            if len(funcs) == 1:
+                table[(op, None)] = funcs[0][1]
+                continue
+            for name, f in funcs:
+                key = (op, getattr(f, 'action', None))
+                if key not in table:
+                    table[key] = f
+
+        self._table = table
+        self._single = frozenset(op for op, funcs in candidates.iteritems()
+                                 if len(funcs) == 1)
+        self._operations = tuple(sorted(op for op in candidates
+                                        if op is not None))
+
+    def lookup(self, operation=None, action=None):
+        """
+        Returns the (unbound) function exposed for the given operation and
+        action, or None if there is none.
+        """
+        if operation in self._single:
+            return self._table[(operation, None)]
+        return self._table.get((operation, action))
+
+    def operations(self):
+        return list(self._operations)
+
+
+class SvcBase(object):
     """
     Base class for plugins.
     """
+    # Whether the data of the reply is being streamed, and the time spent
+    # so far by its handle processing (see _handle_in_context)
+    _streaming = False
+    _handle_seconds = 0.0
+
     def __init__(self, bll_request=None):
         super(SvcBase, self).__init__()
 
@@ -112,9 +249,9 @@ class SvcBase(pykka.ThreadingActor):
         request_data = self.request.get(api.DATA, {})
         self.action = self.request.get(api.ACTION)
 
-        self.api_version = None
-        self.operation = None
-        self.data = {}
+        self.api_version = request_data.get(api.VERSION)
+        self.operation = request_data.get(api.OPERATION)
+        self._data = None
         self.txn_id = self.request.txn_id
         self.region = self.request.get(api.REGION)
 
@@ -122,42 +259,100 @@ class SvcBase(pykka.ThreadingActor):
         # messages
         self._ = i18n.get_(self.request.get(api.LANGUAGE, 'en'))
 
-        # Extract request data, filtering out known keys
-        for k, v in request_data.iteritems():
-            if k == api.OPERATION:
-                self.operation = v
-            elif k == 'suggest_sync':
-                # Omit the obsolete, poorly-supported suggest_sync flag
-                pass
-            elif k == api.VERSION:
-                self.api_version = v
-            else:
-                self.data[k] = v
+    @property
+    def data(self):
+        """
+        The request data for the plugin, without the operation and version.
+        It is extracted from the request on first use, since many operations
+        never refer to it, and thereafter belongs to the plugin to modify.
+        """
+        if self._data is None:
+            self._data = self.request.get(api.DATA, {}).copy()
+            self._data.pop(api.OPERATION, None)
+            self._data.pop(api.VERSION, None)
+            # Omit the obsolete, poorly-supported suggest_sync flag
+            self._data.pop('suggest_sync', None)
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
 
     @staticmethod
-    def spawn_service(bll_request):
+    def spawn_service(bll_request, inline=False):
         """
-        Call the targeted service, using stevedore to load the plugin whose
-        name matches the 'target' field of the incoming request.
+        Call the targeted service, using the plugin registry to find the
+        plugin whose name matches the 'target' field of the incoming request.
+
+        The plugin's handle processing runs on the ``handle`` worker pool and
+        its complete processing on the ``complete`` worker pool.  When called
+        from a thread that is already a pool worker (i.e. a nested
+        call_service), handle runs directly on the calling thread.  If the
+        pool is saturated, a ServiceUnavailableException is raised.
+
+        If ``inline`` is True and the requested operation is a short-running
+        @exposed method, the method is instead run directly on the calling
+        thread, and the reply is returned without being copied and without
+        running the complete processing, neither of which are needed by a
+        caller that just wants the result.
         """
+        labels = (bll_request.get(api.TARGET), bll_request.get(api.OPERATION),
+                  bll_request.get(api.ACTION))
+        name = '%s.%s' % (labels[0], labels[1] or labels[2])
+        start = time.time()
+        status = api.STATUS_ERROR
+        try:
+            with trace.Span(name, trace.REQUEST, bll_request.txn_id):
+                reply = SvcBase._spawn_service(bll_request, inline)
+            status = reply.get(api.STATUS)
+            return reply
+        except ServiceUnavailableException:
+            status = 'unavailable'
+            raise
+        finally:
+            REQUEST_SECONDS.observe(time.time() - start, labels)
+            REQUESTS.inc(labels + (status,))
+
+    @staticmethod
+    def _spawn_service(bll_request, inline):
         srv = None
         # Assign _ in this function for localizing messages
         _ = i18n.get_(bll_request.get(api.LANGUAGE, 'en'))
         try:
-            mgr = driver.DriverManager(
-                namespace='bll.plugins',
-                name=bll_request.get(api.TARGET))
-
-            srv = mgr.driver.start(bll_request=bll_request).proxy()
-            reply = srv.sc_handle()
-            result = reply.get()
-            srv.sc_complete()
+            plugin = registry.get(bll_request.get(api.TARGET))
+            srv = plugin(bll_request=bll_request)
+
+            if inline and srv._is_short():
+                return srv._handle_in_context()
+
+            if worker_pool.in_worker():
+                result = srv.sc_handle()
+            else:
+                result = worker_pool.get_pool('handle').submit(
+                    srv.sc_handle).result()
+
+            # Short-running operations have no complete processing, and
+            # must not take up room in the complete pool's queue that
+            # long-running jobs need
+            in_progress = result.get(api.STATUS) == api.STATUS_INPROGRESS
+            if not in_progress and srv._is_short():
+                return result
+
+            try:
+                worker_pool.get_pool('complete').submit(srv.sc_complete)
+            except ServiceUnavailableException as e:
+                if in_progress:
+                    srv.put_resource(bll_request.txn_id,
+                                     BllResponse(bll_request).error(
+                                         _("{0}: {1}").format(
+                                             _(e.overview), e)))
             return result
 
+        except ServiceUnavailableException:
+            raise
+
         except Exception as e:
             LOG.exception('spawn_service failed')
-            if srv is not None:
-                srv.stop()
 
             response = BllResponse(bll_request)
 
@@ -174,6 +369,20 @@ class SvcBase(pykka.ThreadingActor):
 
             return response
 
+    def _is_short(self):
+        """
+        Returns True if the request can be fully processed by handle, i.e.
+        it is for a short-running @exposed method of a plugin that does not
+        override handle or complete.
+        """
+        cls = type(self)
+        if cls.handle.im_func is not SvcBase.handle.im_func or \
+                cls.complete.im_func is not SvcBase.complete.im_func:
+            return False
+
+        method = self._get_method(self.operation, self.action)
+        return method is not None and not getattr(method, 'is_long', False)
+
     def handle(self):
         """
         Handle the request by dispatching the request to the appropriate
@@ -205,7 +414,12 @@ class SvcBase(pykka.ThreadingActor):
             self.update_job_status(percentage_complete=0)
             return self.response
 
-        data = method()
+        if getattr(method, 'cache_ttl', None):
+            data = self._call_cached(method)
+        elif getattr(method, 'single_flight', False):
+            data = self._call_single_flight(method)
+        else:
+            data = method()
 
         # In cases where we don't have the data in the response, it
         # had better be in the return value.
@@ -213,10 +427,140 @@ class SvcBase(pykka.ThreadingActor):
         if not self.response[api.DATA]:
             self.response[api.DATA] = data
 
+        # Data generated by an iterator is only streamed back to callers of
+        # the REST API; see bll.api.stream
+        if not self.request.stream:
+            self.response[api.DATA] = materialize(self.response[api.DATA])
+        else:
+            self.response[api.DATA] = paginate(
+                self.response[api.DATA], self._fetch_page, self._end_stream)
+            self._streaming = is_stream(self.response[api.DATA])
+
         self.response[api.PROGRESS] = dict(percentComplete=100)
         self.response.complete()
         return self.response
 
+    def _call_single_flight(self, method, *args, **kwargs):
+        # Call the method unless an identical request is already doing so,
+        # in which case share its result.  If a cache is given, the result is
+        # stored in it under the given key.
+        key = kwargs.get('key') or self._request_key()
+        cache = kwargs.get('cache')
+
+        def call():
+            # Other requests sharing the result only see the data that it
+            # returns, so return the data even if the method placed it in
+            # the response
+            data = method(*args)
+            if isinstance(data, BllResponse):
+                data = data.get(api.DATA)
+            else:
+                data = self.response[api.DATA] or data
+            data = materialize(data)
+
+            if cache is not None:
+                cache.put(key, copy.deepcopy(data), method.cache_ttl,
+                          method.cache_stale)
+            return data
+
+        return single_flight.do(key, call, name=self._stats_name())
+
+    def _call_cached(self, method):
+        cache = get_cache('response')
+        if not cache.enabled:
+            return method()
+
+        key = self._request_key(method.cache_key)
+        entry = cache.lookup(key, name=self._stats_name())
+        if entry is None:
+            return self._call_single_flight(method, key=key, cache=cache)
+
+        value, fresh = entry
+        if not fresh:
+            self._revalidate(method, key, cache)
+
+        # Callers may modify the data they are given, so never hand out the
+        # cached value itself
+        return copy.deepcopy(value)
+
+    def _revalidate(self, method, key, cache):
+        # Refresh a stale cache entry in the background, using a separate
+        # instance of the plugin so that this request's response is not
+        # disturbed
+        if not cache.begin_refresh(key):
+            return
+
+        svc = type(self)(self.request)
+        refresh_method = method.im_func.__get__(svc, type(svc))
+
+        def refresh():
+            try:
+                svc._call_single_flight(refresh_method, key=key, cache=cache)
+            except Exception as e:
+                LOG.warn("Unable to refresh cached result of %s: %s",
+                         self._stats_name(), e)
+            finally:
+                cache.end_refresh(key)
+
+        try:
+            worker_pool.get_pool('refresh').submit(refresh)
+        except ServiceUnavailableException:
+            cache.end_refresh(key)
+
+    def _stats_name(self):
+        return '%s.%s' % (self.request.get(api.TARGET), self.operation)
+
+    def _request_key(self, policy=CACHE_KEY_SCOPE):
+        """
+        Returns a key identifying the result of this request, for coalescing
+        and caching identical requests.  See the ``cache_key`` parameter of
+        :func:`expose` for the meaning of ``policy``.
+        """
+        if callable(policy):
+            return (type(self), self.operation, self.action, policy(self))
+
+        if policy == CACHE_KEY_GLOBAL:
+            scope = None
+        else:
+            scope = self._privilege_scope()
+
+        data = json.dumps(self.data, sort_keys=True, default=repr)
+        return (type(self), self.operation, self.action, self.api_version,
+                data, self.region, self.request.get(api.LANGUAGE), scope)
+
+    @classmethod
+    def invalidate_cache(cls, operation=None):
+        """
+        Discard the cached results of this plugin's operations, or just of
+        the given operation.  Plugins should call this after making changes
+        that would alter the results of their cached operations.
+        """
+        def matches(key):
+            return issubclass(key[0], cls) and \
+                (operation is None or key[1] == operation)
+
+        count = get_cache('response').invalidate_matching(matches)
+        LOG.debug("Invalidated %d cached results of %s %s", count,
+                  cls.__name__, operation or '')
+
+    def _privilege_scope(self):
+        """
+        Returns a value identifying the privileges with which the request is
+        being made.  Requests made by different users with the same project
+        and roles are treated alike.  The auth_ref is only used if it is
+        already known (as it is for any request that has passed through the
+        REST layer), otherwise the token itself is used.
+        """
+        token = self.request.get(api.AUTH_TOKEN)
+        if not token:
+            return None
+
+        auth_ref = get_appropriate_auth_ref.get(token)
+        if auth_ref is NO_VALUE or auth_ref is None:
+            return token
+
+        return (auth_ref.project_id, tuple(sorted(auth_ref.role_names)))
+
     def complete(self):
         """
         Complete the request. Override this method and do long running
@@ -232,13 +576,17 @@ class SvcBase(pykka.ThreadingActor):
         if getattr(method, 'is_long', False):
 
             try:
+                args = ()
                 if method.im_func.func_code.co_argcount > 1:
                     # If the long-running method expects an argument, call it
                     # set to False to indicate that it is being called
                     # during complete
-                    response = method(False)
+                    args = (False,)
+
+                if getattr(method, 'single_flight', False):
+                    response = self._call_single_flight(method, *args)
                 else:
-                    response = method()
+                    response = method(*args)
 
                 # Permit the calling function to just return a normal
                 # value, and then just add it to the 'data' element of the
@@ -248,6 +596,11 @@ class SvcBase(pykka.ThreadingActor):
                 else:
                     self.response[api.DATA] = response
 
+                # The response is stored as job status, so it can't be
+                # streamed
+                self.response[api.DATA] = materialize(
+                    self.response[api.DATA])
+
                 self.response[api.PROGRESS] = dict(percentComplete=100)
                 self.response.complete()
 
@@ -258,43 +611,38 @@ class SvcBase(pykka.ThreadingActor):
 
     def _get_method(self, operation=None, action=None):
         """
-        Use inspection to get the name of the @exposed function that
-        corresponds to the operation and action being requested
+        Use the class's dispatch table to get the @exposed function that
+        corresponds to the operation and action being requested, bound to
+        this instance.
 
         If there is only one method whose exposed name matches the operation,
         then that method is returned, regardless of the action.  If there is
         more, then the action will be consulted to decide which to return.
         """
+        f = self.dispatch_table().lookup(operation, action)
+        if f is not None:
+            return f.__get__(self, type(self))
 
-        candidates = []
-
-        # Find all candidates -- those members whose name matches the
-        #   operation, ignoring the action.
-        for name, f in inspect.getmembers(self, inspect.ismethod):
-            # Only look at those that are exposed
-            if not getattr(f, 'exposed', False):
-                continue
-
-            # If operation is specified, the function must expose that op
-            op_list = getattr(f, 'operation', [])
-            if operation and operation not in op_list:
-                continue
-
-            candidates.append((name, f))
-
-        if not candidates:
-            return
-
-        # In most cases, there is only a single function with the given
-        # operation, so we will return that.
-        if len(candidates) == 1:
-            name, f = candidates[0]
-            return f
+    @classmethod
+    def dispatch_table(cls):
+        """
+        Returns the :class:`DispatchTable` of this class's @exposed methods,
+        which is built the first time it is requested.
+        """
+        # Look in the class's own __dict__ so that a subclass does not pick
+        # up the table of its parent
+        table = cls.__dict__.get('_dispatch_table')
+        if table is None:
+            table = DispatchTable(cls)
+            cls._dispatch_table = table
+        return table
 
-        # If action is specified, the function must expose that action
-        for name, f in candidates:
-            if action == getattr(f, 'action', None):
-                return f
+    @classmethod
+    def exposed_operations(cls):
+        """
+        Returns a sorted list of the operation names exposed by this class
+        """
+        return cls.dispatch_table().operations()
 
     def sc_handle(self):
         """
@@ -302,15 +650,76 @@ class SvcBase(pykka.ThreadingActor):
         this method. Override method handle.
         """
 
+        reply = self._handle_in_context()
+
+        # The complete processing may go on to update the status and progress
+        # of self.response while the caller is still using the reply, so
+        # return a copy of the envelope.  The data payload itself is not
+        # copied, which would be expensive for large results.
+        if isinstance(reply, BllResponse):
+            return reply.copy_envelope()
+        return copy.copy(reply)
+
+    def _handle_in_context(self):
+        # Preserve the caller's txn_id, since this may be running directly on
+        # the caller's thread
+        caller_txn_id = getattr(context, 'txn_id', '')
         context.txn_id = self.request.txn_id
-        reply = self.handle()
-        return copy.deepcopy(reply)
+        IN_FLIGHT.inc(('handle',))
+        start = time.time()
+        try:
+            return self.handle()
+        finally:
+            self._handle_seconds += time.time() - start
+            # The handle processing of streamed data is only timed once its
+            # last page has been fetched
+            if not self._streaming:
+                HANDLE_SECONDS.observe(self._handle_seconds,
+                                       self._metric_labels())
+            IN_FLIGHT.dec(('handle',))
+            context.txn_id = caller_txn_id
+
+    def _fetch_page(self, take):
+        # Fetch a page of streamed data, which is done as the response is
+        # written out, on the handle pool like the first page
+        if worker_pool.in_worker():
+            return self._take_in_context(take)
+        return worker_pool.get_pool('handle').submit(
+            self._take_in_context, take).result()
+
+    def _take_in_context(self, take):
+        caller_txn_id = getattr(context, 'txn_id', '')
+        context.txn_id = self.request.txn_id
+        IN_FLIGHT.inc(('handle',))
+        start = time.time()
+        try:
+            return take()
+        finally:
+            self._handle_seconds += time.time() - start
+            IN_FLIGHT.dec(('handle',))
+            context.txn_id = caller_txn_id
+
+    def _end_stream(self):
+        # Called once the streamed data has all been fetched, has failed, or
+        # is no longer wanted
+        if self._streaming:
+            self._streaming = False
+            HANDLE_SECONDS.observe(self._handle_seconds,
+                                   self._metric_labels())
+
+    def _metric_labels(self):
+        return (self.request.get(api.TARGET), self.operation, self.action)
 
     def sc_complete(self):
         """
         complete the request. Called by the SvcCollection class. Do not
         override this method. Override method 'complete'.
         """
+        caller_txn_id = getattr(context, 'txn_id', '')
+        context.txn_id = self.request.txn_id
+        IN_FLIGHT.inc(('complete',))
+        start = time.time()
+        bll_response = None
         try:
             bll_response = self.complete()
             if bll_response is not None:
@@ -318,10 +727,21 @@ class SvcBase(pykka.ThreadingActor):
         except Exception as e:
             LOG.exception('sc_complete failed.')
             self.response.exception(traceback.format_exc())
-            self.put_resource(self.request.txn_id, self.response.error(
-                "%s" % e))
+            bll_response = self.response.error("%s" % e)
+            self.put_resource(self.request.txn_id, bll_response)
         finally:
-            self.stop()
+            IN_FLIGHT.dec(('complete',))
+            context.txn_id = caller_txn_id
+
+        # Only requests with long-running processing are of interest
+        if bll_response is not None:
+            labels = self._metric_labels()
+            duration = time.time() - start
+            COMPLETE_SECONDS.observe(duration, labels)
+            trace.record(trace.COMPLETE, trace.COMPLETE, start, duration,
+                         self.request.txn_id)
+            if bll_response.get(api.STATUS) == api.STATUS_ERROR:
+                COMPLETE_ERRORS.inc(labels)
 
     def update_job_status(self, msg=None, percentage_complete=0,
                           txn_id=None, **kwargs):
@@ -420,8 +840,9 @@ class SvcBase(pykka.ThreadingActor):
         :param action: Action in the service to use (optional)
         :param data: Data object to place into the request (optional)
         :param region: Restrict operation to the given region (optional)
-        :param polling_interval: Timeout, in seconds, to wait between polls
-                                 for status from the async request (optional)
+        :param polling_interval: Timeout, in seconds, to wait for a status
+                                 update from the async request before polling
+                                 for its status (optional)
         :param max_polls: Limit of the number of polls to be attempted.
                           If 0 or not specified, then attempts will be
                           unlimited.
@@ -443,29 +864,38 @@ class SvcBase(pykka.ThreadingActor):
 
         request = self._build_request(request, target, auth_token, operation,
                                       action, data, region, **kwargs)
-
-        handle_reply = SvcBase.spawn_service(request)
-        txn_id = handle_reply.get(api.TXN_ID)
+        txn_id = request.txn_id
 
         pct_key = ".".join((api.PROGRESS, api.PERCENT_COMPLETE))
 
-        poll = 0
-        reply = get_job_status(txn_id)
-        while reply.get(api.STATUS) in (api.STATUS_INPROGRESS,
-                                        api.STATUS_NOT_FOUND):
+        # Status updates made by the called service in this process are
+        # delivered by the watch as soon as they happen; the database is only
+        # polled when no update has arrived within the polling interval, such
+        # as when the job is being run on another node
+        with watch_job_status(txn_id) as watch:
+            handle_reply = SvcBase.spawn_service(request)
+
+            poll = 0
+            if handle_reply.get(api.STATUS) == api.STATUS_ERROR:
+                reply = handle_reply
+            else:
+                reply = watch.wait(0) or get_job_status(txn_id)
+
+            while reply.get(api.STATUS) in (api.STATUS_INPROGRESS,
+                                            api.STATUS_NOT_FOUND):
 
-            if max_polls > 0 and poll < max_polls:
-                raise Exception(self._("Timed out waiting for {}").format(
-                                request))
+                if max_polls > 0 and poll < max_polls:
+                    raise Exception(self._("Timed out waiting for {}").format(
+                                    request))
 
-            pct = util.get_val(reply, pct_key)
-            if pct:
-                overall_pct = offset + scale * pct
-                self.update_job_status(percentage_complete=overall_pct)
+                pct = util.get_val(reply, pct_key)
+                if pct:
+                    overall_pct = offset + scale * pct
+                    self.update_job_status(percentage_complete=overall_pct)
 
-            time.sleep(polling_interval)
-            reply = get_job_status(txn_id)
-            poll += 1
+                reply = watch.wait(polling_interval) or \
+                    get_job_status(txn_id)
+                poll += 1
 
         data = reply.get(api.DATA)
         if reply.get(api.STATUS) == api.STATUS_ERROR:
@@ -501,6 +931,9 @@ class SvcBase(pykka.ThreadingActor):
         values in the request.  If a request is not supplied, a new BllRequest
         will be constructed from the other parameters.
 
+        Short-running @exposed operations are run directly on the calling
+        thread; see the ``inline`` parameter of :func:`spawn_service`.
+
         :param request: Request dictionary or BllRequest (optional)
         :param target: Target service to invoke (optional)
         :param token: Authorization token to use (optional).  If neither token
@@ -518,7 +951,7 @@ class SvcBase(pykka.ThreadingActor):
         request = self._build_request(request, target, auth_token, operation,
                                       action, data, region, **kwargs)
 
-        response = SvcBase.spawn_service(request)
+        response = SvcBase.spawn_service(request, inline=True)
         if response[api.STATUS] == api.COMPLETE:
             return response[api.DATA]
 
@@ -529,6 +962,45 @@ class SvcBase(pykka.ThreadingActor):
 
         raise Exception(message)
 
+    def call_services_parallel(self, calls, timeout=None):
+        """
+        Call several synchronous services concurrently, rather than one
+        after another with :func:`call_service`, so that the time spent
+        waiting on independent backends overlaps.  The calls run on the
+        ``fanout`` worker pool and inherit the txn_id, language, region and
+        token of this service just as :func:`call_service` does.
+
+        For example::
+
+            nova, ardana = self.call_services_parallel([
+                {'target': 'nova', 'operation': 'hypervisor-list'},
+                {'target': 'ardana', 'path': '/model/entities/servers'},
+            ])
+
+        :param calls: List of dictionaries, each containing the keyword
+                      arguments of one :func:`call_service` call
+        :param timeout: Maximum number of seconds to wait for each call
+                        (optional)
+        :return: A list containing the result of each call, in the same
+                 order as ``calls``.  A call that failed or timed out is
+                 represented by the exception that it raised, which the
+                 caller should check for.
+        """
+        txn_id = getattr(context, 'txn_id', '')
+
+        def run(kwargs):
+            caller_txn_id = getattr(context, 'txn_id', '')
+            context.txn_id = txn_id
+            try:
+                return self.call_service(**kwargs)
+            finally:
+                context.txn_id = caller_txn_id
+
+        return worker_pool.run_concurrently(
+            worker_pool.get_pool('fanout'),
+            [functools.partial(run, kwargs) for kwargs in calls],
+            timeout=timeout)
+
     def _build_request(self, request=None, target=None, auth_token=None,
                        operation=None, action=None, data=None, region=None,
                        **kwargs):
@@ -137,22 +137,21 @@ class UserGroupSvc(service.SvcBase):
     @service.expose('users_list')
     def _get_user_list(self):
 
-        user_list = []
+        # The users are generated one project at a time, so that a large
+        # list can be streamed back to the caller
         seen_users = set()
         projects = self.client.projects.list()
         for project in projects:
             for user in self.client.users.list(project_id=project.id):
                 if user.id not in seen_users:
-                    user_list.append({'username': user.name,
-                                      'project_id': project.id,
-                                      'project_name': project.name,
-                                      'email': getattr(user, 'email', ''),
-                                      'user_id': user.id})
+                    yield {'username': user.name,
+                           'project_id': project.id,
+                           'project_name': project.name,
+                           'email': getattr(user, 'email', ''),
+                           'user_id': user.id}
                     seen_users.add(user.id)
 
-        return user_list
-
-    @service.expose('project_list')
+    @service.expose('project_list', cache_ttl=60)
     def get_project_list(self):
         """
         Returns the project list. Duh.
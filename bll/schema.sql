@@ -13,9 +13,22 @@ CREATE TABLE IF NOT EXISTS `jobs` (
     `updated_at`        DATETIME     NOT NULL,
     `status`            TEXT         NOT NULL,
 
-    PRIMARY KEY (`id`)
+    PRIMARY KEY (`id`),
+    KEY `jobs_updated_at` (`updated_at`)
 );
 
+-- Add the index used to delete expired jobs to tables created without it
+SET @has_index = (SELECT COUNT(*) FROM information_schema.statistics
+                  WHERE table_schema = DATABASE()
+                    AND table_name = 'jobs'
+                    AND index_name = 'jobs_updated_at');
+SET @sql = IF(@has_index = 0,
+              'CREATE INDEX `jobs_updated_at` ON `jobs` (`updated_at`)',
+              'DO 0');
+PREPARE add_index FROM @sql;
+EXECUTE add_index;
+DEALLOCATE PREPARE add_index;
+
 DROP TABLE IF EXISTS `install`;
 
 DROP TABLE IF EXISTS `plugin`;
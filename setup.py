@@ -38,7 +38,6 @@ setup(
         'pecan',
         'stevedore',
         'PyMySQL',
-        'Pykka',
         'argparse',
         'WebOb',
         'requests',
@@ -72,6 +71,11 @@ setup(
             entry("preferences", "PreferencesSvc"),
             entry("user_group", "UserGroupSvc"),
         ],
+        'bll.job_status': [
+            "memory = bll.common.job_stores:MemoryStatus",
+            "mysql = bll.common.job_status:DbStatus",
+            "sqlite = bll.common.job_stores:SqliteStatus",
+        ],
     },
 
 )
@@ -3,7 +3,7 @@
 from builtins import range
 from bll import api
 from bll.plugins import service
-from bll.common import util
+from bll.common import backend, util
 import time
 
 
@@ -20,6 +20,31 @@ class GeneralSvc(service.SvcBase):
     def echo(self):
         return self.data.get('message')
 
+    @service.expose()
+    def context(self):
+        # Report the context in which the request is being processed
+        return {'txn_id': util.context.txn_id,
+                'language': self.request.get(api.LANGUAGE)}
+
+    @service.expose()
+    def call_backend(self):
+        # Pretend to call a backend service a given number of times
+        for i in range(self.data.get('count', 1)):
+            with backend.Call('stub', 'GET things') as call:
+                call.size = 100
+        return 'called'
+
+    @service.expose()
+    def generate(self):
+        # Generate the requested number of items, failing at the given item
+        for i in range(self.data.get('count', 0)):
+            if i == self.data.get('fail_at'):
+                raise Exception('Intentional failure while generating')
+            if self.data.get('call_backend'):
+                with backend.Call('test', 'generate'):
+                    pass
+            yield {'id': i}
+
     @service.expose(is_long=True)
     def echo_slow(self):
         return self.data.get('message')
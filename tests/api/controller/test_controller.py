@@ -7,8 +7,10 @@ import mock
 import time
 
 from bll import api
+from bll.api import stream
 from bll.api.controllers import app_controller
 from bll.api.controllers.v1 import V1
+from bll.common import codec
 from bll.common.job_status import get_job_status
 from tests.util import TestCase, log_level
 
@@ -81,6 +83,181 @@ class Test(TestCase):
         self.assertEqual(reply[api.STATUS], 'error')
         self.assertEqual(reply[api.DATA][0][api.DATA], 'some error happened')
 
+    def test_post_stream(self, _mock_request, _mock_response):
+        _mock_request.body = json.dumps({
+            api.TARGET: 'general',
+            api.DATA: {api.OPERATION: 'generate', 'count': 3}})
+        reply = app_controller.AppController().post()
+
+        # The response body is generated as it is written out
+        self.assertIs(_mock_response, reply)
+        self.assertEqual(201, _mock_response.status)
+        body = json.loads(''.join(_mock_response.app_iter))
+        self.assertEqual(api.COMPLETE, body[api.STATUS])
+        self.assertEqual([{'id': 0}, {'id': 1}, {'id': 2}], body[api.DATA])
+
+    def test_post_stream_fail_first_page(self, _mock_request,
+                                         _mock_response):
+        # A failure before the response starts is reported as usual
+        _mock_request.body = json.dumps({
+            api.TARGET: 'general',
+            api.DATA: {api.OPERATION: 'generate', 'count': 3, 'fail_at': 1}})
+        with log_level(logging.CRITICAL, 'bll'):
+            reply = app_controller.AppController().post()
+
+        self.assertEqual(api.STATUS_ERROR, reply[api.STATUS])
+        self.assertIn('Intentional', reply[api.DATA][0][api.DATA])
+
+    def test_post_stream_fail(self, _mock_request, _mock_response):
+        _mock_request.body = json.dumps({
+            api.TARGET: 'general',
+            api.DATA: {api.OPERATION: 'generate', 'count': 300,
+                       'fail_at': 150}})
+        reply = app_controller.AppController().post()
+
+        with log_level(logging.CRITICAL, 'bll'):
+            body = json.loads(''.join(reply.app_iter))
+        self.assertEqual(api.STATUS_ERROR, body[api.STATUS])
+        # The data ends with the last page fetched in full
+        self.assertEqual(stream.PAGE_SIZE, len(body[api.DATA]))
+        self.assertIn('Intentional', body['error'])
+
+    def test_post_stream_timing(self, _mock_request, _mock_response):
+        # The backend calls made while the response is written are included
+        # in its timing and trace
+        _mock_request.headers = {app_controller.DEBUG_TIMING_HEADER: '1',
+                                 app_controller.TRACE_HEADER: '1'}
+        _mock_request.body = json.dumps({
+            api.TARGET: 'general',
+            api.DATA: {api.OPERATION: 'generate', 'count': 250,
+                       'call_backend': True}})
+        reply = app_controller.AppController().post()
+
+        body = json.loads(''.join(reply.app_iter))
+        self.assertEqual(250, len(body[api.DATA]))
+        timing = body[api.BACKEND_TIMING]
+        self.assertEqual(250, timing[0]['calls'])
+        spans = body[api.TRACE][0]['children']
+        self.assertEqual(250, len([s for s in spans
+                                   if s['kind'] == 'backend']))
+
+    def test_debug_timing(self, _mock_request, _mock_response):
+        _mock_request.body = json.dumps({
+            api.TARGET: 'general',
+            api.DATA: {api.OPERATION: 'call_backend', 'count': 2}})
+
+        reply = app_controller.AppController().post()
+        self.assertNotIn(api.BACKEND_TIMING, reply)
+
+        _mock_request.headers = {app_controller.DEBUG_TIMING_HEADER: '1'}
+        reply = app_controller.AppController().post()
+        self.assertEqual('called', reply[api.DATA])
+        timing, = reply[api.BACKEND_TIMING]
+        self.assertEqual('stub', timing['dependency'])
+        self.assertEqual('GET things', timing['endpoint'])
+        self.assertEqual(2, timing['calls'])
+        self.assertEqual(200, timing['bytes'])
+
+    def test_trace(self, _mock_request, _mock_response):
+        _mock_request.headers = {app_controller.TRACE_HEADER: '1'}
+        _mock_request.body = json.dumps({
+            api.TARGET: 'composite',
+            api.DATA: {api.OPERATION: 'composite'}})
+
+        reply = app_controller.AppController().post()
+        self.assertEqual(['foo', 'bar'], reply[api.DATA])
+        root, = reply[api.TRACE]
+        self.assertEqual('composite.composite', root['name'])
+        self.assertEqual(reply[api.TXN_ID], root['txn_id'])
+        self.assertEqual(['general.echo', 'general.echo'],
+                         [child['name'] for child in root['children']])
+
+        # The trace is also returned with the status of the transaction
+        _mock_request.body = json.dumps({
+            api.TXN_ID: reply[api.TXN_ID],
+            api.JOB_STATUS_REQUEST: True})
+        reply = app_controller.AppController().post()
+        self.assertEqual([root], reply[api.TRACE])
+
+    def test_batch(self, _mock_request, _mock_response):
+        _mock_request.headers = {'Accept-Language': 'ja'}
+        _mock_request.body = json.dumps({
+            api.BATCH: [
+                {api.TARGET: 'general',
+                 api.DATA: {api.OPERATION: 'echo', 'message': 'one'}},
+                {api.TARGET: 'general',
+                 api.DATA: {api.OPERATION: 'failhandle'}},
+                {api.TARGET: 'general',
+                 api.DATA: {api.OPERATION: 'context'}},
+                {api.TARGET: 'general',
+                 api.DATA: {api.OPERATION: 'null'},
+                 api.JOB_STATUS_REQUEST: True},
+            ],
+            api.CONCURRENCY: 2
+        })
+        with log_level(logging.CRITICAL, 'bll'):
+            reply = app_controller.AppController().post()
+
+        self.assertEqual(api.COMPLETE, reply[api.STATUS])
+        echo, fail, context, status = reply[api.DATA]
+
+        self.assertEqual(api.COMPLETE, echo[api.STATUS])
+        self.assertEqual('one', echo[api.DATA])
+
+        self.assertEqual(api.STATUS_ERROR, fail[api.STATUS])
+
+        # Each request runs with its own txn_id and the caller's headers
+        self.assertEqual(context[api.TXN_ID], context[api.DATA]['txn_id'])
+        self.assertNotEqual(echo[api.TXN_ID], context[api.TXN_ID])
+        self.assertEqual('ja', context[api.DATA]['language'])
+
+        self.assertEqual(api.STATUS_ERROR, status[api.STATUS])
+        self.assertIn("No txn_id", status[api.DATA][0][api.DATA])
+
+    def test_batch_not_streamed(self, _mock_request, _mock_response):
+        _mock_request.body = json.dumps({
+            api.BATCH: [{api.TARGET: 'general',
+                         api.DATA: {api.OPERATION: 'generate', 'count': 2}}]
+        })
+        reply = app_controller.AppController().post()
+        self.assertEqual([{'id': 0}, {'id': 1}], reply[api.DATA][0][api.DATA])
+
+    def test_batch_job_status(self, _mock_request, _mock_response):
+        _mock_request.body = json.dumps({
+            api.TARGET: 'general',
+            api.DATA: {api.OPERATION: 'echo_slow', 'message': 'slow'}})
+        reply = app_controller.AppController().post()
+        txn_id = reply[api.TXN_ID]
+        time.sleep(0.1)
+
+        _mock_request.body = json.dumps({
+            api.BATCH: [{api.TXN_ID: txn_id, api.JOB_STATUS_REQUEST: True}]
+        })
+        reply = app_controller.AppController().post()
+        self.assertEqual(api.COMPLETE, reply[api.STATUS])
+        self.assertEqual('slow', reply[api.DATA][0][api.DATA])
+
+    def test_batch_invalid(self, _mock_request, _mock_response):
+        _mock_request.body = json.dumps({api.BATCH: 'not a list'})
+        with log_level(logging.CRITICAL, 'bll'):
+            reply = app_controller.AppController().post()
+        self.assertEqual(api.STATUS_ERROR, reply[api.STATUS])
+        self.assertEqual(400, _mock_response.status)
+
+        _mock_request.body = json.dumps({api.BATCH: [{}] * 51})
+        with log_level(logging.CRITICAL, 'bll'):
+            reply = app_controller.AppController().post()
+        self.assertEqual(api.STATUS_ERROR, reply[api.STATUS])
+        self.assertIn("at most 50", reply[api.DATA][0][api.DATA])
+
+        # A bad concurrency is an invalid request, not a bad body
+        _mock_request.body = json.dumps({api.BATCH: [], api.CONCURRENCY: 'x'})
+        with mock.patch.object(app_controller, 'LOG') as log:
+            reply = app_controller.AppController().post()
+        self.assertFalse(log.error.called)
+        self.assertEqual(400, _mock_response.status)
+        self.assertIn("concurrency", reply[api.DATA][0][api.DATA])
+
 
 class TestV1(TestCase):
 
@@ -118,6 +295,14 @@ class TestV1(TestCase):
         with mock.patch('bll.api.controllers.v1.request', request):
             self.assertTrue(V1.check_permissions())
 
+    def test_eula_batch_requires_token(self):
+        # The requests of a batch are not allowed through by its target
+        body = {'target': 'eula',
+                'batch': [{'target': 'general',
+                           'data': {'operation': 'null'}}]}
+        response = self.app.post_json('/v1/bll', body, expect_errors=True)
+        self.assertEqual(401, response.status_code)
+
     def testPermissionsWithoutToken(self):
 
         # Create a request object without a token
@@ -160,3 +345,49 @@ class TestV1(TestCase):
         response = self.app.post_json('/v1/bll', body,
                                       expect_errors=True)
         self.assertEqual(401, response.status_code)
+
+    @mock.patch('bll.api.controllers.v1.validate', return_value=True)
+    def test_streamed_response(self, _):
+        body = {'target': 'general', 'operation': 'generate', 'count': 5000}
+        response = self.app.post_json('/v1/bll', body,
+                                      headers={'X-Auth-Token': 'token'})
+        self.assertEqual(201, response.status_code)
+        self.assertEqual('application/json', response.content_type)
+        self.assertEqual(5000, len(response.json[api.DATA]))
+        self.assertEqual(api.COMPLETE, response.json[api.STATUS])
+
+    @mock.patch('bll.api.controllers.v1.validate', return_value=True)
+    def test_body_parsed_once(self, _):
+        body = {'target': 'general', 'operation': 'echo', 'message': 'hi'}
+        with mock.patch.object(codec, 'loads', wraps=codec.loads) as loads:
+            response = self.app.post_json('/v1/bll', body,
+                                          headers={'X-Auth-Token': 'token'})
+        self.assertEqual('hi', response.json[api.DATA])
+        self.assertEqual(1, loads.call_count)
+
+    def test_metrics_requires_token(self):
+        response = self.app.get('/v1/metrics', expect_errors=True)
+        self.assertEqual(401, response.status_code)
+
+    @mock.patch('bll.api.controllers.v1.validate', return_value=True)
+    def test_metrics(self, _):
+        self.app.post_json('/v1/bll',
+                           {'target': 'general', 'operation': 'null'},
+                           headers={'X-Auth-Token': 'sometoken'})
+
+        response = self.app.get('/v1/metrics',
+                                headers={'X-Auth-Token': 'sometoken'})
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('text/plain', response.content_type)
+        self.assertIn('# TYPE bll_request_duration_seconds histogram',
+                      response.text)
+        self.assertIn('bll_requests_total{action="",operation="null",'
+                      'status="complete",target="general"}', response.text)
+        self.assertIn('bll_http_requests_total{code="201"}', response.text)
+        self.assertIn('bll_worker_pool_threads{pool="handle"}',
+                      response.text)
+
+    def test_metrics_unauthenticated(self):
+        with mock.patch('bll.api.controllers.v1.get_conf', return_value=True):
+            response = self.app.get('/v1/metrics')
+        self.assertEqual(200, response.status_code)
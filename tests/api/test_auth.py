@@ -2,7 +2,11 @@
 # (c) Copyright 2015-2016 Hewlett Packard Enterprise Development LP
 # (c) Copyright 2017 SUSE LLC
 #
+import mock
+from keystoneclient import session
+
 from bll.api.auth_token import TokenHelpers
+from bll.common import backend
 from bll.common.exception import BllAuthenticationFailedException
 from tests.util import TestCase, functional, create_user, delete_user
 
@@ -141,3 +145,23 @@ class TestAuth(TestCase):
         with self.assertRaisesRegexp(BllAuthenticationFailedException,
                                      'not an admin of the default domain'):
             auth_token.login(self.user.name, password)
+
+
+class TestInstrumentedSession(TestCase):
+
+    def test_request(self):
+        calls = backend.CALLS.value(('nova', 'GET servers/detail', 'ok'))
+
+        resp = mock.Mock(status_code=200, content='{"servers": []}')
+        with mock.patch.object(session.Session, 'request',
+                               return_value=resp) as request:
+            sess = auth_token.InstrumentedSession()
+            self.assertIs(resp, sess.request(
+                '/v2.1/4a5c9f0e/servers/detail', 'GET',
+                endpoint_filter={'service_type': 'compute'}))
+            request.assert_called_once_with(
+                '/v2.1/4a5c9f0e/servers/detail', 'GET',
+                endpoint_filter={'service_type': 'compute'})
+
+        self.assertEqual(calls + 1, backend.CALLS.value(
+            ('nova', 'GET servers/detail', 'ok')))
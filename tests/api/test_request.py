@@ -1,8 +1,11 @@
 # (c) Copyright 2015-2016 Hewlett Packard Enterprise Development LP
 # (c) Copyright 2017 SUSE LLC
+import mock
 from bll import api
 from tests import util
-from bll.api.request import BllRequest
+from bll.api.renderer import encode
+from bll.api.request import BllRequest, parse_body
+from bll.common import codec
 
 
 class Test(util.TestCase):
@@ -111,3 +114,64 @@ class Test(util.TestCase):
         self.assertNotIn("operation", data)
 
         self.assertIn("foo", data)
+
+    def test_data_is_view_of_request(self):
+        hypervisors = [util.randomdict() for _ in range(3)]
+        req = BllRequest(target=util.randomword(), operation='op',
+                         data={'hypervisor-list': hypervisors})
+
+        # The field is stored once, and shared by the top level and data
+        self.assertIs(hypervisors, req['hypervisor-list'])
+        self.assertIs(hypervisors, req['data']['hypervisor-list'])
+        self.assertEqual({'operation': 'op', 'hypervisor-list': hypervisors},
+                         dict(req['data']))
+
+        # Changes through either one are seen by the other
+        req['data']['foo'] = 'bar'
+        self.assertEqual('bar', req['foo'])
+        req['baz'] = 1
+        self.assertEqual(1, req['data']['baz'])
+        del req['data']['foo']
+        self.assertNotIn('foo', req)
+
+    def test_data_keeps_reserved_names(self):
+        d = util.randomdict()
+        req = BllRequest(target='a', data={'target': 'b', 'data': d})
+
+        self.assertEqual('a', req['target'])
+        self.assertEqual('b', req['data']['target'])
+        self.assertIs(d, req.get('data').get('data'))
+        self.assertEqual(2, len(req['data']))
+
+    def test_copy_does_not_share_data(self):
+        req1 = BllRequest(target='a', data={'data': {}, 'foo': 1})
+        req2 = BllRequest(req1, data={'foo': 2})
+        req2['data']['data'] = 'changed'
+
+        self.assertEqual(1, req1['data']['foo'])
+        self.assertEqual({}, req1['data']['data'])
+        self.assertEqual(2, req2['foo'])
+
+    def test_data_view_json(self):
+        req = BllRequest(target='a', operation='op', data={'data': [1]})
+        self.assertEqual({'operation': 'op', 'data': [1]},
+                         codec.loads(encode(req['data'])))
+
+    def test_parse_body_once(self):
+        http_request = mock.Mock(body='{"target": "general"}', context={})
+        with mock.patch.object(codec, 'loads', wraps=codec.loads) as loads:
+            first = parse_body(http_request)
+            second = parse_body(http_request)
+
+        self.assertEqual({'target': 'general'}, first)
+        self.assertIs(first, second)
+        self.assertEqual(1, loads.call_count)
+
+    def test_parse_body_without_context(self):
+        http_request = type('Request', (object,), dict(body='{"a": 1}'))
+        self.assertEqual({'a': 1}, parse_body(http_request))
+
+    def test_parse_body_invalid(self):
+        http_request = mock.Mock(body='{"target": ', context={})
+        self.assertRaises(ValueError, parse_body, http_request)
+        self.assertEqual({}, http_request.context)
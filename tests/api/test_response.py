@@ -0,0 +1,29 @@
+# (c) Copyright 2018 SUSE LLC
+from bll import api
+from bll.api.request import BllRequest
+from bll.api.response import BllResponse
+from tests import util
+
+
+class Test(util.TestCase):
+
+    def test_copy_envelope(self):
+        response = BllResponse(BllRequest(target=util.randomword()))
+        response[api.DATA] = [util.randomdict() for _ in range(10)]
+        response[api.PROGRESS] = {api.PERCENT_COMPLETE: 0}
+        response[api.STATUS] = api.STATUS_INPROGRESS
+
+        envelope = response.copy_envelope()
+        self.assertIsInstance(envelope, BllResponse)
+        self.assertEqual(response, envelope)
+        self.assertEqual(response.txn_id, envelope.txn_id)
+
+        # The payload is shared rather than copied
+        self.assertIs(response[api.DATA], envelope[api.DATA])
+
+        # Subsequent updates to the original are not seen in the copy
+        response[api.PROGRESS][api.PERCENT_COMPLETE] = 50
+        response.complete()
+        self.assertEqual(api.STATUS_INPROGRESS, envelope[api.STATUS])
+        self.assertEqual(0, envelope[api.PROGRESS][api.PERCENT_COMPLETE])
+        self.assertNotIn(api.DURATION, envelope)
@@ -0,0 +1,138 @@
+# (c) Copyright 2018 SUSE LLC
+import json
+import logging
+
+from bll import api
+from bll.api import stream
+from bll.api.request import BllRequest
+from bll.api.response import BllResponse
+from tests.util import TestCase, log_level
+
+
+def _generate(count, fail_at=None):
+    for i in range(count):
+        if i == fail_at:
+            raise ValueError('failed at %d' % i)
+        yield {'id': i}
+
+
+class TestStream(TestCase):
+
+    def test_is_stream(self):
+        self.assertTrue(stream.is_stream(_generate(1)))
+        self.assertTrue(stream.is_stream({'items': _generate(1), 'x': 1}))
+        self.assertFalse(stream.is_stream([1, 2]))
+        self.assertFalse(stream.is_stream({'items': [1, 2]}))
+        self.assertFalse(stream.is_stream(None))
+
+    def test_materialize(self):
+        self.assertEqual([{'id': 0}, {'id': 1}],
+                         stream.materialize(_generate(2)))
+        self.assertEqual({'items': [{'id': 0}], 'x': 1},
+                         stream.materialize({'items': _generate(1), 'x': 1}))
+
+        data = {'items': [1]}
+        self.assertIs(data, stream.materialize(data))
+
+    def _reply(self, data):
+        reply = BllResponse(BllRequest(target='general', operation='x'))
+        reply[api.DATA] = data
+        reply.complete()
+        return reply
+
+    def test_json_chunks(self):
+        reply = self._reply(_generate(1000))
+        chunks = list(stream.json_chunks(reply, chunk_size=1024))
+
+        self.assertGreater(len(chunks), 1)
+        result = json.loads(''.join(chunks))
+        self.assertEqual(1000, len(result[api.DATA]))
+        self.assertEqual(999, result[api.DATA][-1]['id'])
+        self.assertEqual(api.COMPLETE, result[api.STATUS])
+        self.assertEqual(reply[api.TXN_ID], result[api.TXN_ID])
+
+    def test_json_chunks_nested(self):
+        reply = self._reply({'instances': _generate(3), 'total': 3})
+        result = json.loads(''.join(stream.json_chunks(reply)))
+        self.assertEqual({'instances': [{'id': 0}, {'id': 1}, {'id': 2}],
+                          'total': 3}, result[api.DATA])
+
+    def test_json_chunks_empty(self):
+        result = json.loads(''.join(stream.json_chunks(
+            self._reply(_generate(0)))))
+        self.assertEqual([], result[api.DATA])
+
+    def test_json_chunks_failure(self):
+        for data in (_generate(5, fail_at=3),
+                     {'instances': _generate(5, fail_at=3)}):
+            with log_level(logging.CRITICAL, 'bll'):
+                text = ''.join(stream.json_chunks(self._reply(data)))
+
+            # The document is still valid, and reports the error
+            result = json.loads(text)
+            self.assertEqual(api.STATUS_ERROR, result[api.STATUS])
+            self.assertIn('failed at 3', result['error'])
+
+    def test_json_chunks_finish(self):
+        finished = []
+
+        def finish(envelope):
+            finished.append(envelope)
+            if envelope is not None:
+                envelope['extra'] = 1
+            return envelope
+
+        result = json.loads(''.join(stream.json_chunks(
+            self._reply(_generate(2)), finish=finish)))
+        self.assertEqual(1, result['extra'])
+
+        # Abandoned responses are finished too
+        chunks = stream.json_chunks(self._reply(_generate(1000)),
+                                    chunk_size=10, finish=finish)
+        next(chunks)
+        chunks.close()
+        self.assertIsNone(finished[-1])
+
+
+class TestPages(TestCase):
+
+    def setUp(self):
+        self.fetches = 0
+        self.closed = 0
+
+    def fetch(self, take):
+        self.fetches += 1
+        return take()
+
+    def close(self):
+        self.closed += 1
+
+    def test_pages(self):
+        pages = stream.Pages(_generate(25), self.fetch, self.close,
+                             page_size=10)
+
+        # The first page is taken straight away, the rest by fetch
+        self.assertEqual(0, self.fetches)
+        self.assertEqual(range(25), [item['id'] for item in pages])
+        self.assertEqual(2, self.fetches)
+        self.assertEqual(1, self.closed)
+
+    def test_first_page_fails(self):
+        with self.assertRaises(ValueError):
+            stream.Pages(_generate(25, fail_at=5), self.fetch, self.close,
+                         page_size=10)
+        self.assertEqual(1, self.closed)
+
+    def test_paginate(self):
+        data = stream.paginate({'items': _generate(3), 'x': 1}, self.fetch,
+                               self.close)
+        self.assertIsInstance(data['items'], stream.Pages)
+        self.assertTrue(stream.is_stream(data))
+
+        stream._close(data)
+        stream._close(data)
+        self.assertEqual(1, self.closed)
+        self.assertEqual([], list(data['items']))
+
+        unchanged = [1, 2]
+        self.assertIs(unchanged, stream.paginate(unchanged, self.fetch))
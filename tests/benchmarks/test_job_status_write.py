@@ -0,0 +1,101 @@
+# (c) Copyright 2018 SUSE LLC
+from datetime import datetime, timedelta
+import timeit
+
+from bll.common import codec, db_pool
+from bll.common.job_status import DbStatus
+from tests.util import TestCase, functional, randomword
+
+# Number of rows in the table while writes are timed (rounded up to a power
+# of two)
+ROWS = 1000000
+
+ITERATIONS = 20
+REPEAT = 3
+
+TABLE = 'jobs_benchmark'
+
+
+class BenchmarkStatus(DbStatus):
+    TABLE = TABLE
+
+
+def _legacy_update(txn_id, status):
+    # The write path before the single upsert: a select, an insert or update,
+    # and a delete of expired jobs, each with its own round trip
+    with db_pool.get_pool().connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT `status` FROM `%s` WHERE `id`=%%s" % TABLE,
+                           txn_id)
+            row = cursor.fetchone()
+            timestamp = datetime.now()
+            message = codec.dumps(status)
+            if row is None:
+                cursor.execute("INSERT INTO `%s` (`id`, `updated_at`, "
+                               "`status`) VALUES (%%s, %%s, %%s)" % TABLE,
+                               [txn_id, timestamp, message])
+            else:
+                cursor.execute("UPDATE `%s` SET `updated_at`=%%s, "
+                               "`status`=%%s WHERE `id`=%%s" % TABLE,
+                               [timestamp, message, txn_id])
+        connection.commit()
+
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM `%s` where `updated_at` < %%s" % TABLE,
+                           timestamp - timedelta(days=1))
+        connection.commit()
+
+
+@functional('benchmark,mysql')
+class TestJobStatusWriteBenchmark(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestJobStatusWriteBenchmark, cls).setUpClass()
+
+        # Fill a copy of the jobs table with recent jobs, by repeatedly
+        # doubling its rows
+        with db_pool.get_pool().connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("DROP TABLE IF EXISTS `%s`" % TABLE)
+                cursor.execute("CREATE TABLE `%s` LIKE `jobs`" % TABLE)
+                cursor.execute("INSERT INTO `%s` VALUES ('0', NOW(), %%s)" %
+                               TABLE, codec.dumps({'status': 'complete'}))
+                rows = 1
+                while rows < ROWS:
+                    cursor.execute(
+                        "INSERT INTO `%s` SELECT CONCAT(`id`, '.', %%s), "
+                        "`updated_at`, `status` FROM `%s`" % (TABLE, TABLE),
+                        rows)
+                    rows *= 2
+            connection.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        with db_pool.get_pool().connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("DROP TABLE IF EXISTS `%s`" % TABLE)
+
+    def test_write(self):
+        store = BenchmarkStatus()
+        txn_id = randomword()
+        status = {'status': 'inprogress', 'progress': {'percentComplete': 50},
+                  'data': [{'id': randomword(36)} for _ in range(20)]}
+
+        legacy = min(timeit.repeat(lambda: _legacy_update(txn_id, status),
+                                   number=ITERATIONS, repeat=REPEAT))
+        upsert = min(timeit.repeat(
+            lambda: store.update_job_status(txn_id, status),
+            number=ITERATIONS, repeat=REPEAT))
+
+        print("\nJob status write with %d jobs, per call: select, write and "
+              "delete %.2fms, upsert %.2fms" %
+              (ROWS, legacy * 1e3 / ITERATIONS, upsert * 1e3 / ITERATIONS))
+        self.assertLess(upsert, legacy)
+
+        # Deleting a batch of expired jobs uses the index on updated_at
+        purge = min(timeit.repeat(
+            lambda: store.purge(datetime.now() - timedelta(days=1), 1000),
+            number=ITERATIONS, repeat=REPEAT))
+        print("Janitor batch with no expired jobs: %.2fms" %
+              (purge * 1e3 / ITERATIONS))
@@ -0,0 +1,79 @@
+# (c) Copyright 2018 SUSE LLC
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from bll import api
+from bll.common.job_status import DbStatus
+from bll.common.job_stores import MemoryStatus, SqliteStatus
+from tests.util import TestCase, functional, randomword
+
+# Number of jobs updated by each thread, and the number of times each one is
+# updated and read
+JOBS = 50
+UPDATES = 10
+
+THREADS = (1, 8)
+
+
+def _throughput(store, threads):
+    """
+    Returns the number of updates and reads of job status per second made by
+    the given number of threads, each updating and reading its own jobs
+    """
+    status = {api.STATUS: api.STATUS_INPROGRESS,
+              api.PROGRESS: {api.PERCENT_COMPLETE: 50},
+              api.DATA: [{'id': randomword(36)} for _ in range(20)]}
+
+    def work():
+        for txn_id in [randomword() for _ in range(JOBS)]:
+            for _ in range(UPDATES):
+                store.update_job_status(txn_id, status)
+                store.get_job_status(txn_id)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.time()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return 2 * threads * JOBS * UPDATES / (time.time() - start)
+
+
+class StoreBenchmark(object):
+
+    def make_store(self):
+        raise NotImplementedError()
+
+    def test_throughput(self):
+        store = self.make_store()
+        for threads in THREADS:
+            rate = _throughput(store, threads)
+            print("\n%s with %d threads: %d operations per second" %
+                  (type(store).__name__, threads, rate))
+            self.assertGreater(rate, 0)
+
+
+@functional('benchmark')
+class TestMemoryStatusBenchmark(StoreBenchmark, TestCase):
+
+    def make_store(self):
+        return MemoryStatus()
+
+
+@functional('benchmark')
+class TestSqliteStatusBenchmark(StoreBenchmark, TestCase):
+
+    def make_store(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        return SqliteStatus(path=os.path.join(path, 'jobs.db'))
+
+
+@functional('benchmark,mysql')
+class TestDbStatusBenchmark(StoreBenchmark, TestCase):
+
+    def make_store(self):
+        return DbStatus()
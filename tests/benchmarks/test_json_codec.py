@@ -0,0 +1,76 @@
+# (c) Copyright 2018 SUSE LLC
+import json
+import timeit
+
+from bll import api
+from bll.api.request import BllRequest
+from bll.api.response import BllResponse
+from bll.common import codec
+from tests.util import TestCase, functional, randomword
+
+REPEAT = 5
+
+
+def _best(func, number):
+    return min(timeit.repeat(func, number=number, repeat=REPEAT))
+
+
+def _payloads():
+    # A typical request body, a progress update as stored in job status,
+    # and a large instance-list response
+    request = json.dumps({
+        api.TARGET: 'monitor',
+        api.DATA: {api.OPERATION: 'measurement_list',
+                   'name': 'cpu.utilization_perc',
+                   'dimensions': {'hostname': randomword()},
+                   'start_time': '2018-01-01T00:00:00',
+                   'merge_metrics': True}})
+
+    progress = BllResponse(BllRequest(target='ardana', operation='deploy'))
+    progress[api.PROGRESS] = {'percentComplete': 40}
+    progress[api.STATUS] = api.STATUS_INPROGRESS
+    progress[api.DATA] = {'log': [randomword(80) for _ in range(50)]}
+
+    instances = BllResponse(BllRequest(target='nova',
+                                       operation='instance-list'))
+    instances[api.DATA] = {'instances': [
+        {'id': randomword(32),
+         'name': randomword(),
+         'status': 'ACTIVE',
+         'host': randomword(),
+         'addresses': {'private': [{'addr': '10.0.0.%d' % (i % 250),
+                                    'version': 4}]},
+         'metadata': {'owner': randomword()},
+         'cpu': {'vcpus': 2},
+         'memory': {'ram': 4096},
+         'storage': {'disk': 40},
+         'power_state': 'RUNNING',
+         'task_state': None}
+        for i in range(2000)]}
+    instances.complete()
+
+    return [('request', json.loads(request), 2000),
+            ('progress', dict(progress), 2000),
+            ('instance-list', dict(instances), 10)]
+
+
+@functional('benchmark')
+class TestJsonCodecBenchmark(TestCase):
+
+    def tearDown(self):
+        codec.use()
+
+    def test_codecs(self):
+        print("")
+        for label, payload, number in _payloads():
+            text = json.dumps(payload)
+            results = []
+            for name in codec.available():
+                codec.use(name, name)
+                dumps = _best(lambda: codec.dumps(payload), number)
+                loads = _best(lambda: codec.loads(text), number)
+                results.append("%s dumps %.1fus loads %.1fus" % (
+                    name, dumps * 1e6 / number, loads * 1e6 / number))
+
+            print("JSON %s (%d bytes): %s" % (label, len(text),
+                                              ", ".join(results)))
@@ -0,0 +1,55 @@
+# (c) Copyright 2018 SUSE LLC
+import mock
+import timeit
+
+from stevedore import driver
+
+from bll.api.request import BllRequest
+from bll.plugins import registry
+from bll.plugins.service import SvcBase
+from tests.util import TestCase, functional
+
+ITERATIONS = 200
+REPEAT = 5
+
+
+def _driver_manager_lookup(target):
+    # The per-request lookup that was used before the registry existed
+    return driver.DriverManager(namespace='bll.plugins', name=target).driver
+
+
+def _best(func):
+    return min(timeit.repeat(func, number=ITERATIONS, repeat=REPEAT))
+
+
+def _composite():
+    # The composite stub makes two nested call_service hops to 'general'
+    return SvcBase.spawn_service(BllRequest(target='composite',
+                                            operation='composite'))
+
+
+@functional('benchmark')
+class TestPluginRegistryBenchmark(TestCase):
+
+    def test_lookup(self):
+        registry.load()
+        before = _best(lambda: _driver_manager_lookup('general'))
+        after = _best(lambda: registry.get('general'))
+
+        print("\nPlugin lookup, per call: DriverManager %.1fus, "
+              "registry %.1fus" % (before * 1e6 / ITERATIONS,
+                                   after * 1e6 / ITERATIONS))
+        self.assertLess(after, before)
+
+    def test_per_hop(self):
+        registry.load()
+        hops = 3 * ITERATIONS   # the composite request plus 2 nested calls
+
+        with mock.patch.object(registry, 'get', _driver_manager_lookup):
+            before = _best(_composite)
+        after = _best(_composite)
+
+        # End-to-end timings include thread hand-offs and are too noisy to
+        # assert on, so they are just reported
+        print("\nSpawn overhead, per hop: DriverManager %.1fus, "
+              "registry %.1fus" % (before * 1e6 / hops, after * 1e6 / hops))
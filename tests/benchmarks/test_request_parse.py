@@ -0,0 +1,63 @@
+# (c) Copyright 2018 SUSE LLC
+import json
+import timeit
+
+import mock
+
+from bll import api
+from bll.api.request import BllRequest, parse_body
+from bll.common import codec
+from tests.util import TestCase, functional, randomword
+
+ITERATIONS = 20
+REPEAT = 5
+
+
+def _alarm_definitions(size):
+    # A monitor request creating alarm definitions, of roughly size bytes
+    definitions = []
+    while len(definitions) * 500 < size:
+        definitions.append({
+            'name': randomword(20),
+            'description': randomword(200),
+            'expression': 'avg(cpu.idle_perc{hostname=%s}) < 10 times 3' %
+                          randomword(),
+            'match_by': ['hostname'],
+            'severity': 'HIGH',
+            'alarm_actions': [randomword(32)],
+            'ok_actions': [randomword(32)],
+            'undetermined_actions': [],
+        })
+    return json.dumps({api.TARGET: 'monitor',
+                       api.DATA: {api.OPERATION: 'alarm_definition_create',
+                                  'definitions': definitions}})
+
+
+def _twice_parsed(body):
+    # check_permissions and the controller each parse the body
+    codec.loads(body)
+    return BllRequest(codec.loads(body))
+
+
+def _once_parsed(body):
+    http_request = mock.Mock(body=body, context={})
+    parse_body(http_request)
+    return BllRequest(parse_body(http_request))
+
+
+@functional('benchmark')
+class TestRequestParseBenchmark(TestCase):
+
+    def test_parse(self):
+        body = _alarm_definitions(1024 * 1024)
+
+        before = min(timeit.repeat(lambda: _twice_parsed(body),
+                                   number=ITERATIONS, repeat=REPEAT))
+        after = min(timeit.repeat(lambda: _once_parsed(body),
+                                  number=ITERATIONS, repeat=REPEAT))
+
+        print("\nRequest parsing of %dKB body, per request: twice %.1fms, "
+              "once %.1fms" % (len(body) / 1024,
+                               before * 1e3 / ITERATIONS,
+                               after * 1e3 / ITERATIONS))
+        self.assertLess(after, before)
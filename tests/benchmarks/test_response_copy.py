@@ -0,0 +1,61 @@
+# (c) Copyright 2018 SUSE LLC
+import copy
+import os
+import resource
+import time
+
+from bll import api
+from bll.api.request import BllRequest
+from bll.api.response import BllResponse
+from tests.util import TestCase, functional, randomword
+
+ELEMENTS = 50000
+
+
+def _measure(func, arg):
+    """
+    Run func(arg) in a forked child and return its elapsed time in seconds
+    and the growth, in KB, of the child's peak resident memory
+    """
+    rfd, wfd = os.pipe()
+    pid = os.fork()
+    if pid == 0:   # pragma: no cover
+        os.close(rfd)
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.time()
+        func(arg)
+        elapsed = time.time() - start
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        os.write(wfd, "%f %d" % (elapsed, peak - before))
+        os._exit(0)
+
+    os.close(wfd)
+    output = os.read(rfd, 100)
+    os.close(rfd)
+    os.waitpid(pid, 0)
+    elapsed, growth = output.split()
+    return float(elapsed), int(growth)
+
+
+@functional('benchmark')
+class TestResponseCopyBenchmark(TestCase):
+
+    def test_copy(self):
+        response = BllResponse(BllRequest(target='nova',
+                                          operation='instance-list'))
+        response[api.DATA] = [{'id': i,
+                               'name': randomword(),
+                               'status': 'ACTIVE',
+                               'metadata': {'host': randomword()},
+                               'addresses': [randomword(), randomword()]}
+                              for i in range(ELEMENTS)]
+        response.complete()
+
+        deep_time, deep_mem = _measure(copy.deepcopy, response)
+        env_time, env_mem = _measure(BllResponse.copy_envelope, response)
+
+        print("\nCopy of %d element response: deepcopy %.3fs %dKB, "
+              "envelope %.6fs %dKB" % (ELEMENTS, deep_time, deep_mem,
+                                       env_time, env_mem))
+        self.assertLess(env_time, deep_time)
+        self.assertLess(env_mem, deep_mem)
@@ -0,0 +1,45 @@
+# (c) Copyright 2018 SUSE LLC
+import timeit
+
+from bll.common.util import scrub_passwords, _scrub_text
+from tests.util import TestCase, functional, randomword
+
+ITERATIONS = 5
+REPEAT = 3
+
+
+def _instances(count):
+    # A nova instance_list response, with nested dictionaries and lists
+    return [{
+        'id': randomword(36),
+        'name': randomword(12),
+        'status': 'ACTIVE',
+        'host': randomword(10),
+        'image': {'id': randomword(36), 'name': randomword(20)},
+        'flavor': {'id': '2', 'name': 'm1.small', 'ram': 2048, 'vcpus': 1},
+        'addresses': {'private': [{'addr': '10.0.0.%d' % (i % 255),
+                                   'version': 4}]},
+        'metadata': {'admin_password': randomword(), 'role': 'web'},
+        'auth_token': randomword(32),
+    } for i in range(count)]
+
+
+@functional('benchmark')
+class TestScrubBenchmark(TestCase):
+
+    def test_scrub(self):
+        data = {'instances': _instances(5000)}
+
+        regex = min(timeit.repeat(lambda: _scrub_text(str(data)),
+                                  number=ITERATIONS, repeat=REPEAT))
+        full = min(timeit.repeat(lambda: scrub_passwords(data, max_length=0),
+                                 number=ITERATIONS, repeat=REPEAT))
+        capped = min(timeit.repeat(lambda: scrub_passwords(data),
+                                   number=ITERATIONS, repeat=REPEAT))
+
+        print("\nScrubbing %d instances, per call: regex %.1fms, "
+              "structured %.1fms, structured and capped %.2fms" %
+              (len(data['instances']), regex * 1e3 / ITERATIONS,
+               full * 1e3 / ITERATIONS, capped * 1e3 / ITERATIONS))
+        self.assertLess(full, regex)
+        self.assertLess(capped, full)
@@ -0,0 +1,139 @@
+# (c) Copyright 2018 SUSE LLC
+import threading
+import uuid
+
+import mock
+
+from bll.common import backend
+from bll.common.util import context, new_txn_id
+from tests.util import TestCase
+
+
+class Manager(object):
+
+    def list(self, **kwargs):
+        return [kwargs]
+
+    def fail(self):
+        raise Exception('Intentional failure')
+
+
+class CallableManager(Manager):
+
+    size = 3
+
+    def __call__(self):
+        return 'called'
+
+
+class FakeClient(object):
+
+    endpoint = 'http://example.com'
+
+    def __init__(self):
+        self.things = Manager()
+        self.others = CallableManager()
+
+
+class TestBackend(TestCase):
+
+    def setUp(self):
+        self.txn_id = str(uuid.uuid4())
+        context.txn_id = self.txn_id
+        self.addCleanup(setattr, context, 'txn_id', '')
+
+    def calls(self, dependency, endpoint, outcome='ok'):
+        return backend.CALLS.value((dependency, endpoint, outcome))
+
+    def test_resource(self):
+        self.assertEqual('servers/detail', backend.resource(
+            '/v2.1/4a5c9f0e3b2d/servers/detail?all_tenants=1'))
+        self.assertEqual('users/*/groups', backend.resource(
+            'https://keystone:5000/v3/users/4a5c9f0e3b2d/groups'))
+        self.assertEqual('auth/tokens', backend.resource(
+            'https://keystone:5000/v3/auth/tokens'))
+        self.assertEqual('', backend.resource('http://host:8080'))
+
+    def test_call(self):
+        before = self.calls('test', 'GET things')
+        with backend.Call('test', 'GET things') as call:
+            call.size = 20
+        self.assertEqual(before + 1, self.calls('test', 'GET things'))
+
+        failed = self.calls('test', 'GET things', 'error')
+        with self.assertRaises(ValueError):
+            with backend.Call('test', 'GET things'):
+                raise ValueError()
+        with backend.Call('test', 'GET things') as call:
+            call.failed = True
+        self.assertEqual(failed + 2,
+                         self.calls('test', 'GET things', 'error'))
+
+    def test_client(self):
+        client = backend.Client(FakeClient(), 'test')
+        self.assertEqual('http://example.com', client.endpoint)
+
+        before = self.calls('test', 'things.list')
+        self.assertEqual([{'a': 1}], client.things.list(a=1))
+        self.assertEqual(before + 1, self.calls('test', 'things.list'))
+
+        failed = self.calls('test', 'things.fail', 'error')
+        with self.assertRaises(Exception):
+            client.things.fail()
+        self.assertEqual(failed + 1,
+                         self.calls('test', 'things.fail', 'error'))
+
+    def test_client_proxies(self):
+        client = backend.Client(FakeClient(), 'test')
+
+        # Callable managers keep their attributes, and are recorded when
+        # called
+        self.assertEqual(3, client.others.size)
+        self.assertEqual([{}], client.others.list())
+        before = self.calls('test', 'others')
+        self.assertEqual('called', client.others())
+        self.assertEqual(before + 1, self.calls('test', 'others'))
+
+        self.assertIsInstance(client.others, CallableManager)
+        self.assertEqual('list', client.things.list.__name__)
+
+        # Members can be patched through the proxy
+        with mock.patch.object(client.things, 'list', return_value=[]):
+            self.assertEqual([], client.things.list())
+        self.assertEqual([{}], client.things.list())
+
+    def test_breakdown(self):
+        backend.start_breakdown(self.txn_id)
+
+        with backend.Call('test', 'GET things') as call:
+            call.size = 10
+
+        # Calls made on behalf of the transaction on other threads count
+        def child():
+            context.txn_id = new_txn_id(self.txn_id)
+            with backend.Call('test', 'GET things') as call:
+                call.size = 5
+            with backend.Call('other', 'POST thing'):
+                pass
+        thread = threading.Thread(target=child)
+        thread.start()
+        thread.join()
+
+        # ... unlike those of other transactions
+        context.txn_id = str(uuid.uuid4())
+        with backend.Call('test', 'GET things'):
+            pass
+        context.txn_id = self.txn_id
+
+        timing = backend.end_breakdown(self.txn_id)
+        self.assertEqual(2, len(timing))
+        things = [t for t in timing if t['dependency'] == 'test'][0]
+        self.assertEqual('GET things', things['endpoint'])
+        self.assertEqual(2, things['calls'])
+        self.assertEqual(15, things['bytes'])
+        self.assertGreaterEqual(timing[0]['seconds'], timing[1]['seconds'])
+
+        # Nothing is totalled once the breakdown has ended
+        with backend.Call('test', 'GET things'):
+            pass
+        self.assertEqual([], backend.end_breakdown(self.txn_id))
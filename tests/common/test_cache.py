@@ -0,0 +1,84 @@
+# (c) Copyright 2018 SUSE LLC
+import time
+
+from bll.common import cache
+from bll.common.cache import TTLCache
+from tests.util import TestCase
+
+
+class TestTTLCache(TestCase):
+
+    def test_put_get(self):
+        c = TTLCache('test')
+        self.assertIsNone(c.get('a'))
+        c.put('a', 1)
+        self.assertEqual(1, c.get('a'))
+        self.assertEqual((1, True), c.lookup('a'))
+
+    def test_expiry(self):
+        c = TTLCache('test', ttl=0.05)
+        c.put('a', 1)
+        c.put('b', 2, stale=10)
+        time.sleep(0.1)
+
+        self.assertIsNone(c.lookup('a'))
+
+        # An expired entry within its stale period is returned as stale
+        self.assertEqual((2, False), c.lookup('b'))
+        self.assertIsNone(c.get('b'))
+
+    def test_lru_eviction(self):
+        c = TTLCache('test', max_size=2)
+        c.put('a', 1)
+        c.put('b', 2)
+
+        # Using 'a' makes 'b' the least recently used
+        c.lookup('a')
+        c.put('c', 3)
+
+        self.assertEqual(1, c.get('a'))
+        self.assertIsNone(c.get('b'))
+        self.assertEqual(3, c.get('c'))
+        self.assertEqual(1, c.stats()['evictions'])
+
+    def test_invalidate(self):
+        c = TTLCache('test')
+        for key in (('x', 1), ('x', 2), ('y', 1)):
+            c.put(key, key)
+
+        c.invalidate(('y', 1))
+        self.assertIsNone(c.get(('y', 1)))
+
+        self.assertEqual(2, c.invalidate_matching(lambda k: k[0] == 'x'))
+        self.assertEqual(0, c.stats()['size'])
+
+    def test_refresh(self):
+        c = TTLCache('test')
+        self.assertTrue(c.begin_refresh('a'))
+        self.assertFalse(c.begin_refresh('a'))
+        c.end_refresh('a')
+        self.assertTrue(c.begin_refresh('a'))
+
+    def test_stats(self):
+        c = TTLCache('test', ttl=0.05)
+        c.put('a', 1, stale=10)
+        c.lookup('a', name='op')
+        c.lookup('b', name='op')
+        time.sleep(0.1)
+        c.lookup('a', name='op')
+        c.lookup('a', name='other')
+
+        stats = c.stats()
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(2, stats['stale_hits'])
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(0.75, stats['hit_ratio'])
+        self.assertEqual({'hits': 1, 'stale_hits': 1, 'misses': 1,
+                          'hit_ratio': 2.0 / 3},
+                         stats['by_name']['op'])
+
+    def test_get_cache(self):
+        c = cache.get_cache('test_get_cache', max_size=5)
+        self.assertIs(c, cache.get_cache('test_get_cache'))
+        self.assertEqual(5, c.max_size)
+        self.assertIn('test_get_cache', cache.stats())
@@ -0,0 +1,73 @@
+# (c) Copyright 2018 SUSE LLC
+import json
+from collections import namedtuple
+from datetime import datetime
+
+from bll.api.renderer import encode
+from bll.common import codec
+from tests.util import TestCase
+
+Point = namedtuple('Point', 'x y')
+
+SAMPLE = {
+    'status': 'complete',
+    'data': [{'id': 1, 'name': u'caf\xe9', 'ratio': 0.25, 'tags': None},
+             {'id': 2, 'point': Point(1, 2), 'flags': [True, False]}],
+}
+
+
+class TestCodec(TestCase):
+
+    def tearDown(self):
+        codec.use()
+
+    def test_preferred(self):
+        self.assertIn('json', codec.available())
+        self.assertEqual(codec.available(codec.DECODERS)[0],
+                         codec.decoder_in_use)
+
+        # The standard library encodes faster than simplejson
+        self.assertEqual('json', codec.encoder_in_use)
+        self.assertIs(json.dumps, codec.dumps)
+
+    def test_same_as_stdlib(self):
+        for name in codec.available():
+            codec.use(name, name)
+            text = codec.dumps(SAMPLE, sort_keys=True)
+            self.assertEqual(json.dumps(SAMPLE, sort_keys=True), text,
+                             "%s differs from json" % name)
+            self.assertEqual(json.loads(text), codec.loads(text))
+
+    def test_decode_error(self):
+        for name in codec.available():
+            codec.use(name, name)
+            self.assertRaises(ValueError, codec.loads, '{"target": ')
+
+    def test_use(self):
+        codec.use('json')
+        self.assertEqual('json', codec.decoder_in_use)
+        self.assertIs(json.loads, codec.loads)
+        self.assertRaises(ImportError, codec.use, 'no_such_json')
+        self.assertRaises(ImportError, codec.use, None, 'no_such_json')
+
+    def test_simplejson_str(self):
+        if 'simplejson' not in codec.available():
+            self.skipTest("simplejson is not available")
+
+        # On python 2 simplejson decodes ASCII strings as str, and others as
+        # unicode, while the standard library always returns unicode
+        text = json.dumps({'target': u'caf\xe9'})
+        codec.use('simplejson')
+        decoded = codec.loads(text)
+        self.assertIs(str, type(decoded.keys()[0]))
+        self.assertIs(unicode, type(decoded['target']))
+
+        codec.use('json')
+        decoded = codec.loads(text)
+        self.assertIs(unicode, type(decoded.keys()[0]))
+        self.assertIs(unicode, type(decoded['target']))
+
+    def test_render(self):
+        when = datetime(2018, 1, 2, 3, 4, 5)
+        self.assertEqual({'when': '2018-01-02 03:04:05'},
+                         json.loads(encode({'when': when})))
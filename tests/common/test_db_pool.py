@@ -0,0 +1,140 @@
+# (c) Copyright 2018 SUSE LLC
+import threading
+import time
+
+from pymysql.constants import SERVER_STATUS
+
+from bll.common.db_pool import ConnectionPool
+from bll.common.exception import ServiceUnavailableException
+from tests.util import TestCase
+
+
+class FakeConnection(object):
+
+    def __init__(self):
+        self.open = True
+        self.server_status = 0
+        self.healthy = True
+        self.rolled_back = False
+
+    def ping(self, reconnect=True):
+        if not self.healthy:
+            raise Exception('Lost connection')
+
+    def rollback(self):
+        self.rolled_back = True
+        self.server_status = 0
+
+    def close(self):
+        self.open = False
+
+
+class TestConnectionPool(TestCase):
+
+    def setUp(self):
+        self.created = []
+
+    def connect(self):
+        conn = FakeConnection()
+        self.created.append(conn)
+        return conn
+
+    def pool(self, **kwargs):
+        return ConnectionPool('test', self.connect, **kwargs)
+
+    def test_reuse(self):
+        pool = self.pool()
+        with pool.connection() as conn:
+            self.assertEqual(1, pool.stats()['in_use'])
+        with pool.connection() as again:
+            self.assertIs(conn, again)
+
+        stats = pool.stats()
+        self.assertEqual(1, stats['created'])
+        self.assertEqual(2, stats['acquired'])
+        self.assertEqual(1, stats['idle'])
+        self.assertEqual(0, stats['in_use'])
+
+    def test_rollback(self):
+        pool = self.pool()
+        with pool.connection() as conn:
+            conn.server_status = SERVER_STATUS.SERVER_STATUS_IN_TRANS
+        self.assertTrue(conn.rolled_back)
+
+        # Connections closed while in use are not returned to the pool
+        with self.assertRaises(ValueError):
+            with pool.connection() as conn:
+                conn.close()
+                raise ValueError()
+        self.assertEqual(0, pool.stats()['size'])
+        with pool.connection() as again:
+            self.assertIsNot(conn, again)
+
+    def test_timeout(self):
+        pool = self.pool(max_size=1, timeout=0.05)
+        with pool.connection():
+            with self.assertRaises(ServiceUnavailableException):
+                pool.acquire()
+        self.assertEqual(1, pool.stats()['timeouts'])
+
+    def test_wait(self):
+        pool = self.pool(max_size=1, timeout=5)
+        conn = pool.acquire()
+        acquired = []
+
+        def other():
+            with pool.connection() as conn:
+                acquired.append(conn)
+        thread = threading.Thread(target=other)
+        thread.start()
+
+        time.sleep(0.05)
+        self.assertEqual([], acquired)
+        pool.release(conn)
+        thread.join()
+        self.assertEqual([conn], acquired)
+        self.assertGreater(pool.stats()['wait_total'], 0.04)
+
+    def test_health_check(self):
+        pool = self.pool(check_after=0)
+        with pool.connection() as conn:
+            pass
+        conn.healthy = False
+
+        with pool.connection() as replacement:
+            self.assertIsNot(conn, replacement)
+        self.assertFalse(conn.open)
+
+        stats = pool.stats()
+        self.assertEqual(1, stats['failed_checks'])
+        self.assertEqual(1, stats['size'])
+
+    def test_idle_recycling(self):
+        pool = self.pool(min_size=1, max_idle=0)
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        pool.release(second)
+        self.assertEqual(2, pool.stats()['idle'])
+
+        # The oldest idle connection is closed, keeping min_size open
+        with pool.connection() as conn:
+            self.assertIs(second, conn)
+        self.assertFalse(first.open)
+        self.assertEqual(1, pool.stats()['size'])
+
+    def test_connect_fails(self):
+        def connect():
+            raise Exception('Cannot connect')
+        pool = ConnectionPool('test', connect, max_size=1)
+        for _ in range(2):
+            with self.assertRaises(Exception):
+                pool.acquire()
+        self.assertEqual(0, pool.stats()['size'])
+
+    def test_close(self):
+        pool = self.pool()
+        with pool.connection() as conn:
+            pass
+        pool.close()
+        self.assertFalse(conn.open)
+        self.assertEqual(0, pool.stats()['size'])
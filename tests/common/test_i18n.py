@@ -0,0 +1,56 @@
+# (c) Copyright 2018 SUSE LLC
+import gettext
+
+import mock
+
+from bll.common import i18n
+from tests.util import TestCase
+
+
+class TestI18n(TestCase):
+
+    def setUp(self):
+        for translators in (i18n._translators, i18n._catalogs):
+            patcher = mock.patch.dict(translators, clear=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def catalog(self, language):
+        return gettext.find(i18n.DOMAIN, i18n.LOCALE_DIR, [language])
+
+    def test_catalog_read_once(self):
+        catalogs = {self.catalog(language) for language in i18n.LANGUAGES}
+        with mock.patch.object(gettext, 'translation',
+                               wraps=gettext.translation) as translation:
+            i18n.preload()
+            self.assertEqual(len(catalogs), translation.call_count)
+
+            for language in i18n.LANGUAGES * 3:
+                i18n.get_(language)
+            self.assertEqual(len(catalogs), translation.call_count)
+
+    def test_same_translator(self):
+        self.assertIs(i18n.get_('ja'), i18n.get_('ja'))
+        if self.catalog('ja') != self.catalog('en'):
+            self.assertIsNot(i18n.get_('ja'), i18n.get_('en'))
+
+        # Unknown languages share the fallback
+        self.assertIs(i18n.get_('xx'), i18n.get_('yy'))
+
+    def test_unknown_language(self):
+        # Falls back to the untranslated text
+        self.assertEqual(u'Hello', i18n.get_('xx')('Hello'))
+
+    def test_max_languages(self):
+        with mock.patch.object(i18n, 'MAX_LANGUAGES', 2):
+            for language in ('a', 'b', 'c'):
+                i18n.get_(language)
+        self.assertEqual(['a', 'b'], sorted(i18n._translators))
+
+        # Further unknown languages reuse the fallback, rather than loading
+        # their own
+        with mock.patch.object(i18n, 'MAX_LANGUAGES', 2), \
+                mock.patch.object(gettext, 'translation') as translation:
+            for language in ('d', 'e'):
+                self.assertIs(i18n.get_('a'), i18n.get_(language))
+        self.assertFalse(translation.called)
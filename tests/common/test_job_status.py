@@ -0,0 +1,266 @@
+# (c) Copyright 2018 SUSE LLC
+from datetime import datetime, timedelta
+import mock
+import threading
+import time
+
+from bll import api
+from bll.common import db_pool, job_status
+from bll.common.job_status import watch_job_status, update_job_status
+from tests.util import TestCase, functional, randomword
+
+
+class TestJobWatch(TestCase):
+
+    def test_wait_timeout(self):
+        with watch_job_status(randomword()) as watch:
+            self.assertIsNone(watch.wait(0.01))
+
+    def test_update_before_wait(self):
+        txn_id = randomword()
+        with watch_job_status(txn_id) as watch:
+            update_job_status(txn_id, {api.STATUS: api.COMPLETE})
+            self.assertEqual(api.COMPLETE, watch.wait(0)[api.STATUS])
+
+            # Each update is only returned once
+            self.assertIsNone(watch.wait(0))
+
+    def test_update_copied(self):
+        txn_id = randomword()
+        status = {api.STATUS: api.STATUS_INPROGRESS}
+        with watch_job_status(txn_id) as watch:
+            update_job_status(txn_id, status)
+
+            # The job's later changes to its status are not seen until it
+            # is updated again
+            status[api.STATUS] = api.STATUS_ERROR
+            self.assertEqual(api.STATUS_INPROGRESS,
+                             watch.wait(0)[api.STATUS])
+
+    def test_wakes_on_update(self):
+        txn_id = randomword()
+        status = {api.STATUS: api.COMPLETE}
+        timer = threading.Timer(0.05, update_job_status, (txn_id, status))
+
+        with watch_job_status(txn_id) as watch:
+            start = time.time()
+            timer.start()
+            self.assertEqual(status, watch.wait(10))
+            self.assertLess(time.time() - start, 5)
+
+    def test_unregistered(self):
+        txn_id = randomword()
+        with watch_job_status(txn_id):
+            with watch_job_status(txn_id):
+                self.assertEqual(2, len(job_status._watches[txn_id]))
+            self.assertEqual(1, len(job_status._watches[txn_id]))
+        self.assertNotIn(txn_id, job_status._watches)
+
+        # Updates for jobs that are not being watched are just stored
+        update_job_status(txn_id, {api.STATUS: api.COMPLETE})
+        self.assertNotIn(txn_id, job_status._watches)
+
+
+class FakeStore(object):
+
+    def __init__(self, expired):
+        self.expired = expired
+        self.purges = []
+
+    def purge(self, before, limit):
+        self.purges.append(before)
+        count = min(limit, self.expired)
+        self.expired -= count
+        return count
+
+
+class TestJanitor(TestCase):
+
+    def test_batches(self):
+        store = FakeStore(25)
+        janitor = job_status.Janitor(retention=3600, batch_size=10, pause=0)
+        with mock.patch.object(job_status, '_get_status_obj',
+                               return_value=store):
+            self.assertEqual(25, janitor.run_once())
+
+        self.assertEqual(3, len(store.purges))
+        age = datetime.now() - store.purges[0]
+        self.assertAlmostEqual(3600, age.total_seconds(), delta=60)
+
+    def test_no_purge(self):
+        # Stores without purge need no janitor
+        with mock.patch.object(job_status, '_get_status_obj',
+                               return_value=object()):
+            self.assertEqual(0, job_status.Janitor().run_once())
+
+
+class TestWriteBehind(TestCase):
+
+    def setUp(self):
+        self.writes = []
+        self.writer = job_status.WriteBehind(
+            lambda txn_id, status: self.writes.append((txn_id, status)),
+            interval=60)
+
+    def progress(self, percent):
+        return {api.STATUS: api.STATUS_INPROGRESS,
+                api.PROGRESS: {api.PERCENT_COMPLETE: percent}}
+
+    def test_coalesces_progress(self):
+        txn_id = randomword()
+        for percent in range(0, 100, 10):
+            self.writer.update(txn_id, self.progress(percent))
+
+        # Only the first update is written before the flush, and only the
+        # latest is written by it
+        self.assertEqual([(txn_id, self.progress(0))], self.writes)
+        self.assertEqual(self.progress(90), self.writer.pending(txn_id))
+        self.writer.flush()
+        self.assertEqual(self.progress(90), self.writes[-1][1])
+        self.assertEqual(2, len(self.writes))
+        self.assertIsNone(self.writer.pending(txn_id))
+
+    def test_final_update_written(self):
+        txn_id = randomword()
+        self.writer.update(txn_id, self.progress(0))
+        self.writer.update(txn_id, self.progress(50))
+        self.writer.update(txn_id, {api.STATUS: api.COMPLETE})
+
+        # The final status replaces the pending progress, which is never
+        # written
+        self.assertEqual([api.STATUS_INPROGRESS, api.COMPLETE],
+                         [status[api.STATUS] for _, status in self.writes])
+        self.assertIsNone(self.writer.pending(txn_id))
+        self.writer.flush()
+        self.assertEqual(2, len(self.writes))
+
+    def test_final_update_waits_for_flush(self):
+        txn_id = randomword()
+        flushing = threading.Event()
+        release = threading.Event()
+
+        def write(txn, status):
+            if status == self.progress(50):
+                flushing.set()
+                release.wait(10)
+            self.writes.append(status)
+
+        writer = job_status.WriteBehind(write, interval=60)
+        writer.update(txn_id, self.progress(0))
+        writer.update(txn_id, self.progress(50))
+        flush = threading.Thread(target=writer.flush)
+        flush.start()
+        flushing.wait(10)
+
+        threading.Timer(0.05, release.set).start()
+        writer.update(txn_id, {api.STATUS: api.COMPLETE})
+        flush.join()
+        self.assertEqual(api.COMPLETE, self.writes[-1][api.STATUS])
+
+    def test_disabled_or_full(self):
+        writer = job_status.WriteBehind(
+            lambda txn_id, status: self.writes.append(txn_id), interval=0)
+        for _ in range(3):
+            writer.update('a', self.progress(0))
+        self.assertEqual(['a'] * 3, self.writes)
+
+        self.writes = []
+        writer = job_status.WriteBehind(
+            lambda txn_id, status: self.writes.append(txn_id), interval=60,
+            max_jobs=1)
+        for txn_id in ('a', 'a', 'b', 'b'):
+            writer.update(txn_id, self.progress(0))
+
+        # The progress of b is written through while that of a is pending
+        self.assertEqual(['a', 'b', 'b'], self.writes)
+        writer.flush()
+        self.assertEqual('a', self.writes[-1])
+
+    def test_read_pending(self):
+        txn_id = randomword()
+        status = self.progress(0)
+        with mock.patch.object(job_status, '_write_behind', self.writer):
+            update_job_status(txn_id, status)
+            status[api.PROGRESS][api.PERCENT_COMPLETE] = 50
+            update_job_status(txn_id, status)
+            self.assertEqual(1, len(self.writes))
+            self.assertEqual(self.progress(50),
+                             job_status.get_job_status(txn_id))
+
+
+class TestJobResults(TestCase):
+
+    def setUp(self):
+        self.store = mock.Mock()
+        self.store.get_job_status.return_value = {api.STATUS: api.COMPLETE,
+                                                  api.DATA: 'done'}
+        patcher = mock.patch.object(job_status, '_get_status_obj',
+                                    return_value=self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cached_on_write(self):
+        txn_id = randomword()
+        update_job_status(txn_id, {api.STATUS: api.COMPLETE, api.DATA: 1})
+
+        for _ in range(3):
+            status = job_status.get_job_status(txn_id)
+            self.assertEqual({api.STATUS: api.COMPLETE, api.DATA: 1}, status)
+
+            # Callers get a copy that they may change
+            status[api.TRACE] = []
+        self.assertFalse(self.store.get_job_status.called)
+
+    def test_cached_on_read(self):
+        txn_id = randomword()
+        for _ in range(3):
+            self.assertEqual(api.COMPLETE,
+                             job_status.get_job_status(txn_id)[api.STATUS])
+        self.assertEqual(1, self.store.get_job_status.call_count)
+
+    def test_progress_not_cached(self):
+        self.store.get_job_status.return_value = {
+            api.STATUS: api.STATUS_INPROGRESS}
+        txn_id = randomword()
+        for _ in range(2):
+            job_status.get_job_status(txn_id)
+        self.assertEqual(2, self.store.get_job_status.call_count)
+
+    def test_replaced(self):
+        txn_id = randomword()
+        update_job_status(txn_id, {api.STATUS: api.STATUS_ERROR})
+        update_job_status(txn_id, {api.STATUS: api.STATUS_INPROGRESS})
+        self.store.get_job_status.return_value = {
+            api.STATUS: api.STATUS_INPROGRESS}
+        self.assertEqual(api.STATUS_INPROGRESS,
+                         job_status.get_job_status(txn_id)[api.STATUS])
+
+
+@functional('mysql')
+class TestDbStatus(TestCase):
+
+    def test_upsert_and_purge(self):
+        store = job_status.DbStatus()
+        txn_id = randomword()
+        store.update_job_status(txn_id, {api.STATUS: api.STATUS_INPROGRESS})
+        store.update_job_status(txn_id, {api.STATUS: api.COMPLETE})
+        self.assertEqual(api.COMPLETE,
+                         store.get_job_status(txn_id)[api.STATUS])
+
+        # Only jobs updated before the given time are deleted
+        dayold = datetime.now() - timedelta(days=1)
+        store.purge(dayold, 1000)
+        self.assertEqual(api.COMPLETE,
+                         store.get_job_status(txn_id)[api.STATUS])
+
+        with db_pool.get_pool().connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("UPDATE `jobs` SET `updated_at`=%s "
+                               "WHERE `id`=%s",
+                               [dayold - timedelta(hours=1), txn_id])
+            connection.commit()
+
+        while store.purge(dayold, 1000):
+            pass
+        self.assertEqual(api.STATUS_NOT_FOUND,
+                         store.get_job_status(txn_id)[api.STATUS])
@@ -0,0 +1,207 @@
+# (c) Copyright 2018 SUSE LLC
+from datetime import datetime, timedelta
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import mock
+
+from bll import api
+from bll.common import job_status
+from bll.common.job_status import DbStatus, JobStatusStore
+from bll.common.job_stores import MemoryStatus, SqliteStatus
+from tests.util import TestCase, functional, randomword
+
+
+class StoreContract(object):
+    """
+    Tests that every job status store must pass
+    """
+
+    def make_store(self):
+        raise NotImplementedError()
+
+    def setUp(self):
+        super(StoreContract, self).setUp()
+        self.store = self.make_store()
+
+    def test_not_found(self):
+        status = self.store.get_job_status(randomword())
+        self.assertEqual(api.STATUS_NOT_FOUND, status[api.STATUS])
+
+    def test_round_trip(self):
+        txn_id = randomword()
+        status = {api.STATUS: api.STATUS_INPROGRESS,
+                  api.PROGRESS: {api.PERCENT_COMPLETE: 10},
+                  api.DATA: [{'id': randomword()}]}
+        self.store.update_job_status(txn_id, status)
+
+        # The status read is a copy of that written
+        stored = self.store.get_job_status(txn_id)
+        self.assertEqual(status, stored)
+        status[api.PROGRESS][api.PERCENT_COMPLETE] = 50
+        self.assertEqual(10, self.store.get_job_status(txn_id)[
+            api.PROGRESS][api.PERCENT_COMPLETE])
+
+    def test_overwrite(self):
+        txn_id = randomword()
+        self.store.update_job_status(txn_id, {api.STATUS: 'inprogress'})
+        self.store.update_job_status(txn_id, {api.STATUS: api.COMPLETE})
+        self.assertEqual({api.STATUS: api.COMPLETE},
+                         self.store.get_job_status(txn_id))
+
+    def test_unserializable(self):
+        txn_id = randomword()
+        self.store.update_job_status(txn_id, {api.DATA: object()})
+        self.assertIn('object', self.store.get_job_status(txn_id))
+
+    def test_concurrent(self):
+        txn_ids = [randomword() for _ in range(8)]
+
+        def update(txn_id):
+            for percent in range(20):
+                self.store.update_job_status(
+                    txn_id, {api.PROGRESS: {api.PERCENT_COMPLETE: percent}})
+        threads = [threading.Thread(target=update, args=(txn_id,))
+                   for txn_id in txn_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for txn_id in txn_ids:
+            status = self.store.get_job_status(txn_id)
+            self.assertEqual(19, status[api.PROGRESS][api.PERCENT_COMPLETE])
+
+    def test_purge(self):
+        if not hasattr(self.store, 'purge'):
+            self.skipTest("The store discards expired status itself")
+
+        txn_ids = [randomword() for _ in range(3)]
+        for txn_id in txn_ids:
+            self.store.update_job_status(txn_id, {api.STATUS: api.COMPLETE})
+        time.sleep(0.01)
+        recent = randomword()
+        self.store.update_job_status(recent, {api.STATUS: api.COMPLETE})
+
+        # Only the jobs last updated before the cutoff are deleted, in
+        # batches of at most the given limit
+        before = datetime.now() - timedelta(seconds=0.005)
+        self.assertEqual(2, self.store.purge(before, 2))
+        self.store.purge(before, 1000)
+        for txn_id in txn_ids:
+            self.assertEqual(api.STATUS_NOT_FOUND,
+                             self.store.get_job_status(txn_id)[api.STATUS])
+        self.assertEqual(api.COMPLETE,
+                         self.store.get_job_status(recent)[api.STATUS])
+
+
+class TestMemoryStatus(StoreContract, TestCase):
+
+    def make_store(self, **kwargs):
+        return MemoryStatus(**kwargs)
+
+    def test_bounded(self):
+        store = self.make_store(max_jobs=2)
+        for txn_id in ('a', 'b', 'c'):
+            store.update_job_status(txn_id, {api.STATUS: api.COMPLETE})
+
+        self.assertEqual(api.STATUS_NOT_FOUND,
+                         store.get_job_status('a')[api.STATUS])
+        self.assertEqual(api.COMPLETE, store.get_job_status('c')[api.STATUS])
+        self.assertEqual(2, store.count())
+
+    def test_keeps_running_jobs(self):
+        store = self.make_store(max_jobs=2)
+        store.update_job_status('running', {api.STATUS: 'inprogress'})
+        for txn_id in ('a', 'b', 'c'):
+            store.update_job_status(txn_id, {api.STATUS: api.COMPLETE})
+
+        # Only the jobs that have finished are discarded to make room
+        self.assertEqual('inprogress',
+                         store.get_job_status('running')[api.STATUS])
+        self.assertEqual(api.COMPLETE, store.get_job_status('c')[api.STATUS])
+        self.assertEqual(2, store.count())
+
+        store.update_job_status('other', {api.STATUS: 'inprogress'})
+        self.assertEqual(api.STATUS_NOT_FOUND,
+                         store.get_job_status('c')[api.STATUS])
+        self.assertEqual('inprogress',
+                         store.get_job_status('other')[api.STATUS])
+
+    def test_retention(self):
+        store = self.make_store(retention=0.01)
+        store.update_job_status('a', {api.STATUS: api.COMPLETE})
+        time.sleep(0.02)
+        self.assertEqual(api.STATUS_NOT_FOUND,
+                         store.get_job_status('a')[api.STATUS])
+
+
+class TestSqliteStatus(StoreContract, TestCase):
+
+    def make_store(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        return SqliteStatus(path=os.path.join(self.dir, 'jobs.db'))
+
+    def test_wal(self):
+        mode = self.store._connection().execute(
+            "PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual('wal', mode)
+
+    def test_persistent(self):
+        self.store.update_job_status('a', {api.STATUS: api.COMPLETE})
+        store = SqliteStatus(path=self.store.path)
+        self.assertEqual(api.COMPLETE, store.get_job_status('a')[api.STATUS])
+
+
+@functional('mysql')
+class TestDbStatusContract(StoreContract, TestCase):
+
+    def make_store(self):
+        return DbStatus()
+
+
+class TestLoadStore(TestCase):
+
+    def test_load(self):
+        for name, cls in (('memory', MemoryStatus), ('sqlite', SqliteStatus),
+                          ('mysql', DbStatus)):
+            with mock.patch.object(job_status, 'get_conf',
+                                   return_value=None):
+                store = job_status.load_store(name)
+            self.assertIsInstance(store, cls)
+            self.assertIsInstance(store, JobStatusStore)
+
+    def test_options(self):
+        settings = {'jobs.store': 'memory',
+                    'jobs.memory': mock.Mock(to_dict=lambda: {
+                        'max_jobs': 5, 'retention': 60})}
+        with mock.patch.object(job_status, 'get_conf',
+                               side_effect=lambda key, default=None:
+                               settings.get(key, default)):
+            store = job_status.load_store()
+        self.assertIsInstance(store, MemoryStatus)
+        self.assertEqual(5, store.max_jobs)
+        self.assertEqual(60, store.retention)
+
+    def test_mysql_options(self):
+        # The mysql store is configured by db_pool, and ignores its section
+        settings = {'jobs.store': 'mysql',
+                    'jobs.mysql': mock.Mock(to_dict=lambda: {'host': 'db'})}
+        with mock.patch.object(job_status, 'get_conf',
+                               side_effect=lambda key, default=None:
+                               settings.get(key, default)), \
+                mock.patch.object(job_status.LOG, 'warn') as warn:
+            store = job_status.load_store()
+        self.assertIsInstance(store, DbStatus)
+        self.assertIn('host', warn.call_args[0])
+
+    def test_incomplete_store(self):
+        class Incomplete(JobStatusStore):
+            def update_job_status(self, txn_id, status):
+                pass
+
+        self.assertRaises(TypeError, Incomplete)
@@ -0,0 +1,94 @@
+# (c) Copyright 2018 SUSE LLC
+import mock
+
+from bll.common import metrics
+from tests.util import TestCase
+
+
+class TestMetrics(TestCase):
+
+    def setUp(self):
+        self.collectors = list(metrics._collectors)
+
+        # Keep the metrics created by these tests out of the registry
+        for name in ('_registry', '_collectors'):
+            patcher = mock.patch.object(metrics, name, [])
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_counter(self):
+        counter = metrics.Counter('test_total', 'Test counter', ('a', 'b'))
+        counter.inc(('x', None))
+        counter.inc(('x', None), 2)
+
+        self.assertEqual(3, counter.value(('x', '')))
+        self.assertEqual(0, counter.value(('y', '')))
+        self.assertEqual('# HELP test_total Test counter\n'
+                         '# TYPE test_total counter\n'
+                         'test_total{a="x",b=""} 3\n', metrics.render())
+
+    def test_gauge(self):
+        gauge = metrics.Gauge('test_gauge', 'Test gauge')
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        self.assertEqual(1, gauge.value())
+        gauge.set(5)
+        self.assertIn('\ntest_gauge 5\n', metrics.render())
+
+    def test_histogram(self):
+        histogram = metrics.Histogram('test_seconds', 'Test histogram',
+                                      ('op',), buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(value, ('x',))
+
+        self.assertEqual(4, histogram.count(('x',)))
+        self.assertEqual(0, histogram.count(('y',)))
+        text = metrics.render()
+        self.assertIn('test_seconds_bucket{le="0.1",op="x"} 2\n', text)
+        self.assertIn('test_seconds_bucket{le="1",op="x"} 3\n', text)
+        self.assertIn('test_seconds_bucket{le="+Inf",op="x"} 4\n', text)
+        self.assertIn('test_seconds_sum{op="x"} 2.65\n', text)
+        self.assertIn('test_seconds_count{op="x"} 4\n', text)
+
+    def test_timer(self):
+        histogram = metrics.Histogram('test_seconds', 'Test histogram')
+        with mock.patch('time.time', side_effect=[10.0, 10.25]):
+            with metrics.Timer(histogram):
+                pass
+        self.assertIn('test_seconds_sum 0.25\n', metrics.render())
+
+    def test_max_series(self):
+        counter = metrics.Counter('test_total', 'Test counter', ('a',))
+        with mock.patch.object(metrics, 'MAX_SERIES', 2):
+            for value in ('x', 'y', 'z', 'w'):
+                counter.inc((value,))
+
+        self.assertEqual(1, counter.value(('x',)))
+        self.assertEqual(2, counter.value(('other',)))
+
+    def test_escaping(self):
+        counter = metrics.Counter('test_total', 'Test counter', ('a',))
+        counter.inc((u'"quoted"\\\n\xe9',))
+        self.assertIn('test_total{a="\\"quoted\\"\\\\\\n\xc3\xa9"} 1',
+                      metrics.render())
+
+    def test_collector(self):
+        @metrics.collector
+        def collect():
+            return [('test_size', 'gauge', 'Test size',
+                     [({'cache': 'c'}, 3)])]
+
+        self.assertEqual('# HELP test_size Test size\n'
+                         '# TYPE test_size gauge\n'
+                         'test_size{cache="c"} 3\n', metrics.render())
+
+    def test_collectors_of_stats(self):
+        # The collectors of the worker pools, caches, single flight calls
+        # and database connection pool, which were registered on import,
+        # produce valid families
+        self.assertEqual(4, len(self.collectors))
+        for fn in self.collectors:
+            for name, type_, documentation, samples in fn():
+                self.assertTrue(name.startswith('bll_'))
+                self.assertIn(type_, ('counter', 'gauge'))
@@ -0,0 +1,122 @@
+# (c) Copyright 2018 SUSE LLC
+import threading
+import time
+
+from bll.common import single_flight
+from tests.util import TestCase
+
+
+class TestSingleFlight(TestCase):
+
+    def _run_concurrently(self, count, key, fn, name):
+        results = [None] * count
+
+        def run(i):
+            try:
+                results[i] = single_flight.do(key, fn, name=name)
+            except Exception as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=run, args=(i,))
+                   for i in range(count)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results
+
+    def test_single_call(self):
+        self.assertEqual(1, single_flight.do('key', lambda: 1, name='single'))
+        self.assertEqual(2, single_flight.do('key', lambda: 2, name='single'))
+        stats = single_flight.stats()['single']
+        self.assertEqual(2, stats['executions'])
+        self.assertEqual(0, stats['shared'])
+
+    def test_concurrent_calls_share_result(self):
+        calls = []
+
+        def work():
+            calls.append(1)
+            time.sleep(0.1)
+            return {'value': [1, 2]}
+
+        results = self._run_concurrently(5, ('shared',), work, 'shared')
+
+        self.assertEqual(1, len(calls))
+        self.assertEqual([{'value': [1, 2]}] * 5, results)
+
+        # Each caller has its own copy of the result
+        self.assertEqual(5, len(set(id(r) for r in results)))
+
+        stats = single_flight.stats()['shared']
+        self.assertEqual(5, stats['calls'])
+        self.assertEqual(1, stats['executions'])
+        self.assertEqual(4, stats['shared'])
+
+    def test_concurrent_calls_share_exception(self):
+        def work():
+            time.sleep(0.1)
+            raise ValueError('failed')
+
+        results = self._run_concurrently(3, ('fail',), work, 'fail')
+        for result in results:
+            self.assertIsInstance(result, ValueError)
+
+        # The failure is not remembered
+        self.assertEqual('ok', single_flight.do(('fail',), lambda: 'ok'))
+
+    def test_interrupted(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def work():
+            started.set()
+            release.wait(5)
+            raise KeyboardInterrupt()
+
+        errors = []
+
+        def run():
+            try:
+                single_flight.do(('interrupted',), work, name='interrupted')
+            except BaseException as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run) for _ in range(2)]
+        for t in threads:
+            t.daemon = True
+        threads[0].start()
+        self.assertTrue(started.wait(5))
+        threads[1].start()
+        deadline = time.time() + 5
+        while single_flight.stats()['interrupted']['calls'] < 2 and \
+                time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for t in threads:
+            t.join(5)
+            self.assertFalse(t.is_alive())
+
+        # The waiter is given the exception too, and the call is forgotten
+        self.assertEqual(2, len(errors))
+        for error in errors:
+            self.assertIsInstance(error, KeyboardInterrupt)
+        self.assertEqual('ok', single_flight.do(('interrupted',),
+                                                lambda: 'ok'))
+
+    def test_different_keys(self):
+        def work():
+            time.sleep(0.05)
+            return threading.current_thread().name
+
+        results = []
+        threads = [threading.Thread(
+            target=lambda k=k: results.append(
+                single_flight.do(k, work, name='keys')))
+            for k in ('a', 'b')]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(2, single_flight.stats()['keys']['executions'])
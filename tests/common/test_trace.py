@@ -0,0 +1,89 @@
+# (c) Copyright 2018 SUSE LLC
+import threading
+import time
+import uuid
+
+import mock
+
+from bll.common import backend, trace
+from bll.common.util import context, new_txn_id
+from tests.util import TestCase
+
+
+class TestTrace(TestCase):
+
+    def setUp(self):
+        self.txn_id = str(uuid.uuid4())
+        context.txn_id = self.txn_id
+        self.addCleanup(setattr, context, 'txn_id', '')
+
+    def test_not_traced(self):
+        with trace.Span('general.echo', trace.REQUEST, self.txn_id):
+            pass
+        self.assertIsNone(trace.get(self.txn_id))
+        self.assertIsNone(trace.tree(self.txn_id))
+
+    def test_tree(self):
+        trace.start(self.txn_id)
+
+        with trace.Span('compute.utilization', trace.REQUEST, self.txn_id):
+            # A nested call, which makes a backend call
+            child_txn_id = new_txn_id(self.txn_id)
+            with trace.Span('nova.hypervisor-list', trace.REQUEST,
+                            child_txn_id):
+                context.txn_id = child_txn_id
+                with backend.Call('nova', 'GET os-hypervisors'):
+                    pass
+                context.txn_id = self.txn_id
+
+            # A nested call made on another thread
+            def other():
+                context.txn_id = self.txn_id
+                with trace.Span('ardana.model', trace.REQUEST,
+                                new_txn_id(self.txn_id)):
+                    time.sleep(0.01)
+            thread = threading.Thread(target=other)
+            thread.start()
+            thread.join()
+
+        # Long-running processing, recorded once finished
+        trace.record(trace.COMPLETE, trace.COMPLETE, time.time(), 0.5,
+                     self.txn_id)
+
+        root, = trace.tree(self.txn_id)
+        self.assertEqual('compute.utilization', root['name'])
+        self.assertEqual(self.txn_id, root['txn_id'])
+        self.assertGreaterEqual(root['duration'], 0.01)
+        self.assertEqual(['nova.hypervisor-list', 'ardana.model', 'complete'],
+                         [c['name'] for c in root['children']])
+
+        nova, ardana, complete = root['children']
+        self.assertEqual(child_txn_id, nova['txn_id'])
+        call, = nova['children']
+        self.assertEqual('nova GET os-hypervisors', call['name'])
+        self.assertEqual(trace.BACKEND, call['kind'])
+        self.assertEqual([], ardana['children'])
+        self.assertEqual(0.5, complete['duration'])
+
+    def test_in_progress(self):
+        trace.start(self.txn_id)
+        with trace.Span('general.progress', trace.REQUEST, self.txn_id):
+            root, = trace.tree(self.txn_id)
+            self.assertIsNone(root['duration'])
+        root, = trace.tree(new_txn_id(self.txn_id))
+        self.assertIsNotNone(root['duration'])
+
+    def test_max_spans(self):
+        with mock.patch.object(trace, 'get_conf', return_value=2):
+            trace.start(self.txn_id)
+
+        with trace.Span('general.fanout', trace.REQUEST, self.txn_id):
+            for _ in range(4):
+                with backend.Call('test', 'call'):
+                    pass
+
+        # Only the first spans are kept, and the rest are counted
+        root, dropped = trace.tree(self.txn_id)
+        self.assertEqual(1, len(root['children']))
+        self.assertEqual(trace.DROPPED, dropped['kind'])
+        self.assertEqual(3, dropped['count'])
@@ -1,6 +1,11 @@
 # (c) Copyright 2015-2016 Hewlett Packard Enterprise Development LP
 # (c) Copyright 2017-2018 SUSE LLC
 import copy
+import logging
+import threading
+from StringIO import StringIO
+
+import mock
 
 from bll.common import util
 from tests import util as test_util
@@ -299,6 +304,161 @@ class Test(test_util.TestCase):
         self.assertTrue('unset' not in result)
         self.assertTrue('*****oken' in result)
 
+    def test_scrub_non_string_values(self):
+        test_data = {'password': None,
+                     'certs': ['a', 'b'],
+                     'auth_token': 12345678,
+                     'count': 3,
+                     'ratio': 0.5,
+                     'enabled': True}
+        result = loads(scrub_passwords(test_data))
+        self.assertEquals(result['password'], blanked_password)
+        self.assertEquals(result['certs'], blanked_password)
+        self.assertEquals(result['auth_token'], blanked_password)
+        self.assertEquals(result['count'], 3)
+        self.assertEquals(result['ratio'], 0.5)
+        self.assertEquals(result['enabled'], True)
+
+    def test_scrub_truncated(self):
+        test_data = [{'name': 'x' * 100, 'password': 'secret'}] * 100
+        result = scrub_passwords(test_data, max_length=1000)
+        self.assertEquals(len(result), 1000 + len('...(truncated)'))
+        self.assertTrue(result.endswith('...(truncated)'))
+        self.assertNotIn('secret', result)
+
+        # Text is scrubbed before it is truncated
+        result = scrub_passwords(str(test_data), max_length=100)
+        self.assertNotIn('secret', result)
+        self.assertEquals(len(result), 100 + len('...(truncated)'))
+
+        # Or not truncated at all
+        test_data = [{'name': 'x' * 100}] * 100
+        self.assertEquals(test_data,
+                          loads(scrub_passwords(test_data, max_length=0)))
+
+    def test_scrub_bll_request_str(self):
+        request = BllRequest(target='deploy', operation='op',
+                             auth_token='4d038a60-2409-4636-b99f',
+                             data={'password': 'secret', 'name': 'x'})
+        result = str(request)
+        self.assertIn('OPERATION:op', result)
+        self.assertNotIn('secret', result)
+        self.assertNotIn('4d038a60', result)
+
+    def test_scrubbed_is_lazy(self):
+        with mock.patch.object(util, 'scrub_passwords',
+                               return_value='scrubbed') as scrub:
+            logger = logging.getLogger('test_scrubbed_is_lazy')
+            logger.setLevel(logging.INFO)
+            logger.debug("Data: %s", util.Scrubbed({'password': 'x'}))
+            self.assertFalse(scrub.called)
+
+            self.assertEquals('scrubbed', str(util.Scrubbed({})))
+
+        self.assertEquals('None', str(util.Scrubbed(None)))
+
+    def test_deferred_is_lazy(self):
+        fn = mock.Mock(return_value='text')
+        logger = logging.getLogger('test_deferred_is_lazy')
+        logger.setLevel(logging.INFO)
+
+        logger.debug("Response %s", util.Deferred(fn, 1, 2))
+        self.assertFalse(fn.called)
+
+        self.assertEquals('text', str(util.Deferred(fn, 1, 2)))
+        fn.assert_called_once_with(1, 2)
+
+    def test_async_handler(self):
+        records = []
+        done = threading.Event()
+
+        class Target(logging.Handler):
+            def emit(self, record):
+                records.append((threading.current_thread(), record))
+                done.set()
+
+        target = Target()
+        target.addFilter(util.ContextFilter())
+        handler = util.AsyncHandler(target)
+
+        logger = logging.getLogger('test_async_handler')
+        logger.propagate = False
+        logger.addFilter(util.ContextFilter())
+        logger.addHandler(handler)
+        try:
+            args = ['before']
+            util.context.txn_id = 'txn-1'
+            logger.warn("Message %s", args)
+            args[0] = 'after'
+            self.assertTrue(done.wait(5))
+        finally:
+            util.context.txn_id = ''
+            logger.removeHandler(handler)
+            handler.close()
+
+        thread, record = records[0]
+        self.assertIsNot(threading.current_thread(), thread)
+        self.assertEquals("Message ['before']", record.getMessage())
+        self.assertEquals('txn-1', record.txn_id)
+
+    def test_async_handler_full(self):
+        target = mock.Mock(spec=logging.Handler)
+        blocked = threading.Event()
+        target.handle.side_effect = lambda record: blocked.wait(5)
+        handler = util.AsyncHandler(target, max_queue=1)
+        try:
+            record = logging.makeLogRecord({'msg': 'message'})
+            for _ in range(5):
+                handler.emit(record)
+
+            # One record is being handled and one queued; the rest dropped
+            self.assertGreaterEqual(handler.dropped, 3)
+        finally:
+            blocked.set()
+            handler.close()
+
+    def test_setup_async_logging(self):
+        handler = logging.NullHandler()
+        loggers = [logging.getLogger('test_setup_async_logging.%d' % i)
+                   for i in range(2)]
+        for logger in loggers:
+            logger.addHandler(handler)
+
+        util.setup_async_logging(loggers=loggers)
+        try:
+            wrapper = loggers[0].handlers[0]
+            self.assertIsInstance(wrapper, util.AsyncHandler)
+            self.assertIs(handler, wrapper.target)
+            self.assertEquals([wrapper], loggers[1].handlers)
+        finally:
+            for logger in loggers:
+                logger.removeHandler(wrapper)
+            wrapper.close()
+
+    def test_async_logging_child_txn_id(self):
+        # Records propagated from child loggers only pass through the
+        # filters of the handlers, not of the logger they are handled by
+        stream = StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter('[%(txn_id)s] %(message)s'))
+        handler.addFilter(util.ContextFilter())
+        parent = logging.getLogger('test_async_logging_child_txn_id')
+        parent.propagate = False
+        parent.addHandler(handler)
+        child = logging.getLogger('test_async_logging_child_txn_id.child')
+
+        util.setup_async_logging(loggers=[parent])
+        wrapper = parent.handlers[0]
+        try:
+            util.context.txn_id = 'async-txn'
+            child.warn("Message")
+        finally:
+            util.context.txn_id = ''
+            parent.removeHandler(wrapper)
+            wrapper.close()
+
+        self.assertEquals('[async-txn] Message\n', stream.getvalue())
+
     def test_new_txn_id(self):
 
         txn_id = util.new_txn_id()
@@ -0,0 +1,145 @@
+# (c) Copyright 2018 SUSE LLC
+import threading
+import time
+
+from bll import api
+from bll.api.request import BllRequest
+from bll.common import worker_pool
+from bll.common.exception import ServiceUnavailableException
+from bll.common.worker_pool import WorkerPool, PoolTimeoutError
+from bll.plugins.service import SvcBase
+from tests.util import TestCase
+
+
+class TestWorkerPool(TestCase):
+
+    def test_result(self):
+        pool = WorkerPool('test', 2)
+        self.assertEqual(5, pool.submit(lambda x, y: x + y, 2, y=3).result())
+
+    def test_exception(self):
+        def fail():
+            raise ValueError('oops')
+
+        pool = WorkerPool('test', 2)
+        future = pool.submit(fail)
+        self.assertRaises(ValueError, future.result)
+
+    def test_timeout(self):
+        pool = WorkerPool('test', 1)
+        future = pool.submit(time.sleep, 0.5)
+        self.assertRaises(PoolTimeoutError, future.result, 0.01)
+
+    def test_bounded_threads(self):
+        pool = WorkerPool('test', 3)
+        threads = set()
+
+        def record():
+            threads.add(threading.current_thread().name)
+            time.sleep(0.01)
+
+        futures = [pool.submit(record) for _ in range(30)]
+        for f in futures:
+            f.result()
+
+        self.assertLessEqual(len(threads), 3)
+        stats = pool.stats()
+        self.assertEqual(3, stats['threads'])
+        self.assertEqual(30, stats['submitted'])
+        self.assertEqual(30, stats['completed'])
+        self.assertEqual(0, stats['queue_depth'])
+        self.assertGreater(stats['wait_max'], 0)
+
+    def test_reject_when_full(self):
+        pool = WorkerPool('test', 1, max_queue=1)
+        event = threading.Event()
+
+        # Occupy the only worker, then fill the queue
+        busy = pool.submit(event.wait)
+        time.sleep(0.05)
+        queued = pool.submit(lambda: 'queued')
+
+        self.assertRaises(ServiceUnavailableException, pool.submit, len, [])
+        self.assertEqual(1, pool.stats()['rejected'])
+        self.assertEqual(1, pool.stats()['queue_depth'])
+
+        event.set()
+        busy.result()
+        self.assertEqual('queued', queued.result())
+
+    def test_nested_submit_runs_inline(self):
+        # A worker waiting on work queued in its own pool would deadlock a
+        # single-threaded pool, so nested submissions must run inline
+        pool = WorkerPool('test', 1)
+
+        def outer():
+            return pool.submit(lambda: 'inner').result(timeout=1)
+
+        self.assertEqual('inner', pool.submit(outer).result(timeout=2))
+
+    def test_in_worker(self):
+        pool = WorkerPool('test', 1)
+        self.assertFalse(worker_pool.in_worker())
+        self.assertTrue(pool.submit(worker_pool.in_worker).result())
+
+    def test_run_concurrently(self):
+        pool = WorkerPool('test', 4)
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def work(i):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            if i == 3:
+                raise ValueError(i)
+            return i
+
+        calls = [lambda i=i: work(i) for i in range(6)]
+        results = worker_pool.run_concurrently(pool, calls, concurrency=2)
+
+        self.assertEqual([0, 1, 2], results[:3])
+        self.assertIsInstance(results[3], ValueError)
+        self.assertEqual([4, 5], results[4:])
+        self.assertLessEqual(running[1], 2)
+
+    def test_run_concurrently_timeout(self):
+        pool = WorkerPool('test', 2)
+        event = threading.Event()
+        try:
+            results = worker_pool.run_concurrently(
+                pool, [lambda: 1, event.wait], timeout=0.05)
+        finally:
+            event.set()
+        self.assertEqual(1, results[0])
+        self.assertIsInstance(results[1], PoolTimeoutError)
+
+    def test_spawn_rejected(self):
+        pool = WorkerPool('handle', 1, max_queue=1)
+        event = threading.Event()
+        pool.submit(event.wait)
+        time.sleep(0.05)
+        pool.submit(lambda: None)
+
+        request = BllRequest(target='general', operation='null')
+        saved = worker_pool._pools.get('handle')
+        worker_pool._pools['handle'] = pool
+        try:
+            with self.assertRaises(ServiceUnavailableException) as cm:
+                SvcBase.spawn_service(request)
+            self.assertEqual(503, cm.exception.status_code)
+        finally:
+            event.set()
+            if saved:
+                worker_pool._pools['handle'] = saved
+            else:
+                del worker_pool._pools['handle']
+
+    def test_spawn_uses_pool(self):
+        reply = SvcBase.spawn_service(
+            BllRequest(target='general', operation='null'))
+        self.assertEqual(api.COMPLETE, reply[api.STATUS])
+        self.assertIn('handle', worker_pool.stats())
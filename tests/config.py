@@ -50,6 +50,35 @@ db = {
     'password': DB_PASSWORD,
 }
 
+# Pool of connections to the database.  Connections idle for check_after
+# seconds are pinged before reuse, and those idle for max_idle seconds are
+# closed (keeping min_size open).  Callers wait up to timeout seconds for a
+# connection when max_size are in use
+db_pool = {
+    'min_size': 1,
+    'max_size': 10,
+    'max_idle': 300,
+    'check_after': 30,
+    'timeout': 10,
+}
+
+# Worker threads that execute plugin requests.  Requests that arrive while all
+# workers are busy wait in a queue; once max_queue requests are waiting,
+# further requests are rejected with http status 503.  A max_queue of 0 means
+# that the queue is unbounded
+worker_pool = {
+    'handle': {'size': 16, 'max_queue': 256},
+    'complete': {'size': 16, 'max_queue': 256},
+    'fanout': {'size': 16, 'max_queue': 256},
+    'refresh': {'size': 2, 'max_queue': 64},
+}
+
+# Cached results would leak between tests that mock the same operation
+# differently, so the response cache is disabled except where tested
+caches = {
+    'response': {'enabled': False},
+}
+
 app = {
     'root': 'bll.api.controllers.root.RootController',
     'modules': ['bll'],
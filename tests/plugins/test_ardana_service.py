@@ -1,5 +1,6 @@
 # (c) Copyright 2016-2017 Hewlett Packard Enterprise Development LP
 # (c) Copyright 2017-2018 SUSE LLC
+import json
 from mock import mock, patch
 
 from tests.util import functional, get_token_from_env, TestCase, randomurl, \
@@ -130,6 +131,7 @@ class ArdSvcUnitTest(TestCase):
             def __init__(self, status_code, data):
                 self.status_code = status_code
                 self.data = data
+                self.content = json.dumps(data)
 
             def json(self):
                 return self.data
@@ -175,11 +177,13 @@ class ArdSvcUnitTest(TestCase):
         status = get_job_status(txn_id)
         self.assertTrue(status['status'], api.STATUS_INPROGRESS)
         svc.update_job_status()
+        status = get_job_status(txn_id)
         self.assertTrue(status['status'], api.STATUS_INPROGRESS)
 
         # Now pretend we are done
         svc.update_job_status('done', percentage_complete=100, txn_id=txn_id)
         svc.sc_complete()
+        status = get_job_status(txn_id)
         self.assertTrue(status['status'], api.COMPLETE)
         self.assertFalse(status[api.DATA]['alive'])
         self.assertEquals(status[api.DATA]['code'], 0)
@@ -1,12 +1,17 @@
 # (c) Copyright 2015-2016 Hewlett Packard Enterprise Development LP
 # (c) Copyright 2017 SUSE LLC
 
-from bll.plugins.service import SvcBase
+from bll.common.cache import get_cache
+from bll.plugins import service
+from bll.plugins.service import SvcBase, expose, CACHE_KEY_GLOBAL
+from stubs.plugins.expose_service import ExposeSvc
 from tests.util import TestCase
 from bll.api.request import BllRequest
 from bll.common.job_status import get_job_status
 from bll import api
 from tests import util
+import mock
+import threading
 import time
 import logging
 
@@ -215,3 +220,246 @@ class TestExposeSvc(TestCase):
         # even though the data_in_response method doesn't return anything,
         # we should still see data
         self.assertEqual(reply[api.DATA], 'blah')
+
+    def test_plugin_data(self):
+        svc = ExposeSvc(BllRequest(target='expose', operation='valid_op',
+                                   api_version='v1', suggest_sync=True,
+                                   data={'foo': 'bar'}))
+        self.assertEqual('valid_op', svc.operation)
+        self.assertEqual('v1', svc.api_version)
+        self.assertEqual({'foo': 'bar'}, svc.data)
+
+        # The plugin's data is its own to modify
+        svc.data['baz'] = 1
+        self.assertEqual(1, svc.data['baz'])
+        self.assertNotIn('baz', svc.request)
+
+    def test_metrics(self):
+        labels = ('expose', 'valid_op', None)
+        requests = service.REQUESTS.value(labels + ('complete',))
+        handled = service.HANDLE_SECONDS.count(labels)
+
+        SvcBase.spawn_service(BllRequest(target='expose',
+                                         operation='valid_op'))
+        self.assertEqual(requests + 1,
+                         service.REQUESTS.value(labels + ('complete',)))
+        self.assertEqual(handled + 1, service.HANDLE_SECONDS.count(labels))
+
+        # Failures are counted by their status
+        labels = ('expose', 'bogus', None)
+        errors = service.REQUESTS.value(labels + ('error',))
+        SvcBase.spawn_service(BllRequest(target='expose', operation='bogus'))
+        self.assertEqual(errors + 1,
+                         service.REQUESTS.value(labels + ('error',)))
+
+        # Complete processing is only timed for long-running operations
+        labels = ('expose', 'progress', None)
+        completed = service.COMPLETE_SECONDS.count(labels)
+        reply = SvcBase.spawn_service(BllRequest(
+            target='expose', operation='progress',
+            data={'pause_sec': 0.01, 'num_pauses': 2}))
+        self.assertEqual(api.STATUS_INPROGRESS, reply[api.STATUS])
+        for _ in range(50):
+            if service.COMPLETE_SECONDS.count(labels) > completed:
+                break
+            time.sleep(0.1)
+        self.assertEqual(completed + 1,
+                         service.COMPLETE_SECONDS.count(labels))
+
+    def test_dispatch_table(self):
+        table = ExposeSvc.dispatch_table()
+
+        # The table is built once per class
+        self.assertIs(table, ExposeSvc.dispatch_table())
+        self.assertIsNot(table, SvcBase.dispatch_table())
+
+        self.assertEqual(ExposeSvc.do_op.im_func, table.lookup('valid_op'))
+        self.assertEqual(ExposeSvc.do_multi.im_func, table.lookup('op2'))
+        self.assertEqual(ExposeSvc.do_action.im_func,
+                         table.lookup(None, 'act'))
+        self.assertIsNone(table.lookup('not_exposed'))
+        self.assertIsNone(table.lookup(None, 'bogus'))
+
+    def test_exposed_operations(self):
+        self.assertEqual(['data_in_response', 'do_action', 'op1', 'op2',
+                          'progress', 'slow_op', 'valid_op'],
+                         ExposeSvc.exposed_operations())
+        self.assertEqual([], SvcBase.exposed_operations())
+
+    def test_dispatch_by_action(self):
+
+        class Svc(SvcBase):
+            @expose('thing', action='GET')
+            def get_thing(self):
+                return 'get'
+
+            @expose('thing', action='PUT')
+            def put_thing(self):
+                return 'put'
+
+        class SubSvc(Svc):
+            @expose('other')
+            def other(self):
+                return 'other'
+
+        for action in ('GET', 'PUT'):
+            svc = Svc(BllRequest(operation='thing', action=action))
+            self.assertEqual(action.lower(), svc.handle()[api.DATA])
+
+        svc = Svc(BllRequest(operation='thing', action='DELETE'))
+        self.assertIsNone(svc._get_method('thing', 'DELETE'))
+
+        # Subclasses have their own table, including inherited methods
+        self.assertEqual(['other', 'thing'], SubSvc.exposed_operations())
+        self.assertEqual(['thing'], Svc.exposed_operations())
+
+    def test_single_flight(self):
+        calls = []
+
+        class Svc(SvcBase):
+            @expose(single_flight=True)
+            def read(self):
+                calls.append(self.txn_id)
+                time.sleep(0.1)
+                return {'value': self.data.get('value')}
+
+        def request(value, token='token'):
+            return BllRequest(operation='read', auth_token=token,
+                              data={'value': value})
+
+        requests = [request(1), request(1), request(1),
+                    request(2), request(1, token='other')]
+        replies = [None] * len(requests)
+
+        def run(i):
+            replies[i] = Svc(requests[i]).handle()
+
+        threads = [threading.Thread(target=run, args=(i,))
+                   for i in range(len(requests))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # The identical requests shared a single call, while those with
+        # different data or a different token made their own
+        self.assertEqual(3, len(calls))
+        for i, reply in enumerate(replies):
+            self.assertEqual(api.COMPLETE, reply[api.STATUS])
+            self.assertEqual(requests[i].txn_id, reply[api.TXN_ID])
+        self.assertEqual([1, 1, 1, 2, 1],
+                         [r[api.DATA]['value'] for r in replies])
+
+    def test_single_flight_scope(self):
+        svc = SvcBase(BllRequest(operation='read', auth_token='token'))
+        auth_ref = mock.Mock(project_id='admin',
+                             role_names=['member', 'admin'])
+
+        # Without a known auth_ref, the token is the scope
+        self.assertEqual('token', svc._privilege_scope())
+
+        with mock.patch('bll.plugins.service.get_appropriate_auth_ref') as m:
+            m.get.return_value = auth_ref
+            self.assertEqual(('admin', ('admin', 'member')),
+                             svc._privilege_scope())
+
+        svc = SvcBase(BllRequest(operation='read'))
+        self.assertIsNone(svc._privilege_scope())
+
+
+class TestCachedExpose(TestCase):
+
+    def setUp(self):
+        self.cache = get_cache('response')
+        self.cache.enabled = True
+        self.cache.clear()
+        self.calls = []
+
+        calls = self.calls
+
+        class Svc(SvcBase):
+            @expose(cache_ttl=60)
+            def read(self):
+                calls.append(self.data.get('value'))
+                return {'value': self.data.get('value'), 'calls': len(calls)}
+
+            @expose(cache_ttl=60, cache_key=CACHE_KEY_GLOBAL)
+            def read_global(self):
+                calls.append('global')
+                return len(calls)
+
+            @expose(cache_ttl=0.05, cache_stale=60)
+            def read_short(self):
+                calls.append('short')
+                return len(calls)
+
+        self.Svc = Svc
+
+    def tearDown(self):
+        self.cache.clear()
+        self.cache.enabled = False
+
+    def handle(self, operation, value=1, token='token'):
+        request = BllRequest(operation=operation, auth_token=token,
+                             data={'value': value})
+        return self.Svc(request).handle()[api.DATA]
+
+    def test_cached(self):
+        first = self.handle('read')
+        self.assertEqual(first, self.handle('read'))
+        self.assertEqual(1, len(self.calls))
+
+        # Callers get their own copy of the cached data
+        first['value'] = 'changed'
+        self.assertEqual(1, self.handle('read')['value'])
+
+        # Different data or privileges are cached separately
+        self.handle('read', value=2)
+        self.handle('read', token='other')
+        self.assertEqual(3, len(self.calls))
+
+    def test_global(self):
+        self.assertEqual(1, self.handle('read_global'))
+        self.assertEqual(1, self.handle('read_global', token='other'))
+        self.assertEqual(1, len(self.calls))
+
+    def test_stale_while_revalidate(self):
+        self.assertEqual(1, self.handle('read_short'))
+        time.sleep(0.1)
+
+        # The stale value is returned while it is refreshed in the background
+        self.assertEqual(1, self.handle('read_short'))
+        for _ in range(50):
+            if len(self.calls) == 2:
+                break
+            time.sleep(0.01)
+        time.sleep(0.01)
+        self.assertEqual(2, self.handle('read_short'))
+
+    def test_invalidate(self):
+        self.handle('read')
+        self.handle('read_global')
+        self.Svc.invalidate_cache('read')
+        self.handle('read')
+        self.handle('read_global')
+        self.assertEqual([1, 'global', 1], self.calls)
+
+        self.Svc.invalidate_cache()
+        self.handle('read_global')
+        self.assertEqual([1, 'global', 1, 'global'], self.calls)
+
+    def test_disabled(self):
+        self.cache.enabled = False
+        self.handle('read')
+        self.handle('read')
+        self.assertEqual(2, len(self.calls))
+
+    def test_stats(self):
+        def counts():
+            stats = self.cache.stats()['by_name'].get('None.read', {})
+            return stats.get('hits', 0), stats.get('misses', 0)
+
+        hits, misses = counts()
+        self.handle('read')
+        self.handle('read')
+        self.assertEqual((hits + 1, misses + 1), counts())
@@ -0,0 +1,42 @@
+# (c) Copyright 2018 SUSE LLC
+import mock
+
+from bll.common.exception import InvalidBllRequestException
+from bll.plugins import registry
+from stubs.plugins.general_service import GeneralSvc
+from tests.util import TestCase
+
+
+class TestRegistry(TestCase):
+
+    def test_get(self):
+        self.assertIs(GeneralSvc, registry.get('general'))
+
+    def test_get_missing(self):
+        self.assertRaises(InvalidBllRequestException, registry.get, 'bogus')
+
+    def test_names(self):
+        names = registry.names()
+        self.assertIn('general', names)
+        self.assertIn('catalog', names)
+        self.assertEqual(sorted(names), names)
+
+    def test_loaded_once(self):
+        registry.load()
+        with mock.patch('stevedore.extension.ExtensionManager') as mgr:
+            for _ in range(3):
+                registry.get('general')
+        self.assertFalse(mgr.called)
+
+    def test_reload(self):
+        ext = mock.Mock()
+        ext.name = 'new-plugin'
+        ext.plugin = GeneralSvc
+        try:
+            with mock.patch('stevedore.extension.ExtensionManager',
+                            return_value=[ext]):
+                registry.reload()
+            self.assertEqual(['new-plugin'], registry.names())
+        finally:
+            registry.reload()
+        self.assertNotIn('new-plugin', registry.names())
@@ -1,9 +1,12 @@
 # (c) Copyright 2015-2016 Hewlett Packard Enterprise Development LP
 # (c) Copyright 2017 SUSE LLC
+import logging
 import mock
 import time
+from bll.common import worker_pool
+from bll.common.util import context
 from bll.plugins.service import SvcBase, expose
-from tests.util import TestCase, randomword
+from tests.util import TestCase, randomword, log_level
 from bll.api.request import BllRequest
 from bll.common.job_status import get_job_status
 from bll import api
@@ -26,6 +29,21 @@ class TestSvcCollection(TestCase):
         self.assertIn(api.ENDTIME, reply)
         self.assertIn(api.STARTTIME, reply)
 
+    def test_spawn_short_skips_complete(self):
+        # Short requests take no room in the complete pool
+        bll_request = BllRequest(target='general', operation='null')
+        complete = worker_pool.get_pool('complete')
+        with mock.patch.object(complete, 'submit') as submit:
+            reply = SvcBase.spawn_service(bll_request)
+        self.assertEqual(api.COMPLETE, reply[api.STATUS])
+        self.assertFalse(submit.called)
+
+        bll_request = BllRequest(target='general', operation='progress',
+                                 data={'pause_sec': 0, 'num_pauses': 1})
+        with mock.patch.object(complete, 'submit') as submit:
+            SvcBase.spawn_service(bll_request)
+        self.assertTrue(submit.called)
+
     def test_spawn_long(self):
 
         pauses = 5
@@ -111,6 +129,126 @@ class TestSvcCollection(TestCase):
 
         self.assertEqual(api.STATUS_ERROR, reply[api.STATUS])
 
+    def test_call_service_inline(self):
+        # Short-running operations called via call_service run directly on
+        # the caller's thread, bypassing the worker pools
+        class Foo(SvcBase):
+            @expose()
+            def bar(self):
+                return self.call_service(target='general', operation='echo',
+                                         data={'message': 'hi'})
+
+        svc = Foo(BllRequest(operation='bar'))
+        with mock.patch.object(worker_pool, 'get_pool') as get_pool:
+            reply = svc.handle()
+        self.assertEqual('hi', reply[api.DATA])
+        self.assertFalse(get_pool.called)
+
+    def test_call_service_inline_context(self):
+        class Foo(SvcBase):
+            @expose()
+            def bar(self):
+                return self.call_service(target='general',
+                                         operation='context')
+
+        svc = Foo(BllRequest(operation='bar', language='ja'))
+        context.txn_id = svc.txn_id
+        try:
+            reply = svc.handle()
+            # The caller's txn_id is restored after the nested call
+            self.assertEqual(svc.txn_id, context.txn_id)
+        finally:
+            context.txn_id = ''
+
+        nested = reply[api.DATA]
+        self.assertEqual('ja', nested['language'])
+        self.assertNotEqual(svc.txn_id, nested['txn_id'])
+        self.assertTrue(nested['txn_id'].startswith(svc.txn_id + '.'))
+
+    def test_call_service_inline_fail(self):
+        class Foo(SvcBase):
+            @expose()
+            def bar(self):
+                return self.call_service(target='general',
+                                         operation='failhandle')
+
+        svc = Foo(BllRequest(operation='bar'))
+        with log_level(logging.CRITICAL, 'bll'):
+            self.assertRaisesRegexp(Exception, 'Intentional', svc.handle)
+
+    def test_call_service_generated(self):
+        # Generated data is returned to other plugins as a list
+        class Foo(SvcBase):
+            @expose()
+            def bar(self):
+                return self.call_service(target='general',
+                                         operation='generate',
+                                         data={'count': 2})
+
+        svc = Foo(BllRequest(operation='bar'))
+        self.assertEqual([{'id': 0}, {'id': 1}], svc.handle()[api.DATA])
+
+    def test_call_services_parallel(self):
+        class Foo(SvcBase):
+            @expose()
+            def bar(self):
+                return self.call_services_parallel([
+                    {'target': 'general', 'operation': 'echo',
+                     'data': {'message': 'one'}},
+                    {'target': 'general', 'operation': 'failhandle'},
+                    {'target': 'general', 'operation': 'context'},
+                ])
+
+        svc = Foo(BllRequest(operation='bar', language='ja'))
+        context.txn_id = svc.txn_id
+        try:
+            with log_level(logging.CRITICAL, 'bll'):
+                echo, fail, nested = svc.handle()[api.DATA]
+            self.assertEqual(svc.txn_id, context.txn_id)
+        finally:
+            context.txn_id = ''
+
+        self.assertEqual('one', echo)
+        self.assertIsInstance(fail, Exception)
+        self.assertIn('Intentional', str(fail))
+        self.assertEqual('ja', nested['language'])
+        self.assertTrue(nested['txn_id'].startswith(svc.txn_id + '.'))
+
+    def test_call_services_parallel_overlaps(self):
+        class Foo(SvcBase):
+            @expose()
+            def bar(self):
+                return self.call_services_parallel(
+                    [{'target': 'general', 'operation': 'echo'}] * 4)
+
+        def slow_call(**kwargs):
+            time.sleep(0.1)
+            return kwargs['operation']
+
+        svc = Foo(BllRequest(operation='bar'))
+        with mock.patch.object(svc, 'call_service', side_effect=slow_call):
+            start = time.time()
+            reply = svc.handle()
+            elapsed = time.time() - start
+
+        self.assertEqual(['echo'] * 4, reply[api.DATA])
+        self.assertLess(elapsed, 0.3)
+
+    def test_call_services_parallel_timeout(self):
+        class Foo(SvcBase):
+            @expose()
+            def bar(self):
+                return self.call_services_parallel(
+                    [{'target': 'general', 'operation': 'echo'}],
+                    timeout=0.05)
+
+        svc = Foo(BllRequest(operation='bar'))
+        with mock.patch.object(svc, 'call_service',
+                               side_effect=lambda **kw: time.sleep(0.2)):
+            reply = svc.handle()
+        self.assertIsInstance(reply[api.DATA][0],
+                              worker_pool.PoolTimeoutError)
+
     def test_call_service_async_indirect(self):
 
         # Test an async service that calls another async service via
@@ -226,6 +364,41 @@ class TestSvcCollection(TestCase):
         reply = svc.complete()
         self.assertEquals(api.COMPLETE, reply[api.STATUS])
 
+    def test_call_service_async_notified(self):
+
+        # Completion of the called service is noticed immediately rather than
+        # after the polling interval
+        class Foo(SvcBase):
+            @expose(is_long=True)
+            def bar(self):
+                return self.call_service_async(target="general",
+                                               operation="echo_slow",
+                                               message='hi',
+                                               polling_interval=30)
+
+        svc = Foo(BllRequest(operation="bar"))
+        start = time.time()
+        reply = svc.complete()
+        self.assertLess(time.time() - start, 5)
+        self.assertEquals(api.COMPLETE, reply[api.STATUS])
+        self.assertEquals('hi', reply[api.DATA])
+
+    def test_call_service_async_handle_error(self):
+
+        # An error from the handle processing of the called service is
+        # raised without waiting for a job status that will never arrive
+        class Foo(SvcBase):
+            @expose(is_long=True)
+            def bar(self):
+                return self.call_service_async(target="bogus",
+                                               polling_interval=30)
+
+        svc = Foo(BllRequest(operation="bar"))
+        with log_level(logging.CRITICAL, 'bll'):
+            reply = svc.complete()
+        self.assertEquals(api.STATUS_ERROR, reply[api.STATUS])
+        self.assertIn('bogus', reply[api.DATA][0][api.DATA])
+
     def test_call_service_async_timeout(self):
 
         class Foo(SvcBase):